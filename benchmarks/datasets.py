@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import base64
+import io
+
+import numpy as np
+import pandas as pd
+
+
+# Rock types used as the grouping column of synthetic datasets
+ROCK_TYPES: tuple[str, ...] = (
+    "basalt", "basaltic andesite", "andesite", "dacite", "rhyolite", "trachyte",
+)
+
+
+def synthetic_dataset(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a synthetic major-element dataset with realistic value ranges.
+
+    Oxides follow rough liquid lines of descent against SiO2 (MgO, FeO and
+    CaO decrease, alkalis increase), with noise and a few missing values.
+
+    Parameters
+    ----------
+    n_rows : int
+        Number of samples.
+    seed : int, optional
+        Seed of the random generator.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataset with Sample, RockType and oxide columns (wt.%).
+    """
+    rng = np.random.default_rng(seed)
+    silica = rng.uniform(42.0, 77.0, n_rows)
+    t = (silica - 42.0) / 35.0
+
+    def oxide(start: float, stop: float, noise: float) -> np.ndarray:
+        values = start + (stop - start) * t + rng.normal(0.0, noise, n_rows)
+        return np.round(np.clip(values, 0.0, None), 2)
+
+    df = pd.DataFrame(
+        {
+            "Sample": [f"S{i:07d}" for i in range(n_rows)],
+            "RockType": pd.Categorical(
+                np.asarray(ROCK_TYPES)[np.minimum((t * len(ROCK_TYPES)).astype(int), 5)]
+            ),
+            "SiO2": np.round(silica, 2),
+            "TiO2": oxide(2.5, 0.2, 0.2),
+            "Al2O3": oxide(15.0, 13.0, 1.0),
+            "FeO": oxide(11.0, 1.5, 0.8),
+            "MnO": oxide(0.2, 0.05, 0.02),
+            "MgO": oxide(9.0, 0.3, 0.8),
+            "CaO": oxide(11.0, 1.0, 0.8),
+            "Na2O": oxide(2.5, 4.0, 0.4),
+            "K2O": oxide(0.5, 4.5, 0.4),
+            "P2O5": oxide(0.4, 0.05, 0.05),
+        }
+    )
+    # About 1% of the minor oxide analyses are missing
+    missing = rng.random(n_rows) < 0.01
+    df.loc[missing, "P2O5"] = np.nan
+    return df
+
+
+def to_upload_contents(df: pd.DataFrame, fmt: str) -> tuple[str, str]:
+    """
+    Encode a dataset as a dcc.Upload contents string.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset to encode.
+    fmt : str
+        "csv" or "xlsx".
+
+    Returns
+    -------
+    tuple[str, str]
+        (contents, filename)
+    """
+    if fmt == "csv":
+        payload = df.to_csv(index=False).encode("utf-8")
+        mime = "text/csv"
+    elif fmt == "xlsx":
+        buffer = io.BytesIO()
+        df.to_excel(buffer, index=False)
+        payload = buffer.getvalue()
+        mime = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+    encoded = base64.b64encode(payload).decode("ascii")
+    return f"data:{mime};base64,{encoded}", f"synthetic.{fmt}"
@@ -0,0 +1,283 @@
+"""
+Benchmark harness for ingestion, serialization and figure generation.
+
+Run from the repository root, e.g.::
+
+    python -m benchmarks.run --sizes 1000 100000 --output results.json
+    python -m benchmarks.run --compare results.json --output new.json
+
+Each benchmark reports the best wall time over ``--repeat`` runs, after
+one warm-up run, and the peak traced memory of one extra run (tracemalloc). Results are written as
+JSON together with the git commit and library versions, so that runs on
+different commits can be compared.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import pandas as pd
+import plotly
+import plotly.io as pio
+
+from benchmarks.datasets import synthetic_dataset, to_upload_contents
+from src.plots.basic_xy import create_xy_scatter
+from src.plots.harker import create_harker_scatter
+from src.utils.data_io import get_numeric_and_categorical_columns, parse_uploaded_file
+from src.utils.dataset_cache import deserialize_frame, serialize_frame
+
+
+DEFAULT_SIZES: tuple[int, ...] = (1_000, 10_000, 100_000, 1_000_000)
+
+# Writing and parsing XLSX above this size takes minutes; such runs are skipped
+XLSX_MAX_ROWS: int = 100_000
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """
+    A benchmarked operation.
+
+    ``setup`` builds the input from a synthetic dataset (not timed), and
+    ``run`` performs the measured operation. If ``run`` returns a dict, its
+    entries are added to the result (e.g. output sizes).
+    """
+
+    name: str
+    setup: Callable[[pd.DataFrame], Any]
+    run: Callable[[Any], Optional[Dict[str, Any]]]
+    max_rows: Optional[int] = None
+
+
+def _parse(upload: tuple[str, str]) -> Dict[str, Any]:
+    df = parse_uploaded_file(*upload)
+    return {"frame_bytes": int(df.memory_usage(deep=True).sum())}
+
+
+def _store_round_trip(df: pd.DataFrame) -> Dict[str, Any]:
+    payload = serialize_frame(df)
+    deserialize_frame(payload)
+    return {"payload_bytes": len(payload)}
+
+
+def _figure_size(fig: Any) -> Dict[str, Any]:
+    return {"figure_json_bytes": len(pio.to_json(fig, validate=False))}
+
+
+BENCHMARKS: tuple[Benchmark, ...] = (
+    Benchmark("parse_csv", lambda df: to_upload_contents(df, "csv"), _parse),
+    Benchmark(
+        "parse_xlsx",
+        lambda df: to_upload_contents(df, "xlsx"),
+        _parse,
+        max_rows=XLSX_MAX_ROWS,
+    ),
+    Benchmark("store_round_trip", lambda df: df, _store_round_trip),
+    Benchmark(
+        "column_split",
+        lambda df: df,
+        lambda df: get_numeric_and_categorical_columns(df) and None,
+    ),
+    Benchmark(
+        "xy_scatter",
+        lambda df: df,
+        lambda df: _figure_size(create_xy_scatter(df, "SiO2", "MgO", "RockType")),
+    ),
+    Benchmark(
+        "harker_scatter",
+        lambda df: df,
+        lambda df: _figure_size(create_harker_scatter(df, "MgO", "RockType")),
+    ),
+    Benchmark(
+        "figure_json",
+        lambda df: create_xy_scatter(df, "SiO2", "MgO", "RockType"),
+        lambda fig: {"figure_json_bytes": len(pio.to_json(fig))},
+    ),
+)
+
+
+def measure(benchmark: Benchmark, df: pd.DataFrame, repeat: int) -> Dict[str, Any]:
+    """
+    Time one benchmark on ``df`` and trace its peak memory.
+
+    Parameters
+    ----------
+    benchmark : Benchmark
+        Benchmark to run.
+    df : pd.DataFrame
+        Synthetic dataset.
+    repeat : int
+        Number of timed runs; the best time is reported.
+
+    Returns
+    -------
+    dict
+        Result record (benchmark, rows, seconds, peak_bytes, extras).
+    """
+    state = benchmark.setup(df)
+    # Untimed first run, so lazy imports and one-off caches are not measured
+    benchmark.run(state)
+
+    timings = []
+    extras: Dict[str, Any] = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        extras = benchmark.run(state) or {}
+        timings.append(time.perf_counter() - start)
+
+    # Memory is traced separately, since tracing slows the run down
+    tracemalloc.start()
+    try:
+        benchmark.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "benchmark": benchmark.name,
+        "rows": len(df),
+        "seconds": min(timings),
+        "peak_bytes": peak,
+        **extras,
+    }
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    names: Optional[Sequence[str]] = None,
+    repeat: int = 3,
+    log: Optional[Callable[[str], None]] = print,
+) -> list[Dict[str, Any]]:
+    """
+    Run the selected benchmarks on synthetic datasets of each size.
+
+    Parameters
+    ----------
+    sizes : sequence of int, optional
+        Dataset sizes, in rows.
+    names : sequence of str, optional
+        Benchmarks to run. All benchmarks are run if None.
+    repeat : int, optional
+        Number of timed runs per benchmark.
+    log : callable, optional
+        Called with a progress line after each benchmark.
+
+    Returns
+    -------
+    list[dict]
+        One result record per benchmark and size.
+    """
+    selected = [b for b in BENCHMARKS if names is None or b.name in names]
+    results = []
+    for n_rows in sizes:
+        df = synthetic_dataset(n_rows)
+        for benchmark in selected:
+            if benchmark.max_rows is not None and n_rows > benchmark.max_rows:
+                continue
+            result = measure(benchmark, df, repeat)
+            results.append(result)
+            if log is not None:
+                log(
+                    f"{benchmark.name:>18} {n_rows:>9,} rows  "
+                    f"{result['seconds'] * 1e3:10.1f} ms  "
+                    f"{result['peak_bytes'] / 2**20:8.1f} MiB peak"
+                )
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """
+    Describe the commit and library versions a run was made with.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "json_engine": _json_engine(),
+        "machine": platform.machine(),
+    }
+
+
+def _json_engine() -> str:
+    """
+    Engine used by plotly (and Dash callbacks) to serialize figures.
+    """
+    engine = pio.json.config.default_engine
+    if engine == "auto":
+        engine = "orjson" if importlib.util.find_spec("orjson") is not None else "json"
+    return engine
+
+
+def compare(baseline: Sequence[Dict[str, Any]], results: Sequence[Dict[str, Any]]) -> list[str]:
+    """
+    Format the time and memory ratios of ``results`` against ``baseline``.
+
+    Ratios above 1 mean the new run is slower or uses more memory.
+    """
+    reference = {(r["benchmark"], r["rows"]): r for r in baseline}
+    lines = []
+    for result in results:
+        base = reference.get((result["benchmark"], result["rows"]))
+        if base is None:
+            continue
+        lines.append(
+            f"{result['benchmark']:>18} {result['rows']:>9,} rows  "
+            f"time x{result['seconds'] / base['seconds']:6.2f}  "
+            f"memory x{result['peak_bytes'] / max(base['peak_bytes'], 1):6.2f}"
+        )
+    return lines
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=[b.name for b in BENCHMARKS],
+        help="Benchmarks to run (default: all).",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.only, args.repeat)
+    report = {"environment": environment(), "results": results}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        print(f"\nCompared to {baseline['environment'].get('commit')}:")
+        for line in compare(baseline["results"], results):
+            print(line)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,201 +1,989 @@
+"""
+Dash application factory.
+
+Importing this package is kept cheap: it does not build an app (entry
+points call :func:`create_app`), and pandas, the plotting modules and the
+file parsers are only imported by the callbacks that use them. Worker
+processes and test collection therefore do not pay for them up front.
+"""
 from __future__ import annotations
 
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Hashable, Iterable
 
-from dash import Dash, Input, Output, State, dash_table
+from dash import ClientsideFunction, Dash, Input, Output, Patch, State, dcc, html
 import dash
 import dash_bootstrap_components as dbc
-import pandas as pd
-import io
 
+from src.app.background import (
+    background_options,
+    create_background_manager,
+    default_background_dir,
+    with_progress,
+)
 from src.components.layout import create_layout
-from src.utils.data_io import parse_uploaded_file, get_numeric_and_categorical_columns
-from src.plots.basic_xy import create_xy_scatter
-from src.plots.harker import create_harker_scatter
+from src.utils.cache_backend import CacheBackend, DiskBackend
+from src.utils.dataset_cache import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_DERIVED_BYTES,
+    DEFAULT_MAX_INDEX_BYTES,
+    DatasetCache,
+    dataset_token,
+    frame_nbytes,
+)
+from src.utils.figure_cache import DEFAULT_MAX_FIGURES, FigureCache, figure_key
+from src.utils.instrumentation import Metrics, note, stage
+from src.utils.session_state import DEFAULT_SESSION_BYTES, DEFAULT_SESSION_TTL, SessionStore
 
+if TYPE_CHECKING:
+    import pandas as pd
 
 
-from src.components.layout import create_layout
+# Figures each session keeps for quick switching back, most recent last
+SESSION_RECENT_FIGURES: int = 4
+
+
+def _preview_columns(df: pd.DataFrame) -> list[dict]:
+    """
+    Build DataTable column specs for a preview of ``df``.
+
+    Float columns are formatted to 7 significant digits so that values
+    stored as float32 display as typed (50.1 rather than 50.099998).
+    """
+    import pandas as pd
+    from dash.dash_table.Format import Format, Scheme, Trim
+
+    numeric_format = Format(precision=7, scheme=Scheme.decimal_or_exponent, trim=Trim.yes)
+    columns: list[dict] = []
+    for col in df.columns:
+        spec = {"name": col, "id": col}
+        if pd.api.types.is_float_dtype(df[col]):
+            spec.update(type="numeric", format=numeric_format)
+        columns.append(spec)
+    return columns
+
 
+def _memory_note(before: int, after: int) -> str:
+    """
+    Describe the memory held by a compacted dataset, for upload-status.
+    """
+    size = f"{after / 2**20:.1f} MB" if after >= 2**20 else f"{after / 2**10:.0f} KB"
+    note = f"{size} in memory"
+    if before > after:
+        note += f", {1 - after / before:.0%} less after compaction"
+    return note
+
+
+def _single_point_traces(fig) -> bool:
+    """
+    Tell whether each panel of ``fig`` draws all its points in one trace.
 
-def create_app() -> Dash:
+    This is the case of ungrouped figures and of groupings collapsed into
+    colored buckets (see :func:`src.plots.basic_xy.group_buckets`); figures
+    with one trace per group set a legend group on their point traces.
+    """
+    return not any(
+        trace.legendgroup for trace in fig.data if trace.hoverinfo != "skip"
+    )
+
+
+def _figure_update(fig, base: list, shown_base: list | None) -> tuple:
+    """
+    Return the figure-store update for ``fig`` and its base.
+
+    The base is the dataset, diagram type and axes of the figure, followed
+    by its number of traces and whether its panels draw their points in a
+    single trace. When the browser already shows a figure with the same
+    dataset, diagram type and axes, and only the grouping changed, the
+    layout is unchanged and a Patch of the traces is sent. If both figures
+    draw single point traces, their point coordinates are unchanged too,
+    so the Patch only carries the group colors (see :func:`_regroup_patch`).
+    """
+    shown = [*base, len(fig.data), _single_point_traces(fig)]
+    if (
+        dash.ctx.triggered_id != "group-column-dropdown"
+        or shown_base is None
+        or shown_base[:-2] != base
+    ):
+        return fig, shown
+    if shown_base[-1] and shown[-1]:
+        return _regroup_patch(fig, shown_base[-2]), shown
+    patch = Patch()
+    # to_dict encodes the arrays as base64 typed arrays, like full figures
+    patch["data"] = fig.to_dict()["data"]
+    return patch, shown
+
+
+def _regroup_patch(fig, shown_traces: int) -> Patch:
+    """
+    Patch a figure shown in the browser into ``fig``, a regrouping of it.
+
+    Both figures draw the points of each panel in a single trace, first
+    (see :func:`_single_point_traces`); only their marker colors, hover
+    labels and the legend-only traces that follow them differ, so the X
+    and Y arrays are not sent again.
+
+    Parameters
+    ----------
+    fig : plotly.graph_objs.Figure
+        Figure with the new grouping.
+    shown_traces : int
+        Number of traces of the figure shown in the browser.
+
+    Returns
+    -------
+    Patch
+        Update of figure-store.
+    """
+    # to_dict encodes the marker colors as base64 typed arrays, like full figures
+    data = fig.to_dict()["data"]
+    # Legend-only traces skip hover, point traces do not
+    n_points = sum(trace.get("hoverinfo") != "skip" for trace in data)
+    patch = Patch()
+    for i in range(n_points):
+        for prop in ("marker", "customdata", "hovertemplate"):
+            if prop in data[i]:
+                patch["data"][i][prop] = data[i][prop]
+            else:
+                del patch["data"][i][prop]
+    for i in reversed(range(n_points, shown_traces)):
+        del patch["data"][i]
+    patch["data"].extend(data[n_points:])
+    return patch
+
+
+def create_app(
+    max_dataset_bytes: int = DEFAULT_MAX_BYTES,
+    spill_dir: str | None = None,
+    max_figures: int = DEFAULT_MAX_FIGURES,
+    cache_backend: CacheBackend | None = None,
+    compress: bool = False,
+    background: bool = False,
+    background_dir: str | None = None,
+    instrument: bool = True,
+    debug_panel: bool = False,
+    max_session_bytes: int = DEFAULT_SESSION_BYTES,
+    session_ttl: float = DEFAULT_SESSION_TTL,
+    compact: bool = True,
+    compact_rtol: float | None = None,
+    dl_policy: str | None = "nan",
+    max_derived_bytes: int = DEFAULT_MAX_DERIVED_BYTES,
+    max_index_bytes: int = DEFAULT_MAX_INDEX_BYTES,
+) -> Dash:
     """
     Application factory for the Dash app.
 
+    Parameters
+    ----------
+    max_dataset_bytes : int, optional
+        Memory budget of the server-side dataset cache, in bytes.
+    spill_dir : str, optional
+        Directory where evicted datasets are spilled to disk. Disabled if None.
+    max_figures : int, optional
+        Number of built figures kept in the figure cache.
+    cache_backend : CacheBackend, optional
+        Store shared between worker processes for datasets and figures.
+        Required when serving with several worker processes.
+    compress : bool, optional
+        Gzip responses (requires flask-compress).
+    background : bool, optional
+        Run uploads and figure generation as Dash background callbacks in
+        a local process pool (requires diskcache). Jobs are cancelled when
+        their inputs change and report progress to the UI.
+    background_dir : str, optional
+        Directory of the background job queue. If no ``cache_backend`` is
+        given, background mode also keeps a shared disk cache there, since
+        jobs run in separate processes.
+    instrument : bool, optional
+        Time callbacks and their stages, measure payload sizes, add
+        Server-Timing headers and serve the totals at ``/metrics``.
+    debug_panel : bool, optional
+        Show callback timings and cache statistics in the page (requires
+        ``instrument``).
+    max_session_bytes : int, optional
+        Memory budget shared by the per-session state (see
+        :class:`src.utils.session_state.SessionStore`), in bytes.
+    session_ttl : float, optional
+        Idle time after which a session's state is dropped, in seconds.
+    compact : bool, optional
+        Store uploaded datasets in compact dtypes (see
+        :func:`src.utils.data_io.compact_frame`) and report the memory saved
+        in upload-status.
+    compact_rtol : float, optional
+        Relative error accepted when downcasting float columns. By default
+        only columns whose values are unchanged in float32 are downcast.
+    dl_policy : {"nan", "half", "dl"} or None, optional
+        Value stored for entries below a detection limit ("<0.01") in text
+        columns converted back to numbers on upload (see
+        :func:`src.utils.detection_limits.coerce_numeric_columns`). None
+        keeps such columns as text.
+    max_derived_bytes : int, optional
+        Memory budget of the derived columns computed for the selected
+        axes (see :class:`src.utils.derived.DerivedColumnCache`), in bytes.
+        Only used by requests without a session; sessions keep their own
+        derived columns, counted in ``max_session_bytes``.
+    max_index_bytes : int, optional
+        Memory budget of the sort and filter indexes of the data preview
+        (see :class:`src.utils.table_query.TableIndexCache`), in bytes.
+
     Returns
     -------
     Dash
         Configured Dash application instance.
     """
+    from src.utils.derived import (
+        DerivedColumnCache,
+        available_derived_columns,
+        compute_derived,
+    )
+    from src.utils.profile import ProfileCache, profile_dataset
+    from src.utils.selection import TraceRowsCache
+    from src.utils.table_query import TableIndexCache
+
+    manager = None
+    if background:
+        background_dir = background_dir or default_background_dir()
+        manager = create_background_manager(background_dir)
+        if cache_backend is None:
+            cache_backend = DiskBackend(f"{background_dir}/cache")
+
     app: Dash = Dash(
         __name__,
         external_stylesheets=[dbc.themes.BOOTSTRAP],
         suppress_callback_exceptions=True,
         title="Geochemical Diagram Generator",
+        compress=compress,
+    )
+
+    debug_panel = debug_panel and instrument
+
+    def serve_layout():
+        # A function, so that every page load gets its own session id
+        return create_layout(app, debug_panel=debug_panel)
+
+    app.layout = serve_layout
+
+    # Parsed datasets live server-side; the browser only holds their token
+    figures = FigureCache(max_entries=max_figures, backend=cache_backend)
+    # Derived columns and profiles of requests without a session; sessions
+    # hold their own, so that they count toward the session budget
+    derived = DerivedColumnCache(max_bytes=max_derived_bytes)
+    profiles = ProfileCache()
+    table_indexes = TableIndexCache(max_bytes=max_index_bytes)
+    # Dataset rows behind the points of each figure, to highlight selections
+    figure_rows = TraceRowsCache()
+
+    def forget_dataset(token: str) -> None:
+        figures.invalidate(token)
+        derived.invalidate(token)
+        profiles.invalidate(token)
+        table_indexes.invalidate(token)
+        figure_rows.invalidate(token)
+
+    datasets = DatasetCache(
+        max_bytes=max_dataset_bytes,
+        spill_dir=spill_dir,
+        on_evict=forget_dataset,
+        backend=cache_backend,
     )
 
-    app.layout = create_layout(app)
+    def release_entry(session_id: str, key: Hashable, value: Any) -> None:
+        # Datasets no session works on anymore are evicted from memory, if
+        # they can be reloaded; otherwise they stay in the dataset cache LRU
+        if key != "dataset" or not datasets.recoverable:
+            return
+        if all(held[0] != value[0] for held in sessions.values(key)):
+            datasets.release(value[0])
+
+    # What each browser session holds, with a shared budget and idle expiry
+    sessions = SessionStore(
+        max_bytes=max_session_bytes,
+        ttl=session_ttl,
+        on_release=release_entry,
+    )
+
+    def session_dataset(session_id: str | None, token: str | None) -> pd.DataFrame | None:
+        """
+        Resolve a dataset token, preferring the dataset held by the session.
+        """
+        held = sessions.get(session_id, "dataset")
+        if held is not None and held[0] == token:
+            return held[1]
+        df = datasets.get(token)
+        if df is not None and session_id is not None:
+            sessions.put(session_id, "dataset", (token, df))
+        return df
+
+    def remember_figure(session_id: str | None, key: tuple, fig) -> None:
+        """
+        Keep ``fig`` among the recent figures of the session.
+        """
+        if session_id is None:
+            return
+        recent = OrderedDict(sessions.get(session_id, "figures") or {})
+        recent[key] = fig
+        recent.move_to_end(key)
+        while len(recent) > SESSION_RECENT_FIGURES:
+            recent.popitem(last=False)
+        sessions.put(session_id, "figures", recent)
+
+    def session_derived(
+        session_id: str | None,
+        token: str,
+        df: pd.DataFrame,
+        names: Iterable[str | None],
+    ) -> pd.DataFrame:
+        """
+        Return ``df`` extended with the derived columns ``names``.
+
+        Columns computed for a session are kept in it, next to its dataset.
+        """
+        if session_id is None:
+            return derived.with_columns(token, df, names)
+        held = sessions.get(session_id, "derived")
+        columns = dict(held[1]) if held is not None and held[0] == token else {}
+        derivable = set(available_derived_columns(df.columns))
+        wanted = [name for name in dict.fromkeys(names) if name in derivable]
+        missing = [name for name in wanted if name not in columns]
+        if missing:
+            columns.update(compute_derived(df, missing))
+            sessions.put(session_id, "derived", (token, columns))
+        if not wanted:
+            return df
+        return df.assign(**{name: columns[name] for name in wanted})
+
+    def session_profile(session_id: str | None, token: str, df: pd.DataFrame) -> dict:
+        """
+        Return the profile of the dataset ``token``, kept in the session.
+
+        Profiles fit the axes to the full data range; the browser only gets
+        a copy.
+        """
+        if session_id is None:
+            return profiles.get(token, df)
+        held = sessions.get(session_id, "profile")
+        if held is not None and held[0] == token:
+            return held[1]
+        profile = profile_dataset(df)
+        sessions.put(session_id, "profile", (token, profile))
+        return profile
+
+    def session_selection(session_id: str | None, token: str | None, n_rows: int):
+        """
+        Return the rows selected in the session on the dataset ``token``, or None.
+        """
+        import numpy as np
+
+        held = sessions.get(session_id, "selection")
+        if held is None or held[0] != token:
+            return None
+        return np.unpackbits(held[1], count=n_rows, bitorder="little").astype(bool)
+
+    def figure_trace_rows(session_id: str | None, key: tuple):
+        """
+        Return the dataset rows of each trace of the figure ``key``.
+
+        They are recorded when the figure is built; figures served from the
+        shared cache (built by another process, or before a restart) are
+        built again to recover them.
+        """
+        from src.plots.figures import build_figure, figure_columns
+
+        rows = figure_rows.get(key)
+        if rows is not None:
+            return rows
+        token, diagram_type, x_col, y_col, group_col = key[:5]
+        df = session_dataset(session_id, token)
+        if df is None:
+            return None
+        extended = session_derived(
+            session_id, token, df, figure_columns(diagram_type, x_col, y_col)
+        )
+        rows = []
+        build_figure(extended, diagram_type, x_col, y_col, group_col, trace_rows=rows)
+        figure_rows.put(key, rows)
+        return rows
+
+    app.dataset_cache = datasets  # type: ignore[attr-defined]
+    app.figure_cache = figures  # type: ignore[attr-defined]
+    app.session_store = sessions  # type: ignore[attr-defined]
+
+    metrics = Metrics()
+    metrics.add_gauges("dataset_cache", datasets.stats)
+    metrics.add_gauges("figure_cache", figures.stats)
+    metrics.add_gauges("sessions", sessions.stats)
+    metrics.add_gauges("trace_rows", figure_rows.stats)
+    metrics.add_gauges("profiles", profiles.stats)
+    metrics.add_gauges("derived_columns", derived.stats)
+    metrics.add_gauges("table_indexes", table_indexes.stats)
+    if instrument:
+        metrics.install(app.server, callback_map=app.callback_map)
+    app.metrics = metrics  # type: ignore[attr-defined]
 
     @app.callback(
         Output("data-store", "data"),
         Output("upload-status", "children"),
-        Output("data-preview", "children"),
+        Output("preview-table", "columns"),
+        Output("preview-table", "page_current"),
+        Output("preview-table", "sort_by"),
+        Output("preview-table", "filter_query"),
+        Output("column-meta-store", "data"),
         Input("upload-data", "contents"),
         State("upload-data", "filename"),
+        State("session-id", "data"),
         prevent_initial_call=True,
+        **background_options(
+            manager,
+            progress=Output("upload-status", "children"),
+            running=[(Output("upload-data", "disabled"), True, False)],
+        ),
     )
-    def handle_file_upload(contents: str | None, filename: str | None):
+    @with_progress(manager)
+    def handle_file_upload(
+        set_progress,
+        contents: list[str] | None,
+        filenames: list[str] | None,
+        session_id: str | None,
+    ):
         """
-        Handle file upload and store parsed dataframe as JSON.
+        Handle file upload and register the parsed dataframe server-side.
+
+        Several files can be uploaded at once; they are parsed in parallel
+        and concatenated into one dataset with a source-file column. Text
+        columns of annotated numbers ("<0.01", "bdl", "52.3*") are
+        converted to numbers, with a boolean "<column>_flag" column marking
+        the converted cells, and the dataset is compacted. In background
+        mode, parsing progress is reported in upload-status.
+        The preview table is reset to its first page; its rows are served
+        by update_preview_page. The dataset profile is computed once per
+        dataset and kept in the session; a copy goes to column-meta-store,
+        from which the browser builds the dropdowns.
+        The dataset becomes the state of the session, replacing the one it
+        held before.
 
         Returns
         -------
         tuple
-            (data_json, status_message, preview_component)
+            (dataset_token, status_message, preview_columns, page_current,
+            sort_by, filter_query, column_meta)
         """
-        if contents is None or filename is None:
+        if not contents or not filenames:
             raise dash.exceptions.PreventUpdate  # type: ignore[attr-defined]
 
-        try:
-            df = parse_uploaded_file(contents, filename)
-        except Exception as exc:  # noqa: BLE001
-            return None, f"Error reading file: {exc}", ""
-
-        # Basic preview: show first 10 rows
-        preview_table = dash_table.DataTable(
-            columns=[{"name": c, "id": c} for c in df.columns],
-            data=df.head(10).to_dict("records"),
-            page_size=10,
-            style_table={"overflowX": "auto"},
-            style_cell={"fontSize": 12},
-        )
-
-        return df.to_json(date_format="iso", orient="split"), f"Loaded file: {filename}", preview_table
+        from src.plots.tas import add_tas_classification
+        from src.utils.data_io import compact_frame, parse_uploaded_files
+        from src.utils.detection_limits import add_flag_columns, coerce_numeric_columns
+
+        if len(contents) == 1:
+            token = dataset_token(contents[0])
+            label = filenames[0]
+            loaded = f"file: {label}"
+        else:
+            # Filenames end up in the source column, so they are part of the key
+            token = dataset_token(contents, names=filenames)
+            label = loaded = f"{len(filenames)} files"
+
+        with stage("lookup"):
+            df = datasets.get(token)
+        memory = flagged = None
+        if df is None:
+            report = None
+            if set_progress is not None:
+                def report(fraction: float) -> None:
+                    set_progress(f"Parsing {label}: {fraction:.0%}")
+            try:
+                with stage("parse"):
+                    df = parse_uploaded_files(contents, filenames, progress=report)
+                if dl_policy is not None:
+                    with stage("coerce"):
+                        df, flags = coerce_numeric_columns(df, policy=dl_policy)
+                        # Kept with the dataset, so that they can color points
+                        df = add_flag_columns(df, flags)
+                        flagged = int(flags.to_numpy().sum())
+            except Exception as exc:  # noqa: BLE001
+                return None, f"Error reading file: {exc}", [], 0, [], "", None
+            if compact:
+                with stage("compact"):
+                    before = frame_nbytes(df)
+                    df = compact_frame(df, rtol=compact_rtol)
+                    memory = _memory_note(before, frame_nbytes(df))
+            with stage("classify"):
+                df = add_tas_classification(df)
+            with stage("store"):
+                datasets.put(token, df)
+
+        if session_id is not None:
+            for key in ("figures", "selection", "derived", "profile"):
+                sessions.discard(session_id, key)
+            sessions.put(session_id, "dataset", (token, df))
+
+        with stage("profile"):
+            profile = session_profile(session_id, token, df)
+        # Derived columns are only listed here; they are computed on selection
+        meta = {**profile, "derived": available_derived_columns(df.columns)}
+
+        details = [f"{len(df):,} rows"]
+        if memory is not None:
+            details.append(memory)
+        if flagged:
+            details.append(f"{flagged:,} values below detection or annotated")
+        status = f"Loaded {loaded} ({', '.join(details)})"
+        return token, status, _preview_columns(df), 0, [], "", meta
 
     @app.callback(
-        Output("x-column-dropdown", "options"),
-        Output("y-column-dropdown", "options"),
-        Output("group-column-dropdown", "options"),
+        Output("preview-table", "data"),
+        Output("preview-table", "page_count"),
+        Input("preview-table", "page_current"),
+        Input("preview-table", "page_size"),
+        Input("preview-table", "sort_by"),
+        Input("preview-table", "filter_query"),
         Input("data-store", "data"),
+        Input("selection-store", "data"),
+        State("session-id", "data"),
     )
-    def update_column_dropdowns(data_json: str | None):
+    def update_preview_page(
+        page_current: int | None,
+        page_size: int,
+        sort_by: list[dict] | None,
+        filter_query: str | None,
+        token: str | None,
+        selection: dict | None,
+        session_id: str | None,
+    ):
         """
-        Update dropdown options based on uploaded dataframe.
+        Serve one page of the server-side dataset to the preview table.
+
+        Filtering and sorting run on the server against per-column indexes,
+        so only ``page_size`` rows are sent to the browser per request.
+        While points are selected on the graph, only their rows are shown.
 
         Parameters
         ----------
-        data_json : str | None
-            JSON representation of the dataframe.
+        page_current : int | None
+            Zero-based page requested by the table.
+        page_size : int
+            Rows per page.
+        sort_by : list[dict] | None
+            Sort specification of the table.
+        filter_query : str | None
+            Filter query of the table, e.g. "{MgO} > 10".
+        token : str | None
+            Token of the server-side dataset.
+        selection : dict | None
+            Summary of the graph selection (see update_selection).
+        session_id : str | None
+            Id of the browser session.
 
         Returns
         -------
         tuple
-            Options for X, Y, and group dropdowns.
+            (page_records, page_count)
         """
-        if data_json is None:
-            return [], [], []
-
-        df = pd.read_json(io.StringIO(data_json), orient="split")
-        numeric_cols, non_numeric_cols = get_numeric_and_categorical_columns(df)
+        df = session_dataset(session_id, token)
+        if df is None:
+            return [], 1
+
+        index = table_indexes.get(token, df)
+        selected = None
+        if selection is not None:
+            selected = session_selection(session_id, token, len(df))
+        try:
+            with stage("query"):
+                return index.query(
+                    filter_query, sort_by, page_current or 0, page_size, selected=selected
+                )
+        except ValueError:
+            # Incomplete or invalid filter expressions match nothing
+            return [], 1
 
-        numeric_options = [{"label": col, "value": col} for col in numeric_cols]
-        group_options = [{"label": col, "value": col} for col in non_numeric_cols]
+    app.clientside_callback(
+        ClientsideFunction(namespace="petrolite", function_name="columnOptions"),
+        Output("x-column-dropdown", "options"),
+        Output("y-column-dropdown", "options"),
+        Output("group-column-dropdown", "options"),
+        Input("column-meta-store", "data"),
+    )
 
-        return numeric_options, numeric_options, group_options
+    app.clientside_callback(
+        ClientsideFunction(namespace="petrolite", function_name="groupWarning"),
+        Output("group-warning", "children"),
+        Input("figure-store", "data"),
+        State("group-column-dropdown", "value"),
+    )
 
     @app.callback(
-        Output("main-graph", "figure"),
+        Output("figure-store", "data"),
+        Output("figure-base-store", "data"),
+        Output("figure-key-store", "data"),
         Input("diagram-type-radio", "value"),
         Input("x-column-dropdown", "value"),
         Input("y-column-dropdown", "value"),
         Input("group-column-dropdown", "value"),
         Input("data-store", "data"),
+        State("figure-base-store", "data"),
+        State("session-id", "data"),
+        **background_options(
+            manager,
+            progress=Output("graph-status", "children"),
+            progress_default="",
+            cancel=[Input("upload-data", "contents")],
+        ),
     )
+    @with_progress(manager)
     def update_main_graph(
+        set_progress,
         diagram_type: str,
         x_col: str | None,
         y_col: str | None,
         group_col: str | None,
-        data_json: str | None,
+        token: str | None,
+        shown_base: list | None,
+        session_id: str | None,
     ):
         """
         Update the main graph when diagram type, axes, group, or data change.
 
+        The figure goes to figure-store; marker style and axis labels are
+        applied in the browser by the styleFigure clientside callback. When
+        only the grouping changes, a Patch of the traces is sent instead of
+        the full figure; it only carries the group colors when the point
+        coordinates are unchanged (see :func:`_figure_update`). In
+        background mode, a new request supersedes a running one, and a new
+        upload cancels it. The key of the figure goes to figure-key-store,
+        and the dataset rows of its traces are kept to highlight selections.
+        Axes are fitted to the full data range from the server-side profile
+        of the dataset.
+
         Parameters
         ----------
+        set_progress : callable or None
+            Progress reporter injected in background mode.
         diagram_type : str
-            Selected diagram type ("custom" or "harker").
+            Selected diagram type ("custom", "harker", "harker_plate" or "tas").
         x_col : str | None
             Selected X-axis column for custom diagrams.
         y_col : str | None
             Selected Y-axis column.
         group_col : str | None
             Selected grouping (color by) column.
-        data_json : str | None
-            JSON representation of the dataframe.
+        token : str | None
+            Token of the server-side dataset.
+        shown_base : list | None
+            Dataset, diagram type, axes and trace count of the figure in
+            figure-store.
+        session_id : str | None
+            Id of the browser session; its recent figures are looked up
+            before the shared figure cache.
 
         Returns
         -------
-        plotly.graph_objs.Figure
-            Updated figure based on current settings.
+        tuple
+            (figure or Patch of its group colors, figure_base, figure_key)
         """
         import plotly.graph_objects as go
 
-        if data_json is None or y_col is None:
-            return go.Figure()
+        from src.plots.figures import build_figure, figure_columns
+
+        if token is None:
+            return go.Figure(), None, None
+
+        # X is locked to SiO2 in Harker modes, and the plate and TAS
+        # diagrams have fixed axes, so unused selections are not part of the key
+        if diagram_type in ("harker_plate", "tas"):
+            x_col, y_col = None, None
+        elif y_col is None:
+            return go.Figure(), None, None
+        elif diagram_type == "harker":
+            x_col = None
+        elif x_col is None:
+            return go.Figure(), None, None
+
+        base = [token, diagram_type, x_col, y_col]
+        key = figure_key(token, diagram_type, x_col, y_col, group_col)
+        fig = (sessions.get(session_id, "figures") or {}).get(key) or figures.get(key)
+        note("figure-cache", "hit" if fig is not None else "miss")
+        if fig is not None:
+            remember_figure(session_id, key, fig)
+            return (*_figure_update(fig, base, shown_base), key)
+
+        if set_progress is not None:
+            set_progress("Loading dataset...")
+        with stage("load"):
+            df = session_dataset(session_id, token)
+        if df is None:
+            fig = go.Figure()
+            fig.update_layout(title="Dataset expired, please upload the file again.")
+            return fig, None, None
+
+        if set_progress is not None:
+            set_progress("Building figure...")
+        with stage("derive"):
+            extended = session_derived(
+                session_id, token, df, figure_columns(diagram_type, x_col, y_col)
+            )
+        rows: list = []
+        with stage("build"):
+            fig = build_figure(
+                extended,
+                diagram_type,
+                x_col,
+                y_col,
+                group_col,
+                session_profile(session_id, token, df),
+                trace_rows=rows,
+            )
+
+        with stage("cache"):
+            figures.put(key, fig)
+            figure_rows.put(key, rows)
+            remember_figure(session_id, key, fig)
+        return (*_figure_update(fig, base, shown_base), key)
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="petrolite", function_name="selectionGeometry"),
+        Output("selection-geometry-store", "data"),
+        Input("main-graph", "selectedData"),
+        prevent_initial_call=True,
+    )
 
-        df = pd.read_json(io.StringIO(data_json), orient="split")
+    @app.callback(
+        Output("selection-store", "data"),
+        Output("selection-status", "children"),
+        Output("preview-table", "page_current", allow_duplicate=True),
+        Input("selection-geometry-store", "data"),
+        Input("data-store", "data"),
+        State("figure-key-store", "data"),
+        State("session-id", "data"),
+        prevent_initial_call=True,
+    )
+    def update_selection(
+        geometry: dict | None,
+        token: str | None,
+        key: list | None,
+        session_id: str | None,
+    ):
+        """
+        Resolve a box or lasso selection on the graph to dataset rows.
 
-        # Harker mode: X is locked to SiO2
-        if diagram_type == "harker":
-            try:
-                fig = create_harker_scatter(
-                    df=df,
-                    y_col=y_col,
-                    group_col=group_col,
-                    base_col="SiO2",
-                )
-            except ValueError as exc:
-                # If SiO2 is missing, show an empty figure with an informative title
-                fig = go.Figure()
-                fig.update_layout(
-                    title=str(exc),
-                    xaxis_title="",
-                    yaxis_title="",
-                )
-            return fig
+        The selection is tested against every row of the dataset, not only
+        the points drawn, and kept server-side as a bitmap in the session.
+        The browser gets a summary in selection-store, which the other
+        views (highlights on every diagram, preview table) follow. A new
+        dataset or an empty selection clears it.
 
-        # Default: custom X-Y diagram
-        if x_col is None:
-            return go.Figure()
+        Parameters
+        ----------
+        geometry : dict | None
+            Box ranges or lasso points of the selection, by axis id.
+        token : str | None
+            Token of the server-side dataset.
+        key : list | None
+            Key of the figure the selection was made on.
+        session_id : str | None
+            Id of the browser session.
 
-        fig = create_xy_scatter(df, x_col, y_col, group_col)
-        return fig
+        Returns
+        -------
+        tuple
+            (selection_summary, status_message, page_current)
+        """
+        import numpy as np
+
+        from src.plots.figures import figure_axes, figure_columns
+        from src.utils.selection import selection_mask
+
+        cleared = None, "", 0
+        if session_id is not None:
+            sessions.discard(session_id, "selection")
+        if geometry is None or dash.ctx.triggered_id == "data-store":
+            return cleared
+        if token is None or key is None or key[0] != token:
+            return cleared
+        df = session_dataset(session_id, token)
+        if df is None:
+            return cleared
+
+        _, diagram_type, x_col, y_col = key[:4]
+        with stage("derive"):
+            extended = session_derived(
+                session_id, token, df, figure_columns(diagram_type, x_col, y_col)
+            )
+        axes = figure_axes(diagram_type, x_col, y_col, extended.columns)
+
+        def axis_values(x: str, y: str):
+            return tuple(
+                extended[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in (x, y)
+            )
+
+        with stage("select"):
+            mask = selection_mask(geometry, axes, axis_values, len(df))
+        count = int(np.count_nonzero(mask))
+        if session_id is not None:
+            sessions.put(session_id, "selection", (token, np.packbits(mask, bitorder="little")))
+        status = (
+            f"{count:,} of {len(df):,} samples selected, highlighted on every diagram "
+            "and in the preview (double-click the graph to clear)."
+        )
+        return {"token": token, "count": count}, status, 0
 
     @app.callback(
-        Output("x-column-dropdown", "disabled"),
-        Input("diagram-type-radio", "value"),
+        Output("highlight-store", "data"),
+        Input("selection-store", "data"),
+        Input("figure-key-store", "data"),
+        State("session-id", "data"),
     )
-    def toggle_x_dropdown_disabled(diagram_type: str) -> bool:
+    def update_highlight(
+        selection: dict | None,
+        key: list | None,
+        session_id: str | None,
+    ):
         """
-        Disable the X-axis dropdown when Harker mode is selected,
-        since the X axis is fixed to SiO2.
+        Send the selected points of each trace of the shown figure.
+
+        Only per-trace bitsets are sent; the styleFigure clientside
+        callback turns them into ``selectedpoints`` on the figure the
+        browser already holds, so figures are not rebuilt nor sent again.
 
         Parameters
         ----------
-        diagram_type : str
-            Selected diagram type.
+        selection : dict | None
+            Summary of the selection (see update_selection).
+        key : list | None
+            Key of the figure shown.
+        session_id : str | None
+            Id of the browser session.
 
         Returns
         -------
-        bool
-            True if the X-axis dropdown should be disabled, False otherwise.
+        dict | None
+            ``{"key": figure_key, "traces": [bitset or None, ...]}``, or None
+            without a selection.
         """
-        return diagram_type == "harker"
+        from src.utils.selection import trace_highlights
+
+        if selection is None or key is None or selection["token"] != key[0]:
+            return None
+        df = session_dataset(session_id, key[0])
+        if df is None:
+            return None
+        mask = session_selection(session_id, key[0], len(df))
+        if mask is None:
+            return None
+        with stage("rows"):
+            rows = figure_trace_rows(session_id, tuple(key))
+        if rows is None:
+            return None
+        with stage("pack"):
+            return {"key": key, "traces": trace_highlights(mask, rows)}
 
+    @app.callback(
+        Output("export-download", "data"),
+        Output("export-status", "children"),
+        Input("export-button", "n_clicks"),
+        State("export-format-radio", "value"),
+        State("data-store", "data"),
+        State("session-id", "data"),
+        prevent_initial_call=True,
+    )
+    def export_dataset(
+        n_clicks: int | None,
+        fmt: str,
+        token: str | None,
+        session_id: str | None,
+    ):
+        """
+        Download the session dataset, with all derivable columns added.
 
+        The export can be uploaded again later without any parsing.
 
-    return app
+        Parameters
+        ----------
+        n_clicks : int | None
+            Number of clicks on the export button.
+        fmt : str
+            Export format, a key of ``EXPORT_FORMATS``.
+        token : str | None
+            Token of the server-side dataset.
+        session_id : str | None
+            Id of the browser session.
 
+        Returns
+        -------
+        tuple
+            (download_data, status_message)
+        """
+        from src.utils.data_io import EXPORT_FORMATS, write_dataset
 
-# Global app instance used by Dash
-app: Dash = create_app()
+        df = session_dataset(session_id, token)
+        if df is None:
+            return dash.no_update, "Upload a dataset first."
+
+        with stage("derive"):
+            df = session_derived(session_id, token, df, available_derived_columns(df.columns))
+        try:
+            with stage("serialize"):
+                payload = write_dataset(df, fmt)
+        except (ImportError, ValueError) as exc:
+            return dash.no_update, f"Export failed: {exc}"
+
+        filename = f"petrolite-{token[:8]}{EXPORT_FORMATS[fmt]}"
+        return dcc.send_bytes(payload, filename), f"Exported {len(df):,} rows."
+
+    if debug_panel:
+        @app.callback(
+            Output("debug-panel-body", "children"),
+            Input("debug-panel-interval", "n_intervals"),
+        )
+        def update_debug_panel(n_intervals: int | None):
+            """
+            Render mean callback timings, payload sizes and cache statistics.
+            """
+            snap = metrics.snapshot()
+            columns = ("Callback", "Calls", "Mean ms", "Mean KiB out", "Stages (mean ms)")
+            header = html.Tr([html.Th(col) for col in columns])
+            rows = []
+            for name, data in sorted(snap["callbacks"].items()):
+                calls = data["calls"]
+                stages = ", ".join(
+                    f"{stage_name} {seconds / calls * 1e3:.1f}"
+                    for stage_name, seconds in data["stages"].items()
+                )
+                rows.append(
+                    html.Tr(
+                        [
+                            html.Td(name),
+                            html.Td(calls),
+                            html.Td(f"{data['seconds'] / calls * 1e3:.1f}"),
+                            html.Td(f"{data['response_bytes'] / calls / 1024:.1f}"),
+                            html.Td(stages),
+                        ]
+                    )
+                )
+            caches = [
+                html.Div(f"{name}: " + ", ".join(f"{k}={v:,}" for k, v in values.items()))
+                for name, values in snap["gauges"].items()
+            ]
+            return [dbc.Table([html.Thead(header), html.Tbody(rows)], size="sm"), *caches]
+
+    # UI-only updates run in the browser (assets/clientside.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace="petrolite", function_name="styleFigure"),
+        Output("main-graph", "figure"),
+        Input("figure-store", "data"),
+        Input("marker-size-slider", "value"),
+        Input("marker-opacity-slider", "value"),
+        Input("axis-label-radio", "value"),
+        Input("highlight-store", "data"),
+        State("label-map-store", "data"),
+        State("figure-key-store", "data"),
+    )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="petrolite", function_name="diagramControls"),
+        Output("x-column-dropdown", "disabled"),
+        Output("y-column-dropdown", "disabled"),
+        Output("main-graph", "style"),
+        Input("diagram-type-radio", "value"),
+    )
+
+    return app
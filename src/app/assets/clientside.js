@@ -0,0 +1,146 @@
+// Clientside callbacks: pure UI updates that do not need the server.
+
+// Indices of the set bits of a base64 bitset (bit i % 8 of byte i / 8),
+// as written by src.utils.selection.pack_mask.
+function unpackBits(data) {
+    const bytes = atob(data);
+    const indices = [];
+    for (let i = 0; i < bytes.length; i++) {
+        const byte = bytes.charCodeAt(i);
+        for (let bit = 0; byte >> bit; bit++) {
+            if ((byte >> bit) & 1) {
+                indices.push(i * 8 + bit);
+            }
+        }
+    }
+    return indices;
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    petrolite: {
+        // Lock X to SiO2 in Harker/TAS modes; the plate and TAS have fixed Y
+        // axes, and the plate needs a taller graph.
+        diagramControls: function (diagramType) {
+            const isPlate = diagramType === "harker_plate";
+            const fixedY = isPlate || diagramType === "tas";
+            return [
+                diagramType !== "custom",
+                fixedY,
+                {height: isPlate ? "1000px" : "500px"},
+            ];
+        },
+
+        // Dropdown options from the column metadata of the dataset.
+        // Derived columns are only listed; they are computed on selection.
+        columnOptions: function (meta) {
+            if (!meta) {
+                return [[], [], []];
+            }
+            const option = (col) => ({label: col, value: col});
+            const numeric = meta.numeric.map(option).concat(
+                meta.derived.map((col) => ({label: col + " (derived)", value: col}))
+            );
+            const groups = meta.categorical.map(function (col) {
+                const n = meta.columns[col].cardinality;
+                return {label: col + " (" + n.toLocaleString() + " groups)", value: col};
+            });
+            return [numeric, numeric, groups];
+        },
+
+        // Explain which groups the figure merged into "Other": the figure
+        // builder collapses groupings above its group threshold, and the
+        // "Other" legend entry lists the groups it holds.
+        groupWarning: function (figure, group) {
+            if (!group || !figure || !figure.data) {
+                return "";
+            }
+            const other = figure.data.find(
+                (trace) => trace.hoverinfo === "skip" && trace.meta && trace.meta.merged
+            );
+            if (!other) {
+                return "";
+            }
+            const merged = other.meta.merged;
+            const kept = figure.data.filter((trace) => trace.hoverinfo === "skip").length - 1;
+            let names = other.meta.examples.join(", ");
+            if (merged > other.meta.examples.length) {
+                names += ", ...";
+            }
+            return group + " has too many groups to draw separately; the " + kept +
+                " largest get their own color, and the other " +
+                merged.toLocaleString() + " (" + names + ") are shown as \"Other\".";
+        },
+
+        // Keep only the bounds of a box or lasso selection: the list of
+        // selected points can hold every drawn point and is not needed, since
+        // the server tests the bounds against the whole dataset.
+        selectionGeometry: function (selectedData) {
+            if (!selectedData || !(selectedData.range || selectedData.lassoPoints)) {
+                return null;
+            }
+            return {
+                range: selectedData.range || null,
+                lassoPoints: selectedData.lassoPoints || null,
+            };
+        },
+
+        // Copy the figure built by the server, restyling markers and axis
+        // titles, and highlighting the selected points of each trace.
+        // Trace arrays are shared with the stored figure, not copied.
+        styleFigure: function (figure, markerSize, markerOpacity, labelMode,
+                               highlight, labelMap, figureKey) {
+            if (!figure) {
+                return window.dash_clientside.no_update;
+            }
+
+            // Bitsets of the selected points, if they match the figure shown
+            let selected = null;
+            if (highlight && figureKey && figure.data &&
+                    JSON.stringify(highlight.key) === JSON.stringify(figureKey) &&
+                    highlight.traces.length === figure.data.length) {
+                selected = highlight.traces;
+            }
+
+            const data = (figure.data || []).map(function (trace, i) {
+                if (!trace.mode || trace.mode.indexOf("markers") === -1) {
+                    return trace;
+                }
+                const marker = Object.assign({}, trace.marker, {
+                    size: markerSize,
+                    opacity: markerOpacity,
+                });
+                const styled = Object.assign({}, trace, {marker: marker});
+                if (selected && selected[i] !== null) {
+                    styled.selectedpoints = unpackBits(selected[i]);
+                }
+                return styled;
+            });
+
+            const layout = Object.assign({}, figure.layout);
+            if (figureKey) {
+                // Keep zoom and selection across restyles and regroupings
+                layout.uirevision = figureKey.slice(0, 4).join("|");
+            }
+            if (labelMode === "raw") {
+                const columns = {};
+                Object.keys(labelMap || {}).forEach(function (col) {
+                    columns[labelMap[col]] = col;
+                });
+                Object.keys(layout).forEach(function (key) {
+                    const axis = layout[key];
+                    if (!/^[xy]axis\d*$/.test(key) || !axis || !axis.title) {
+                        return;
+                    }
+                    const text = axis.title.text;
+                    if (text in columns) {
+                        layout[key] = Object.assign({}, axis, {
+                            title: Object.assign({}, axis.title, {text: columns[text]}),
+                        });
+                    }
+                });
+            }
+
+            return Object.assign({}, figure, {data: data, layout: layout});
+        },
+    },
+});
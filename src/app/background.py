@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import functools
+import os
+import tempfile
+from typing import Any, Callable, Optional
+
+from dash import DiskcacheManager
+
+
+def default_background_dir() -> str:
+    """
+    Return the default directory used for background jobs and shared caches.
+    """
+    return os.path.join(tempfile.gettempdir(), "petrolite-jobs")
+
+
+def create_background_manager(cache_dir: Optional[str] = None) -> DiskcacheManager:
+    """
+    Create a Dash background callback manager backed by a local diskcache.
+
+    Jobs run in local worker processes; no external service is required.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        Directory of the job queue. Defaults to :func:`default_background_dir`.
+
+    Returns
+    -------
+    DiskcacheManager
+        Manager to pass to the Dash app.
+
+    Raises
+    ------
+    ImportError
+        If the diskcache extra is not installed (pip install "dash[diskcache]").
+    """
+    try:
+        import diskcache
+    except ImportError as exc:
+        raise ImportError(
+            'Background callbacks require diskcache (pip install "dash[diskcache]").'
+        ) from exc
+
+    cache = diskcache.Cache(os.path.join(cache_dir or default_background_dir(), "queue"))
+    return DiskcacheManager(cache)
+
+
+def background_options(
+    manager: Optional[DiskcacheManager],
+    **options: Any,
+) -> dict[str, Any]:
+    """
+    Build the background keyword arguments of ``app.callback``.
+
+    Parameters
+    ----------
+    manager : DiskcacheManager or None
+        Background manager. If None, the callback runs synchronously and
+        ``options`` are dropped.
+    **options
+        Background-only callback arguments (progress, running, cancel, ...).
+
+    Returns
+    -------
+    dict
+        Keyword arguments to unpack into ``app.callback``.
+    """
+    if manager is None:
+        return {}
+    return {"background": True, "manager": manager, **options}
+
+
+def with_progress(manager: Optional[DiskcacheManager]) -> Callable:
+    """
+    Give callbacks a uniform ``set_progress`` first argument.
+
+    Background callbacks with progress outputs receive ``set_progress`` from
+    Dash. For synchronous callbacks the decorator passes None instead, so
+    the same function body serves both modes.
+
+    Parameters
+    ----------
+    manager : DiskcacheManager or None
+        Background manager, or None for synchronous callbacks.
+
+    Returns
+    -------
+    callable
+        Decorator to apply below ``app.callback``.
+    """
+    def decorate(func: Callable) -> Callable:
+        if manager is not None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args: Any) -> Any:
+            return func(None, *args)
+
+        return wrapper
+
+    return decorate
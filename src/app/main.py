@@ -1,13 +1,61 @@
 from __future__ import annotations
 
-from . import app
+import argparse
+import os
+from typing import Optional, Sequence
 
 
-def main() -> None:
+def main(argv: Optional[Sequence[str]] = None) -> None:
     """
-    Run the Dash development server.
+    Run the Dash development server, or a production server with --prod.
+
+    Parameters
+    ----------
+    argv : sequence of str, optional
+        Command-line arguments, defaults to sys.argv.
     """
-    app.run(debug=True)
+    parser = argparse.ArgumentParser(description="Run the Geochemical Diagram Generator.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument(
+        "--prod",
+        action="store_true",
+        help="Serve with waitress and production settings (debug off). "
+        "For several worker processes, use gunicorn with src.app.wsgi:server.",
+    )
+    parser.add_argument("--threads", type=int, default=8, help="Waitress threads (--prod only).")
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="Run uploads and figure generation as background jobs (requires diskcache).",
+    )
+    parser.add_argument(
+        "--debug-panel",
+        action="store_true",
+        help="Show callback timings and cache statistics in the page.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.background:
+        os.environ["PETROLITE_BACKGROUND"] = "1"
+    if args.debug_panel:
+        os.environ["PETROLITE_DEBUG_PANEL"] = "1"
+
+    if args.prod:
+        try:
+            from waitress import serve
+        except ImportError:
+            parser.error("--prod requires waitress (pip install waitress).")
+
+        from .wsgi import server
+
+        serve(server, host=args.host, port=args.port, threads=args.threads)
+        return
+
+    from . import create_app
+
+    app = create_app(background=args.background, debug_panel=args.debug_panel)
+    app.run(debug=True, host=args.host, port=args.port)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+"""
+WSGI entry point for production serving.
+
+Run several worker processes with a shared cache backend, e.g.::
+
+    PETROLITE_CACHE_BACKEND=disk gunicorn --workers 4 --bind 0.0.0.0:8050 src.app.wsgi:server
+
+or, where gunicorn is not available (Windows), with waitress::
+
+    waitress-serve --listen=0.0.0.0:8050 src.app.wsgi:server
+
+Configuration is read from environment variables:
+
+- ``PETROLITE_CACHE_BACKEND``: "disk", "redis" or "none" (see
+  :func:`src.utils.cache_backend.backend_from_env`).
+- ``PETROLITE_DATASET_CACHE_MB``: in-memory dataset budget per worker.
+- ``PETROLITE_SPILL_DIR``: directory for datasets evicted from memory.
+- ``PETROLITE_DERIVED_CACHE_MB``: memory budget of derived columns per
+  worker.
+- ``PETROLITE_INDEX_CACHE_MB``: memory budget of the data preview's sort
+  and filter indexes per worker.
+- ``PETROLITE_SESSION_CACHE_MB``: memory budget of per-session state per
+  worker.
+- ``PETROLITE_SESSION_TTL``: idle time after which a session's state is
+  dropped, in seconds.
+- ``PETROLITE_COMPACT``: set to "0" to keep uploaded datasets in the dtypes
+  pandas parses them with.
+- ``PETROLITE_COMPACT_RTOL``: relative error accepted when downcasting
+  float columns of uploaded datasets.
+- ``PETROLITE_DL_POLICY``: value stored for entries below a detection limit
+  ("nan", "half" or "dl"), or "off" to keep such columns as text.
+- ``PETROLITE_BACKGROUND``: set to "1" to run uploads and figures as
+  background jobs (requires diskcache).
+- ``PETROLITE_DEBUG_PANEL``: set to "1" to show callback timings in the page.
+
+Callback timings, payload sizes and cache statistics of each worker are
+served at ``/metrics`` in Prometheus text format.
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+
+from dash import Dash
+
+from src.app import create_app
+from src.utils.cache_backend import backend_from_env
+from src.utils.dataset_cache import (
+    DEFAULT_MAX_BYTES,
+    DEFAULT_MAX_DERIVED_BYTES,
+    DEFAULT_MAX_INDEX_BYTES,
+)
+from src.utils.session_state import DEFAULT_SESSION_BYTES, DEFAULT_SESSION_TTL
+
+
+def create_production_app() -> Dash:
+    """
+    Build the app with production settings taken from the environment.
+
+    Returns
+    -------
+    Dash
+        Application with a shared cache backend and, if flask-compress is
+        installed, gzip-compressed responses.
+    """
+    max_mb = os.environ.get("PETROLITE_DATASET_CACHE_MB")
+    derived_mb = os.environ.get("PETROLITE_DERIVED_CACHE_MB")
+    index_mb = os.environ.get("PETROLITE_INDEX_CACHE_MB")
+    session_mb = os.environ.get("PETROLITE_SESSION_CACHE_MB")
+    rtol = os.environ.get("PETROLITE_COMPACT_RTOL")
+    dl_policy = os.environ.get("PETROLITE_DL_POLICY", "nan")
+    return create_app(
+        max_dataset_bytes=int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES,
+        spill_dir=os.environ.get("PETROLITE_SPILL_DIR"),
+        cache_backend=backend_from_env(),
+        compress=importlib.util.find_spec("flask_compress") is not None,
+        background=os.environ.get("PETROLITE_BACKGROUND", "0") == "1",
+        debug_panel=os.environ.get("PETROLITE_DEBUG_PANEL", "0") == "1",
+        max_session_bytes=(
+            int(session_mb) * 1024 * 1024 if session_mb else DEFAULT_SESSION_BYTES
+        ),
+        session_ttl=float(os.environ.get("PETROLITE_SESSION_TTL", DEFAULT_SESSION_TTL)),
+        compact=os.environ.get("PETROLITE_COMPACT", "1") == "1",
+        compact_rtol=float(rtol) if rtol else None,
+        dl_policy=None if dl_policy == "off" else dl_policy,
+        max_derived_bytes=(
+            int(derived_mb) * 1024 * 1024 if derived_mb else DEFAULT_MAX_DERIVED_BYTES
+        ),
+        max_index_bytes=(
+            int(index_mb) * 1024 * 1024 if index_mb else DEFAULT_MAX_INDEX_BYTES
+        ),
+    )
+
+
+app: Dash = create_production_app()
+
+# Flask server used by WSGI servers
+server = app.server
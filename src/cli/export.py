@@ -0,0 +1,411 @@
+"""
+Render diagrams of a dataset to static image files, without the Dash app.
+
+Run from the repository root, e.g.::
+
+    python -m src.cli.export data.csv spec.json --out-dir figures --format svg pdf
+
+The spec is a JSON file listing the figures to render::
+
+    {
+        "width": 800,
+        "height": 600,
+        "figures": [
+            {"type": "custom", "x": "SiO2", "y": ["MgO", "CaO"], "group": "RockType"},
+            {"type": "harker", "y": ["MgO", "FeO*"]},
+            {"type": "harker_plate", "group": "RockType"},
+            {"type": "tas", "group": "TAS_class"}
+        ]
+    }
+
+``x`` and ``y`` may be lists, in which case one figure is rendered per
+combination. Figures are built with the same functions as the app (so
+with the publication style) and written through Kaleido. Unlike in the
+app, every point is drawn, as vector markers: exports are neither
+decimated nor rendered with WebGL.
+
+The dataset is parsed once. With several workers, the prepared dataset is
+written to a temporary Feather file that every worker process memory-maps
+when it starts, and each worker starts its Kaleido renderer once and
+reuses it for all the figures it renders.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import pandas as pd
+
+from src.plots.figures import DIAGRAM_TYPES, build_figure, figure_columns
+from src.plots.tas import add_tas_classification
+from src.utils.data_io import load_dataset_file
+from src.utils.derived import available_derived_columns, compute_derived
+from src.utils.detection_limits import DEFAULT_DL_POLICY, DL_POLICIES, coerce_numeric_columns
+from src.utils.profile import profile_dataset
+
+
+# Static formats Kaleido can write
+IMAGE_FORMATS: tuple[str, ...] = ("svg", "pdf", "png")
+
+# Image size and scale used when the spec does not set them
+DEFAULT_WIDTH: int = 800
+DEFAULT_HEIGHT: int = 600
+DEFAULT_SCALE: float = 2.0
+
+# Point limits passed to the figure builders: exports keep every point, and
+# never switch to WebGL traces, which Kaleido rasterizes inside SVG/PDF
+NO_POINT_LIMIT: int = sys.maxsize
+
+# Dataset and profile of a worker process, set once by _init_worker
+_DATASET: Optional[pd.DataFrame] = None
+_PROFILE: Optional[dict] = None
+
+
+@dataclass(frozen=True)
+class FigureJob:
+    """
+    One figure of a batch export.
+    """
+
+    diagram_type: str
+    x_col: Optional[str] = None
+    y_col: Optional[str] = None
+    group_col: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+
+    @property
+    def stem(self) -> str:
+        """
+        File name of the figure, without extension.
+        """
+        parts = [self.diagram_type, self.x_col, self.y_col, self.group_col]
+        name = "_".join(str(part) for part in parts if part)
+        return re.sub(r"[^A-Za-z0-9.+-]+", "_", name).strip("_")
+
+
+def expand_spec(spec: Dict[str, Any]) -> list[FigureJob]:
+    """
+    Expand a batch export spec into one job per figure.
+
+    Parameters
+    ----------
+    spec : dict
+        Parsed spec (see the module docstring).
+
+    Returns
+    -------
+    list[FigureJob]
+        Jobs, in spec order.
+
+    Raises
+    ------
+    ValueError
+        If an entry has an unknown type or lacks a required axis.
+    """
+    jobs: list[FigureJob] = []
+    for i, entry in enumerate(spec.get("figures", [])):
+        diagram_type = entry.get("type", "custom")
+        if diagram_type not in DIAGRAM_TYPES:
+            raise ValueError(f"Figure {i}: unknown diagram type {diagram_type!r}.")
+
+        xs = _as_list(entry.get("x")) if diagram_type == "custom" else [None]
+        ys = _as_list(entry.get("y")) if diagram_type in ("custom", "harker") else [None]
+        if not xs or not ys:
+            raise ValueError(f"Figure {i}: {diagram_type} diagrams need x and y columns.")
+
+        for x_col, y_col in itertools.product(xs, ys):
+            jobs.append(
+                FigureJob(
+                    diagram_type=diagram_type,
+                    x_col=x_col,
+                    y_col=y_col,
+                    group_col=entry.get("group"),
+                    width=entry.get("width"),
+                    height=entry.get("height"),
+                )
+            )
+    return jobs
+
+
+def prepare_dataset(
+    path: str,
+    jobs: Sequence[FigureJob],
+    dl_policy: Optional[str] = DEFAULT_DL_POLICY,
+) -> pd.DataFrame:
+    """
+    Load a dataset and add every column the jobs need.
+
+    Derived columns are computed once here, rather than in every worker.
+
+    Parameters
+    ----------
+    path : str
+        Dataset file (CSV, XLSX, Parquet or Feather).
+    jobs : sequence of FigureJob
+        Figures to render.
+    dl_policy : str, optional
+        Value stored for entries below a detection limit (see
+        :func:`src.utils.detection_limits.coerce_numeric_columns`). None
+        keeps text columns as they are parsed.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataset with the TAS classification and the needed derived columns.
+
+    Raises
+    ------
+    ValueError
+        If the file cannot be parsed, or a job uses a column that is neither
+        in the dataset nor derivable from it.
+    """
+    df = load_dataset_file(path)
+    if dl_policy is not None:
+        df, _ = coerce_numeric_columns(df, policy=dl_policy)
+    df = add_tas_classification(df)
+
+    needed = {
+        col
+        for job in jobs
+        for col in (*figure_columns(job.diagram_type, job.x_col, job.y_col), job.group_col)
+        if col is not None
+    }
+    derivable = set(available_derived_columns(df.columns)) & needed
+    if derivable:
+        df = df.assign(**compute_derived(df, derivable))
+
+    used = {
+        col
+        for job in jobs
+        for col in (job.x_col, job.y_col, job.group_col)
+        if col is not None
+    }
+    missing = sorted(used.difference(df.columns))
+    if missing:
+        raise ValueError(f"Column(s) not found in the dataset: {', '.join(missing)}")
+    return df
+
+
+def build_job_figure(
+    df: pd.DataFrame,
+    job: FigureJob,
+    profile: Optional[dict] = None,
+):
+    """
+    Build the figure of a job, with every point drawn as a vector marker.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset returned by :func:`prepare_dataset`.
+    job : FigureJob
+        Figure to build.
+    profile : dict, optional
+        Dataset profile, used to fit the axes of X-Y diagrams.
+
+    Returns
+    -------
+    plotly.graph_objs.Figure
+        Figure ready to be written.
+    """
+    return build_figure(
+        df,
+        job.diagram_type,
+        job.x_col,
+        job.y_col,
+        job.group_col,
+        profile,
+        webgl_threshold=NO_POINT_LIMIT,
+        max_points=NO_POINT_LIMIT,
+    )
+
+
+def render_figures(
+    df: pd.DataFrame,
+    jobs: Sequence[FigureJob],
+    out_dir: str,
+    formats: Sequence[str] = ("svg",),
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    scale: float = DEFAULT_SCALE,
+    workers: int = 1,
+) -> list[str]:
+    """
+    Render every job to ``out_dir``, once per format.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset returned by :func:`prepare_dataset`.
+    jobs : sequence of FigureJob
+        Figures to render.
+    out_dir : str
+        Output directory, created if needed.
+    formats : sequence of str, optional
+        Image formats, among ``IMAGE_FORMATS``.
+    width, height : int, optional
+        Default image size in pixels, overridden by per-job sizes. If
+        neither is set, the figure's own size is used (e.g. the height of
+        a Harker plate grows with its rows), then ``DEFAULT_WIDTH`` and
+        ``DEFAULT_HEIGHT``.
+    scale : float, optional
+        Scale factor of raster formats.
+    workers : int, optional
+        Number of worker processes. With 1, figures are rendered in-process.
+
+    Returns
+    -------
+    list[str]
+        Paths of the written files, in job order.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = [
+        (job, os.path.join(out_dir, f"{i:03d}_{job.stem}"), tuple(formats), width, height, scale)
+        for i, job in enumerate(jobs, start=1)
+    ]
+    profile = profile_dataset(df)
+
+    if workers <= 1 or len(tasks) <= 1:
+        _init_worker(None, profile, df)
+        return [path for task in tasks for path in _render(*task)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = os.path.join(tmp, "dataset.feather")
+        df.reset_index(drop=True).rename(columns=str).to_feather(dataset_path)
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            initializer=_init_worker,
+            initargs=(dataset_path, profile),
+        ) as pool:
+            results = pool.map(_render, *zip(*tasks))
+            return [path for paths in results for path in paths]
+
+
+def _init_worker(
+    dataset_path: Optional[str],
+    profile: dict,
+    df: Optional[pd.DataFrame] = None,
+) -> None:
+    """
+    Load the shared dataset and start Kaleido once per worker process.
+    """
+    global _DATASET, _PROFILE
+    if df is None:
+        # The dataset was prepared by the parent; only memory-map it here
+        from pyarrow import feather
+
+        df = feather.read_table(dataset_path, memory_map=True).to_pandas()
+    _DATASET, _PROFILE = df, profile
+
+    import kaleido
+
+    start = getattr(kaleido, "start_sync_server", None)
+    if start is not None:
+        start(silence_warnings=True)
+    else:
+        # Older Kaleido starts its renderer on first use
+        import plotly.graph_objects as go
+
+        go.Figure().to_image(format="png", width=10, height=10)
+
+
+def _render(
+    job: FigureJob,
+    base_path: str,
+    formats: tuple[str, ...],
+    width: Optional[int],
+    height: Optional[int],
+    scale: float,
+) -> list[str]:
+    fig = build_job_figure(_DATASET, job, _PROFILE)
+    width = job.width or width or fig.layout.width or DEFAULT_WIDTH
+    height = job.height or height or fig.layout.height or DEFAULT_HEIGHT
+    paths = []
+    for fmt in formats:
+        path = f"{base_path}.{fmt}"
+        fig.write_image(
+            path,
+            format=fmt,
+            width=width,
+            height=height,
+            scale=scale,
+        )
+        paths.append(path)
+    return paths
+
+
+def _as_list(value: Any) -> list:
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("dataset", help="Dataset file (CSV, XLSX, Parquet or Feather).")
+    parser.add_argument("spec", help="JSON file listing the figures to render.")
+    parser.add_argument("--out-dir", default="figures")
+    parser.add_argument(
+        "--format",
+        nargs="+",
+        choices=IMAGE_FORMATS,
+        default=["svg"],
+        help="Image formats to write (default: svg).",
+    )
+    parser.add_argument("--scale", type=float, help="Scale factor of PNG images.")
+    parser.add_argument(
+        "--dl-policy",
+        choices=DL_POLICIES,
+        default=DEFAULT_DL_POLICY,
+        help='Value plotted for entries below a detection limit, e.g. "<0.01" '
+        "(default: nan).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of rendering processes (default: one per CPU).",
+    )
+    args = parser.parse_args(argv)
+
+    if importlib.util.find_spec("kaleido") is None:
+        parser.error("Static image export requires kaleido (pip install kaleido).")
+
+    with open(args.spec, encoding="utf-8") as handle:
+        spec = json.load(handle)
+
+    start = time.perf_counter()
+    try:
+        jobs = expand_spec(spec)
+        df = prepare_dataset(args.dataset, jobs, dl_policy=args.dl_policy)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    paths = render_figures(
+        df,
+        jobs,
+        args.out_dir,
+        formats=args.format,
+        width=spec.get("width"),
+        height=spec.get("height"),
+        scale=args.scale or spec.get("scale", DEFAULT_SCALE),
+        workers=args.workers,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {len(paths)} file(s) for {len(jobs)} figure(s) in {elapsed:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,10 @@ def create_controls_card() -> dbc.Card:
     dbc.Card
         Card containing upload component and plot controls.
     """
+    # The marker sliders start from the publication style; imported here so
+    # that importing the app does not load plotly's color scales
+    from src.utils.plot_style import MARKER_OPACITY, MARKER_SIZE
+
     return dbc.Card(
         [
             dbc.CardHeader("Data & Plot Settings"),
@@ -22,7 +26,7 @@ def create_controls_card() -> dbc.Card:
                     dcc.Upload(
                         id="upload-data",
                         children=html.Div(
-                            ["Drag and Drop or ", html.A("Select a CSV/XLSX file")]
+                            ["Drag and Drop or ", html.A("Select CSV/XLSX/Parquet/Feather files")]
                         ),
                         style={
                             "width": "100%",
@@ -34,7 +38,7 @@ def create_controls_card() -> dbc.Card:
                             "textAlign": "center",
                             "marginBottom": "10px",
                         },
-                        multiple=False,
+                        multiple=True,
                     ),
                     html.Div(
                         id="upload-status",
@@ -46,6 +50,8 @@ def create_controls_card() -> dbc.Card:
                         options=[
                             {"label": "Custom X-Y", "value": "custom"},
                             {"label": "Harker (SiO2 vs oxide)", "value": "harker"},
+                            {"label": "Harker plate (SiO2 vs all oxides)", "value": "harker_plate"},
+                            {"label": "TAS (total alkali vs silica)", "value": "tas"},
                         ],
                         value="custom",
                         inline=False,
@@ -76,7 +82,57 @@ def create_controls_card() -> dbc.Card:
                         value=None,
                         clearable=True,
                     ),
-
+                    html.Div(id="group-warning", className="text-warning small"),
+                    html.H6("4. Style", className="card-title mt-3"),
+                    dbc.Label("Marker size"),
+                    dcc.Slider(
+                        id="marker-size-slider",
+                        min=2,
+                        max=14,
+                        step=1,
+                        value=MARKER_SIZE,
+                        marks=None,
+                        tooltip={"placement": "bottom"},
+                    ),
+                    dbc.Label("Marker opacity"),
+                    dcc.Slider(
+                        id="marker-opacity-slider",
+                        min=0.1,
+                        max=1.0,
+                        step=0.05,
+                        value=MARKER_OPACITY,
+                        marks=None,
+                        tooltip={"placement": "bottom"},
+                    ),
+                    dbc.Label("Axis labels"),
+                    dbc.RadioItems(
+                        id="axis-label-radio",
+                        options=[
+                            {"label": "Formatted", "value": "pretty"},
+                            {"label": "Column names", "value": "raw"},
+                        ],
+                        value="pretty",
+                        inline=True,
+                    ),
+                    html.H6("5. Export dataset", className="card-title mt-3"),
+                    dbc.RadioItems(
+                        id="export-format-radio",
+                        options=[
+                            {"label": "Parquet", "value": "parquet"},
+                            {"label": "Feather", "value": "feather"},
+                        ],
+                        value="parquet",
+                        inline=True,
+                    ),
+                    dbc.Button(
+                        "Export session dataset",
+                        id="export-button",
+                        color="secondary",
+                        size="sm",
+                        className="mt-2",
+                    ),
+                    html.Div(id="export-status", className="text-muted small mt-1"),
+                    dcc.Download(id="export-download"),
                 ]
             ),
         ],
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from dash import html, dcc
+import dash_bootstrap_components as dbc
+
+
+# Refresh period of the debug panel (milliseconds)
+DEBUG_PANEL_INTERVAL_MS: int = 5_000
+
+
+def create_debug_panel() -> dbc.Card:
+    """
+    Create the optional panel showing callback timings and cache stats.
+
+    Returns
+    -------
+    dbc.Card
+        Card refreshed periodically by the update_debug_panel callback.
+    """
+    return dbc.Card(
+        [
+            dbc.CardHeader("Performance (this worker)"),
+            dbc.CardBody(
+                [
+                    html.Div(id="debug-panel-body", className="small"),
+                    dcc.Interval(id="debug-panel-interval", interval=DEBUG_PANEL_INTERVAL_MS),
+                ]
+            ),
+        ],
+        className="mt-3 mb-3",
+    )
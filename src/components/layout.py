@@ -6,17 +6,24 @@ from dash import Dash, html, dcc
 import dash_bootstrap_components as dbc
 
 from src.components.controls import create_controls_card
+from src.components.debug_panel import create_debug_panel
 from src.components.plots_area import create_plots_card
+from src.utils.labels import COLUMN_LABEL_MAP
+from src.utils.session_state import new_session_id
 
 
-def create_layout(app: Dash) -> html.Div:
+def create_layout(app: Dash, debug_panel: bool = False) -> html.Div:
     """
     Create the main page layout for the application.
 
+    Called on every page load, so that each one gets a new session id.
+
     Parameters
     ----------
     app : Dash
         Dash application instance, used if layout requires access to app properties.
+    debug_panel : bool, optional
+        If True, add a panel with callback timings and cache statistics.
 
     Returns
     -------
@@ -33,7 +40,16 @@ def create_layout(app: Dash) -> html.Div:
                 "Upload geochemical datasets and create customizable geochemical diagrams.",
                 className="text-muted",
             ),
-            dcc.Store(id="data-store"),  # stores the uploaded dataframe as JSON
+            dcc.Store(id="session-id", data=new_session_id()),  # keys server-side state
+            dcc.Store(id="data-store"),  # stores the token of the server-side dataset
+            dcc.Store(id="column-meta-store"),  # column names by kind, for the dropdowns
+            dcc.Store(id="figure-store"),  # figure built by the server, before UI styling
+            dcc.Store(id="figure-base-store"),  # dataset, diagram, axes, traces of figure-store
+            dcc.Store(id="figure-key-store"),  # cache key of the figure in figure-store
+            dcc.Store(id="selection-geometry-store"),  # box/lasso bounds of the graph selection
+            dcc.Store(id="selection-store"),  # summary of the selection held server-side
+            dcc.Store(id="highlight-store"),  # selected points of each trace, as bitsets
+            dcc.Store(id="label-map-store", data=COLUMN_LABEL_MAP),  # axis label mapping
             dbc.Row(
                 [
                     dbc.Col(create_controls_card(), md=4),
@@ -41,6 +57,7 @@ def create_layout(app: Dash) -> html.Div:
                 ],
                 className="mt-3",
             ),
-        ],
+        ]
+        + ([create_debug_panel()] if debug_panel else []),
         fluid=True,
     )
@@ -1,7 +1,11 @@
-from dash import html, dcc
+from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
 
 
+# Rows per preview page; pages are served one at a time by the server
+PREVIEW_PAGE_SIZE: int = 10
+
+
 def create_plots_card() -> dbc.Card:
     return dbc.Card(
         [
@@ -9,8 +13,27 @@ def create_plots_card() -> dbc.Card:
             dbc.CardBody(
                 [
                     html.H6("Data preview"),
-                    html.Div(id="data-preview", className="mb-3"),
+                    html.Div(
+                        id="data-preview",
+                        className="mb-3",
+                        children=dash_table.DataTable(
+                            id="preview-table",
+                            columns=[],
+                            data=[],
+                            page_action="custom",
+                            page_current=0,
+                            page_size=PREVIEW_PAGE_SIZE,
+                            sort_action="custom",
+                            sort_mode="multi",
+                            sort_by=[],
+                            filter_action="custom",
+                            filter_query="",
+                            style_table={"overflowX": "auto"},
+                            style_cell={"fontSize": 12},
+                        ),
+                    ),
                     html.H6("Diagram"),
+                    html.Div(id="graph-status", className="text-muted small"),
                     dcc.Graph(
                         id="main-graph",
                         figure={},
@@ -23,12 +46,11 @@ def create_plots_card() -> dbc.Card:
                             },
                             "displaylogo": False,
                             "modeBarButtonsToRemove": [
-                                "select2d",
-                                "lasso2d",
                                 "autoScale2d",
                             ],
                         },
                     ),
+                    html.Div(id="selection-status", className="text-muted small"),
                 ]
             ),
         ],
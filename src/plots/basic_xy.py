@@ -1,13 +1,38 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Optional, Sequence
 
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 from plotly.graph_objs import Figure
 
+from src.utils.data_io import FLOAT32_RTOL, is_float32_safe
+from src.utils.decimation import decimate_xy
+from src.utils.instrumentation import stage
 from src.utils.labels import get_pretty_label
-from src.utils.plot_style import apply_publication_style
+from src.utils.plot_style import GROUP_COLORWAY, apply_publication_style
+from src.utils.profile import HIGH_CARDINALITY
+
+
+# Above this many points, traces are rendered with WebGL (Scattergl)
+WEBGL_THRESHOLD: int = 5_000
+
+# Above this many points, the data is decimated before being sent to the client
+MAX_RENDERED_POINTS: int = 100_000
+
+# Above this many groups, points are drawn as one trace colored by group
+MAX_GROUP_TRACES: int = HIGH_CARDINALITY
+
+# Number of largest groups keeping their own color once groups are collapsed
+TOP_GROUPS: int = 10
+
+# Legend label and color of the bucket holding all remaining groups
+OTHER_LABEL: str = "Other"
+OTHER_COLOR: str = "#BBBBBB"
+
+# Names of merged groups carried by the "Other" legend entry, for the UI
+MERGED_EXAMPLES: int = 5
 
 
 def create_xy_scatter(
@@ -16,10 +41,20 @@ def create_xy_scatter(
     y_col: str,
     group_col: Optional[str] = None,
     title: Optional[str] = None,
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    max_points: int = MAX_RENDERED_POINTS,
+    max_groups: int = MAX_GROUP_TRACES,
+    trace_rows: Optional[list] = None,
 ) -> Figure:
     """
     Create a simple X vs Y scatter plot for geochemical data.
 
+    Large datasets switch automatically to WebGL traces, and datasets larger
+    than ``max_points`` are decimated with a density-preserving grid sample
+    (see :func:`src.utils.decimation.decimate_xy`). Hover labels only carry
+    the plotted columns. Group columns with more than ``max_groups`` values
+    are drawn as a single trace (see :func:`build_scatter_traces`).
+
     Parameters
     ----------
     df : pd.DataFrame
@@ -32,11 +67,26 @@ def create_xy_scatter(
         Column name used to color points by group (e.g., rock type).
     title : str, optional
         Plot title. If None, a generic "X vs Y" title is used.
+    webgl_threshold : int, optional
+        Number of points above which Scattergl traces are used.
+    max_points : int, optional
+        Approximate maximum number of points sent to the client.
+    max_groups : int, optional
+        Number of groups above which points are drawn as a single trace.
+    trace_rows : list, optional
+        If given, the positions in ``df`` of the points of each trace are
+        appended to it (None for legend-only traces), e.g. to map a
+        selection back to the plotted points.
 
     Returns
     -------
     plotly.graph_objs.Figure
         Configured Plotly scatter figure with publication-style layout.
+
+    Raises
+    ------
+    ValueError
+        If a plotted or group column is missing from the dataframe.
     """
     pretty_x = get_pretty_label(x_col)
     pretty_y = get_pretty_label(y_col)
@@ -44,20 +94,335 @@ def create_xy_scatter(
     if title is None:
         title = f"{pretty_y} vs {pretty_x}"
 
-    fig: Figure = px.scatter(
-        df,
-        x=x_col,
-        y=y_col,
-        color=group_col,
-        hover_name=None,
-        hover_data=df.columns,
-    )
+    columns = [x_col, y_col] if group_col is None else [x_col, y_col, group_col]
+    missing = [col for col in dict.fromkeys(columns) if col not in df.columns]
+    if missing:
+        raise ValueError(
+            "Diagram requires column(s) "
+            + ", ".join(f'"{col}"' for col in missing)
+            + " in the dataset."
+        )
+    data = df[list(dict.fromkeys(columns))]
 
-    fig = apply_publication_style(
-        fig=fig,
-        x_label=pretty_x,
-        y_label=pretty_y,
-        title=title,
-    )
+    n_total = len(data)
+    rows = None
+    if n_total > max_points:
+        with stage("decimate"):
+            rows = decimate_xy(
+                data[x_col].to_numpy(dtype=float, na_value=float("nan")),
+                data[y_col].to_numpy(dtype=float, na_value=float("nan")),
+                max_points=max_points,
+            )
+            data = data.iloc[rows]
+
+    use_webgl = len(data) > webgl_threshold
+    with stage("traces"):
+        fig: Figure = go.Figure(
+            data=build_scatter_traces(
+                data,
+                x_col,
+                y_col,
+                group_col,
+                use_webgl=use_webgl,
+                max_groups=max_groups,
+                rows=rows,
+                trace_rows=trace_rows,
+            )
+        )
+
+    if len(data) < n_total:
+        fig.add_annotation(
+            text=f"Showing {len(data):,} of {n_total:,} points",
+            xref="paper",
+            yref="paper",
+            x=1.0,
+            y=0.0,
+            xanchor="right",
+            yanchor="bottom",
+            showarrow=False,
+            font=dict(size=10, color="gray"),
+        )
+
+    with stage("style"):
+        fig = apply_publication_style(
+            fig=fig,
+            x_label=pretty_x,
+            y_label=pretty_y,
+            title=title,
+        )
 
     return fig
+
+
+def build_scatter_traces(
+    data: pd.DataFrame,
+    x_col: str,
+    y_col: str,
+    group_col: Optional[str] = None,
+    use_webgl: bool = False,
+    max_groups: int = MAX_GROUP_TRACES,
+    rows: Optional[np.ndarray] = None,
+    trace_rows: Optional[list] = None,
+) -> list[go.Scatter | go.Scattergl]:
+    """
+    Build one marker trace per group (or a single trace if ungrouped).
+
+    If ``group_col`` has more than ``max_groups`` distinct values, all the
+    points go into a single trace whose marker colors are the group buckets
+    of :func:`group_buckets`, followed by one empty legend-only trace per
+    bucket (see :func:`bucket_legend_traces`).
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Rows to plot, already decimated if needed.
+    x_col, y_col : str
+        Columns plotted on the X and Y axes.
+    group_col : str, optional
+        Column used to split points into traces.
+    use_webgl : bool, optional
+        If True, build Scattergl traces instead of SVG Scatter traces.
+    max_groups : int, optional
+        Number of groups above which points are drawn as a single trace.
+    rows : np.ndarray, optional
+        Positions of the rows of ``data`` in the full dataset, if ``data``
+        is a sample of it.
+    trace_rows : list, optional
+        If given, the dataset positions of the points of each trace are
+        appended to it (None for legend-only traces).
+
+    Returns
+    -------
+    list
+        Plotly scatter traces, in order of first appearance of each group.
+    """
+    trace_cls = go.Scattergl if use_webgl else go.Scatter
+    hovertemplate = f"{x_col}=%{{x}}<br>{y_col}=%{{y}}"
+    x = trace_values(data[x_col])
+    y = trace_values(data[y_col])
+    if rows is None:
+        rows = np.arange(len(data))
+    if trace_rows is None:
+        trace_rows = []
+
+    if group_col is None:
+        trace_rows.append(rows)
+        return [
+            trace_cls(
+                x=x,
+                y=y,
+                mode="markers",
+                showlegend=False,
+                hovertemplate=hovertemplate + "<extra></extra>",
+            )
+        ]
+
+    codes, names = group_codes(data[group_col])
+    if len(names) > max_groups:
+        buckets, labels, colors, merged = group_buckets(codes, names)
+        trace_rows += [rows] + [None] * len(labels)
+        return [
+            trace_cls(
+                x=x,
+                y=y,
+                mode="markers",
+                showlegend=False,
+                marker=bucket_marker(buckets, colors),
+                customdata=np.array([str(name) for name in names])[codes],
+                hovertemplate=f"{group_col}=%{{customdata}}<br>{hovertemplate}<extra></extra>",
+            ),
+            *bucket_legend_traces(labels, colors, trace_cls, merged),
+        ]
+
+    # Row positions of each group, in order of first appearance
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(names)))[:-1]
+    traces = []
+    for name, idx in zip(names, np.split(order, bounds)):
+        trace_rows.append(rows[idx])
+        traces.append(
+            trace_cls(
+                x=x[idx],
+                y=y[idx],
+                mode="markers",
+                name=str(name),
+                legendgroup=str(name),
+                hovertemplate=f"{group_col}={name}<br>{hovertemplate}<extra></extra>",
+            )
+        )
+    return traces
+
+
+def trace_values(values: pd.Series) -> np.ndarray:
+    """
+    Return a numeric column as a trace array, in float32 where it round-trips.
+
+    Plotly sends NumPy arrays to the browser as base64 typed arrays, so a
+    float32 array is half the payload of the same float64 array.
+
+    Parameters
+    ----------
+    values : pd.Series
+        Column plotted on an axis.
+
+    Returns
+    -------
+    np.ndarray
+        float32 array if the column is float and fits float32 (see
+        :func:`src.utils.data_io.is_float32_safe`), otherwise the column's
+        own values.
+    """
+    if values.dtype == np.float32:
+        return values.to_numpy()
+    if pd.api.types.is_float_dtype(values):
+        array = values.to_numpy(dtype=np.float64, na_value=np.nan)
+        if is_float32_safe(pd.Series(array, copy=False), rtol=FLOAT32_RTOL):
+            return array.astype(np.float32)
+        return array
+    return values.to_numpy()
+
+
+def group_codes(
+    values: pd.Series,
+    rows: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Factorize a group column, in order of first appearance.
+
+    Categorical columns (see :func:`src.utils.data_io.compact_frame`) are
+    factorized on their integer codes instead of hashing their labels.
+    Missing values form their own group, as with
+    ``pd.factorize(..., use_na_sentinel=False)``.
+
+    Parameters
+    ----------
+    values : pd.Series
+        Group column.
+    rows : np.ndarray, optional
+        Row positions to factorize; all rows if None.
+
+    Returns
+    -------
+    codes : np.ndarray
+        Group code of every row.
+    names : np.ndarray
+        Group names indexed by code.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        category_codes = values.cat.codes.to_numpy()
+        if rows is not None:
+            category_codes = category_codes[rows]
+        codes, seen = pd.factorize(category_codes)
+        # Code -1 (missing) picks the NaN appended after the categories
+        categories = np.append(values.cat.categories.to_numpy(dtype=object), np.nan)
+        return codes, categories[np.asarray(seen)]
+
+    array = values.to_numpy()
+    if rows is not None:
+        array = array[rows]
+    return pd.factorize(array, use_na_sentinel=False)
+
+
+def group_buckets(
+    codes: np.ndarray,
+    names: Sequence,
+    top_n: int = TOP_GROUPS,
+) -> tuple[np.ndarray, list[str], list[str], list[str]]:
+    """
+    Map factorized group codes to the ``top_n`` largest groups plus "Other".
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Group code of every point, as returned by ``pd.factorize``.
+    names : sequence
+        Group names indexed by code.
+    top_n : int, optional
+        Number of groups kept as their own bucket.
+
+    Returns
+    -------
+    buckets : np.ndarray
+        Bucket index of every point: 0 for the largest group, 1 for the next
+        one, and so on, with the remaining groups sharing the last index.
+    labels : list[str]
+        Bucket labels; the last one is :data:`OTHER_LABEL` if groups were
+        merged.
+    colors : list[str]
+        Bucket colors, from the group colorway and :data:`OTHER_COLOR`.
+    merged : list[str]
+        Names of the groups merged into "Other", largest first.
+    """
+    counts = np.bincount(codes, minlength=len(names))
+    by_size = np.argsort(-counts, kind="stable")
+    top = by_size[:top_n]
+    # Sent to the browser as marker colors: one byte per point when possible
+    dtype = np.int8 if top_n < np.iinfo(np.int8).max else np.int16
+    bucket_of_code = np.full(len(names), len(top), dtype=dtype)
+    bucket_of_code[top] = np.arange(len(top), dtype=dtype)
+
+    labels = [str(names[code]) for code in top]
+    colors = [GROUP_COLORWAY[i % len(GROUP_COLORWAY)] for i in range(len(top))]
+    merged = [str(names[code]) for code in by_size[top_n:]]
+    if merged:
+        labels.append(OTHER_LABEL)
+        colors.append(OTHER_COLOR)
+    return bucket_of_code[codes], labels, colors, merged
+
+
+def bucket_marker(buckets: np.ndarray, colors: list[str]) -> dict:
+    """
+    Marker properties coloring points by bucket with a discrete colorscale.
+
+    Parameters
+    ----------
+    buckets : np.ndarray
+        Bucket index of every point, from :func:`group_buckets`.
+    colors : list[str]
+        Bucket colors, from :func:`group_buckets`.
+
+    Returns
+    -------
+    dict
+        ``marker`` properties of the collapsed trace.
+    """
+    n_buckets = len(colors)
+    colorscale = []
+    for i, color in enumerate(colors):
+        colorscale += [[i / n_buckets, color], [(i + 1) / n_buckets, color]]
+    return dict(
+        color=buckets,
+        colorscale=colorscale,
+        cmin=-0.5,
+        cmax=n_buckets - 0.5,
+        showscale=False,
+    )
+
+
+def bucket_legend_traces(
+    labels: list[str],
+    colors: list[str],
+    trace_cls: type = go.Scatter,
+    merged: Sequence[str] = (),
+) -> list[go.Scatter | go.Scattergl]:
+    """
+    Empty traces giving each bucket of a collapsed trace a legend entry.
+
+    The "Other" entry carries the number of ``merged`` groups and the names
+    of the largest ones in its ``meta``, from which the app explains the
+    grouping.
+    """
+    traces = [
+        trace_cls(
+            x=[None],
+            y=[None],
+            mode="markers",
+            name=label,
+            marker=dict(color=color),
+            hoverinfo="skip",
+        )
+        for label, color in zip(labels, colors)
+    ]
+    if merged:
+        traces[-1].meta = {"merged": len(merged), "examples": list(merged[:MERGED_EXAMPLES])}
+    return traces
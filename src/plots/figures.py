@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.graph_objs import Figure
+
+from src.plots.basic_xy import (
+    MAX_GROUP_TRACES,
+    MAX_RENDERED_POINTS,
+    WEBGL_THRESHOLD,
+    create_xy_scatter,
+)
+from src.plots.harker import (
+    HARKER_OXIDES,
+    create_harker_plate,
+    create_harker_scatter,
+    harker_panels,
+)
+from src.plots.tas import create_tas_diagram
+from src.utils.profile import axis_range
+
+
+# Diagram types selectable in the app and in batch export specs
+DIAGRAM_TYPES: tuple[str, ...] = ("custom", "harker", "harker_plate", "tas")
+
+
+def figure_columns(
+    diagram_type: str,
+    x_col: Optional[str],
+    y_col: Optional[str],
+) -> Sequence[Optional[str]]:
+    """
+    List the columns a diagram may need, to resolve derived columns first.
+
+    Parameters
+    ----------
+    diagram_type : str
+        One of ``DIAGRAM_TYPES``.
+    x_col, y_col : str or None
+        Selected axes.
+
+    Returns
+    -------
+    sequence of str or None
+        Column names; entries may be None or already present in the data.
+    """
+    if diagram_type == "harker_plate":
+        return HARKER_OXIDES
+    if diagram_type == "tas":
+        return ("SiO2", "Na2O+K2O")
+    return (x_col, y_col)
+
+
+def figure_axes(
+    diagram_type: str,
+    x_col: Optional[str],
+    y_col: Optional[str],
+    columns: Iterable[str],
+) -> Dict[Tuple[str, str], Tuple[str, str]]:
+    """
+    Map the axes of a diagram to the columns plotted on them.
+
+    Used to resolve a selection made on the figure back to dataset rows.
+
+    Parameters
+    ----------
+    diagram_type : str
+        One of ``DIAGRAM_TYPES``.
+    x_col, y_col : str or None
+        Selected axes.
+    columns : iterable of str
+        Columns of the dataset, including derived columns.
+
+    Returns
+    -------
+    dict
+        (x column, y column) per (x axis id, y axis id) pair, e.g.
+        ``{("x", "y"): ("SiO2", "MgO")}``; empty if the diagram has no
+        points.
+    """
+    available = set(columns)
+    if diagram_type == "harker_plate":
+        if "SiO2" not in available:
+            return {}
+        ids = [str(i + 1) if i else "" for i in range(len(HARKER_OXIDES))]
+        return {
+            (f"x{i}", f"y{i}"): ("SiO2", ox)
+            for i, ox in zip(ids, harker_panels(available))
+        }
+    if diagram_type == "tas":
+        pair = ("SiO2", "Na2O+K2O")
+    elif diagram_type == "harker":
+        pair = ("SiO2", y_col)
+    else:
+        pair = (x_col, y_col)
+    if not set(pair) <= available:
+        return {}
+    return {("x", "y"): pair}
+
+
+def build_figure(
+    df: pd.DataFrame,
+    diagram_type: str,
+    x_col: Optional[str],
+    y_col: Optional[str],
+    group_col: Optional[str],
+    profile: Optional[dict] = None,
+    trace_rows: Optional[list] = None,
+    max_groups: int = MAX_GROUP_TRACES,
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    max_points: int = MAX_RENDERED_POINTS,
+) -> Figure:
+    """
+    Build the figure of a diagram type from a dataset with the needed columns.
+
+    Diagrams with missing required, selected or group columns give an empty
+    figure whose title explains the problem. For single X-Y diagrams, axis ranges are
+    taken from the dataset ``profile`` when available, so they cover every
+    sample even if the plotted points are decimated.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset, including the derived columns listed by
+        :func:`figure_columns`.
+    diagram_type : str
+        One of ``DIAGRAM_TYPES``.
+    x_col, y_col : str or None
+        Selected axes; ignored where the diagram has fixed axes.
+    group_col : str or None
+        Column used to color points by group.
+    profile : dict, optional
+        Dataset profile from :func:`src.utils.profile.profile_dataset`.
+    trace_rows : list, optional
+        If given, the positions in ``df`` of the points of each trace are
+        appended to it (None for traces without points), to map selections
+        back to the plotted points.
+    max_groups : int, optional
+        Number of groups above which points are drawn as one trace per
+        panel colored by group.
+    webgl_threshold : int, optional
+        Number of points above which Scattergl traces are used.
+    max_points : int, optional
+        Approximate maximum number of points drawn; larger datasets are
+        decimated.
+
+    Returns
+    -------
+    plotly.graph_objs.Figure
+        Figure with publication-style layout.
+    """
+    try:
+        # Harker and TAS modes: X is locked to SiO2
+        if diagram_type == "tas":
+            fig = create_tas_diagram(
+                df=df,
+                group_col=group_col,
+                silica_col="SiO2",
+                webgl_threshold=webgl_threshold,
+                max_points=max_points,
+                max_groups=max_groups,
+                trace_rows=trace_rows,
+            )
+        elif diagram_type == "harker_plate":
+            fig = create_harker_plate(
+                df=df,
+                group_col=group_col,
+                base_col="SiO2",
+                webgl_threshold=webgl_threshold,
+                max_points=max_points,
+                max_groups=max_groups,
+                trace_rows=trace_rows,
+            )
+        elif diagram_type == "harker":
+            fig = create_harker_scatter(
+                df=df,
+                y_col=y_col,
+                group_col=group_col,
+                base_col="SiO2",
+                webgl_threshold=webgl_threshold,
+                max_points=max_points,
+                max_groups=max_groups,
+                trace_rows=trace_rows,
+            )
+        else:
+            # Default: custom X-Y diagram
+            fig = create_xy_scatter(
+                df,
+                x_col,
+                y_col,
+                group_col,
+                webgl_threshold=webgl_threshold,
+                max_points=max_points,
+                max_groups=max_groups,
+                trace_rows=trace_rows,
+            )
+    except ValueError as exc:
+        # If required columns are missing, show an empty figure with an informative title
+        fig = go.Figure()
+        fig.update_layout(
+            title=str(exc),
+            xaxis_title="",
+            yaxis_title="",
+        )
+
+    if diagram_type in ("custom", "harker") and fig.data:
+        x_range = axis_range(profile, x_col if diagram_type == "custom" else "SiO2")
+        y_range = axis_range(profile, y_col)
+        if x_range is not None:
+            fig.update_xaxes(range=x_range)
+        if y_range is not None:
+            fig.update_yaxes(range=y_range)
+
+    return fig
@@ -1,13 +1,37 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Iterable, Optional, Sequence
 
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
 from plotly.graph_objs import Figure
+from plotly.subplots import make_subplots
 
-from src.plots.basic_xy import create_xy_scatter
+from src.plots.basic_xy import (
+    MAX_GROUP_TRACES,
+    MAX_RENDERED_POINTS,
+    WEBGL_THRESHOLD,
+    bucket_legend_traces,
+    bucket_marker,
+    create_xy_scatter,
+    group_buckets,
+    group_codes,
+    trace_values,
+)
+from src.utils.decimation import decimate_xy
+from src.utils.instrumentation import stage
 from src.utils.labels import get_pretty_label
-from src.utils.plot_style import apply_publication_style
+from src.utils.plot_style import GROUP_COLORWAY, apply_publication_style
+
+
+# Oxides shown on a standard Harker plate, in panel order
+HARKER_OXIDES: tuple[str, ...] = (
+    "TiO2", "Al2O3", "FeO*", "MgO", "CaO", "Na2O", "K2O", "P2O5",
+)
+
+# Height of one row of panels in a Harker plate (pixels)
+PLATE_ROW_HEIGHT: int = 250
 
 
 def create_harker_scatter(
@@ -15,6 +39,10 @@ def create_harker_scatter(
     y_col: str,
     group_col: Optional[str] = None,
     base_col: str = "SiO2",
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    max_points: int = MAX_RENDERED_POINTS,
+    max_groups: int = MAX_GROUP_TRACES,
+    trace_rows: Optional[list] = None,
 ) -> Figure:
     """
     Create a Harker-style diagram (base_col vs y_col) with publication styling.
@@ -29,6 +57,15 @@ def create_harker_scatter(
         Column used to color points by group (e.g., rock type).
     base_col : str, optional
         Column used as the Harker base axis, typically "SiO2".
+    webgl_threshold : int, optional
+        Number of points above which Scattergl traces are used.
+    max_points : int, optional
+        Approximate maximum number of points sent to the client.
+    max_groups : int, optional
+        Number of groups above which points are drawn as a single trace.
+    trace_rows : list, optional
+        If given, the positions in ``df`` of the points of each trace are
+        appended to it (see :func:`create_xy_scatter`).
 
     Returns
     -------
@@ -49,19 +86,218 @@ def create_harker_scatter(
     pretty_y = get_pretty_label(y_col)
     title = f"Harker diagram: {pretty_y} vs {pretty_x}"
 
-    fig: Figure = create_xy_scatter(
+    # create_xy_scatter already applies the publication style
+    return create_xy_scatter(
         df=df,
         x_col=base_col,
         y_col=y_col,
         group_col=group_col,
         title=title,
+        webgl_threshold=webgl_threshold,
+        max_points=max_points,
+        max_groups=max_groups,
+        trace_rows=trace_rows,
     )
 
-    fig = apply_publication_style(
-        fig=fig,
-        x_label=pretty_x,
-        y_label=pretty_y,
-        title=title,
+
+def harker_panels(
+    columns: Iterable[str],
+    base_col: str = "SiO2",
+    oxides: Sequence[str] = HARKER_OXIDES,
+) -> list[str]:
+    """
+    Return the oxides of a Harker plate drawn for a dataset, in panel order.
+
+    Panel ``i`` is drawn on the axes ``x{i+1}`` and ``y{i+1}`` (``x`` and
+    ``y`` for the first one).
+    """
+    available = set(columns)
+    return [ox for ox in oxides if ox in available and ox != base_col]
+
+
+def create_harker_plate(
+    df: pd.DataFrame,
+    group_col: Optional[str] = None,
+    base_col: str = "SiO2",
+    oxides: Sequence[str] = HARKER_OXIDES,
+    n_cols: int = 2,
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    max_points: int = MAX_RENDERED_POINTS,
+    max_groups: int = MAX_GROUP_TRACES,
+    trace_rows: Optional[list] = None,
+) -> Figure:
+    """
+    Create a multi-panel Harker plate: every oxide vs base_col in one figure.
+
+    The data is grouped once; the per-group base_col arrays are shared by
+    all panels, and every trace is added in a single batch before the
+    publication style is applied once to the whole figure. With more than
+    ``max_groups`` groups, each panel holds a single trace colored by the
+    largest groups (see :func:`src.plots.basic_xy.group_buckets`).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing geochemical data.
+    group_col : str, optional
+        Column used to color points by group (e.g., rock type).
+    base_col : str, optional
+        Column used as the shared X axis, typically "SiO2".
+    oxides : sequence of str, optional
+        Oxides to plot, one panel each. Oxides missing from ``df`` are skipped.
+    n_cols : int, optional
+        Number of panel columns.
+    webgl_threshold : int, optional
+        Number of rows above which Scattergl traces are used.
+    max_points : int, optional
+        Approximate maximum number of rows sent to the client.
+    max_groups : int, optional
+        Number of groups above which each panel holds a single trace.
+    trace_rows : list, optional
+        If given, the positions in ``df`` of the points of each trace are
+        appended to it (None for legend-only traces).
+
+    Returns
+    -------
+    plotly.graph_objs.Figure
+        Harker plate with publication-style layout.
+
+    Raises
+    ------
+    ValueError
+        If base_col, group_col or all of the requested oxides are missing.
+    """
+    if base_col not in df.columns:
+        raise ValueError(
+            f'Harker diagram requires column "{base_col}" in the dataset.'
+        )
+    panels = harker_panels(df.columns, base_col, oxides)
+    if not panels:
+        raise ValueError("Harker plate requires at least one oxide column in the dataset.")
+    if group_col is not None and group_col not in df.columns:
+        raise ValueError(f'Diagram requires column "{group_col}" in the dataset.')
+
+    x_values = trace_values(df[base_col])
+    y_values = {ox: trace_values(df[ox]) for ox in panels}
+
+    rows = np.arange(len(df))
+    if len(df) > max_points:
+        # Union of per-panel samples, so every panel keeps its own outliers
+        per_panel = max(max_points // len(panels), 1)
+        rows = np.unique(
+            np.concatenate(
+                [decimate_xy(x_values, y_values[ox], per_panel) for ox in panels]
+            )
+        )
+
+    collapsed = None
+    if group_col is None:
+        groups = {None: rows}
+    else:
+        codes, names = group_codes(df[group_col], rows)
+        if len(names) > max_groups:
+            # One trace per panel; the group codes only drive marker colors
+            collapsed = group_buckets(codes, names)
+            group_labels = np.array([str(name) for name in names])[codes]
+            groups = {None: rows}
+        else:
+            order = np.argsort(codes, kind="stable")
+            bounds = np.cumsum(np.bincount(codes, minlength=len(names)))[:-1]
+            groups = dict(zip(names, np.split(rows[order], bounds)))
+
+    # Shared per-group X arrays, reused by every panel
+    group_x = {name: x_values[idx] for name, idx in groups.items()}
+
+    trace_cls = go.Scattergl if len(rows) > webgl_threshold else go.Scatter
+    n_rows = -(-len(panels) // n_cols)
+
+    if trace_rows is None:
+        trace_rows = []
+    traces, panel_rows, panel_cols = [], [], []
+    for panel, ox in enumerate(panels):
+        hovertemplate = f"{base_col}=%{{x}}<br>{ox}=%{{y}}"
+        if collapsed is not None:
+            buckets, _, colors, _ = collapsed
+            traces.append(
+                trace_cls(
+                    x=group_x[None],
+                    y=y_values[ox][rows],
+                    mode="markers",
+                    showlegend=False,
+                    marker=bucket_marker(buckets, colors),
+                    customdata=group_labels,
+                    hovertemplate=(
+                        f"{group_col}=%{{customdata}}<br>{hovertemplate}<extra></extra>"
+                    ),
+                )
+            )
+            trace_rows.append(rows)
+            panel_rows.append(panel // n_cols + 1)
+            panel_cols.append(panel % n_cols + 1)
+            continue
+
+        for i, (name, idx) in enumerate(groups.items()):
+            trace_rows.append(idx)
+            color = GROUP_COLORWAY[i % len(GROUP_COLORWAY)]
+            traces.append(
+                trace_cls(
+                    x=group_x[name],
+                    y=y_values[ox][idx],
+                    mode="markers",
+                    name=None if name is None else str(name),
+                    legendgroup=None if name is None else str(name),
+                    showlegend=name is not None and panel == 0,
+                    marker=dict(color=color),
+                    hovertemplate=(
+                        hovertemplate if name is None
+                        else f"{group_col}={name}<br>{hovertemplate}"
+                    ) + "<extra></extra>",
+                )
+            )
+            panel_rows.append(panel // n_cols + 1)
+            panel_cols.append(panel % n_cols + 1)
+
+    if collapsed is not None:
+        _, labels, colors, merged = collapsed
+        legend = bucket_legend_traces(labels, colors, trace_cls, merged)
+        traces += legend
+        trace_rows += [None] * len(legend)
+        panel_rows += [1] * len(legend)
+        panel_cols += [1] * len(legend)
+
+    fig: Figure = make_subplots(
+        rows=n_rows,
+        cols=n_cols,
+        shared_xaxes=True,
+        horizontal_spacing=0.1,
+        vertical_spacing=0.04,
     )
+    fig.add_traces(traces, rows=panel_rows, cols=panel_cols)
+
+    with stage("style"):
+        fig = apply_publication_style(
+            fig=fig,
+            title=f"Harker plate: oxides vs {get_pretty_label(base_col)}",
+        )
+        for panel, ox in enumerate(panels):
+            fig.update_yaxes(
+                title_text=get_pretty_label(ox),
+                row=panel // n_cols + 1,
+                col=panel % n_cols + 1,
+            )
+        # Empty cells of the last row are hidden, so the X ticks and title of
+        # each column go on its last panel rather than on the bottom row
+        for cell in range(len(panels), n_rows * n_cols):
+            fig.update_xaxes(visible=False, row=n_rows, col=cell % n_cols + 1)
+            fig.update_yaxes(visible=False, row=n_rows, col=cell % n_cols + 1)
+        for col in range(min(n_cols, len(panels))):
+            last = col + (len(panels) - 1 - col) // n_cols * n_cols
+            fig.update_xaxes(
+                title_text=get_pretty_label(base_col),
+                showticklabels=True,
+                row=last // n_cols + 1,
+                col=col + 1,
+            )
+        fig.update_layout(height=PLATE_ROW_HEIGHT * n_rows)
 
     return fig
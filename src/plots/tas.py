@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from plotly.graph_objs import Figure
+
+from src.plots.basic_xy import (
+    MAX_GROUP_TRACES,
+    MAX_RENDERED_POINTS,
+    WEBGL_THRESHOLD,
+    create_xy_scatter,
+)
+from src.utils.derived import compute_derived
+from src.utils.labels import get_pretty_label
+
+
+# Column added to datasets by add_tas_classification
+TAS_CLASS_COLUMN: str = "TAS_class"
+
+UNCLASSIFIED: str = "Unclassified"
+
+# Extent of the diagram (SiO2 min, SiO2 max, Na2O+K2O min, Na2O+K2O max).
+# Fields that are open-ended in Le Bas et al. (1986) are closed on this frame.
+TAS_FRAME: tuple[float, float, float, float] = (35.0, 80.0, 0.0, 16.0)
+
+# TAS fields of Le Bas et al. (1986), as (SiO2, Na2O+K2O) polygon vertices
+TAS_FIELDS: dict[str, tuple[tuple[float, float], ...]] = {
+    "Picrobasalt": ((41, 0), (45, 0), (45, 3), (41, 3)),
+    "Basalt": ((45, 0), (52, 0), (52, 5), (45, 5)),
+    "Basaltic andesite": ((52, 0), (57, 0), (57, 5.9), (52, 5)),
+    "Andesite": ((57, 0), (63, 0), (63, 7), (57, 5.9)),
+    "Dacite": ((63, 0), (77.3, 0), (69, 8), (63, 7)),
+    "Rhyolite": ((77.3, 0), (80, 0), (80, 16), (69, 16), (69, 8)),
+    "Trachybasalt": ((45, 5), (52, 5), (49.4, 7.3)),
+    "Basaltic trachyandesite": ((52, 5), (57, 5.9), (53, 9.3), (49.4, 7.3)),
+    "Trachyandesite": ((57, 5.9), (63, 7), (57.6, 11.7), (53, 9.3)),
+    "Trachyte/Trachydacite": ((63, 7), (69, 8), (69, 16), (65.7, 16), (57.6, 11.7)),
+    "Tephrite/Basanite": ((41, 3), (45, 3), (45, 5), (49.4, 7.3), (45, 9.4), (41, 7)),
+    "Phonotephrite": ((49.4, 7.3), (53, 9.3), (48.4, 11.5), (45, 9.4)),
+    "Tephriphonolite": ((53, 9.3), (57.6, 11.7), (52.5, 14), (48.4, 11.5)),
+    "Phonolite": ((52.5, 14), (57.6, 11.7), (65.7, 16), (48.4, 16)),
+    "Foidite": (
+        (35, 3), (41, 3), (41, 7), (45, 9.4), (48.4, 11.5),
+        (52.5, 14), (48.4, 16), (35, 16),
+    ),
+}
+
+TAS_CLASSES: tuple[str, ...] = tuple(TAS_FIELDS) + (UNCLASSIFIED,)
+
+
+def _build_polygon_index() -> tuple[np.ndarray, ...]:
+    """
+    Flatten all field polygons into edge arrays for vectorized lookups.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        Edge start/end coordinates (x0, y0, x1, y1), the field index of each
+        edge, and per-field bounding boxes (xmin, xmax, ymin, ymax).
+    """
+    x0, y0, x1, y1, owner, bboxes = [], [], [], [], [], []
+    for i, vertices in enumerate(TAS_FIELDS.values()):
+        poly = np.asarray(vertices, dtype=np.float64)
+        nxt = np.roll(poly, -1, axis=0)
+        x0.append(poly[:, 0])
+        y0.append(poly[:, 1])
+        x1.append(nxt[:, 0])
+        y1.append(nxt[:, 1])
+        owner.append(np.full(len(poly), i))
+        bboxes.append(
+            (poly[:, 0].min(), poly[:, 0].max(), poly[:, 1].min(), poly[:, 1].max())
+        )
+    return (
+        np.concatenate(x0),
+        np.concatenate(y0),
+        np.concatenate(x1),
+        np.concatenate(y1),
+        np.concatenate(owner),
+        np.asarray(bboxes),
+    )
+
+
+def _build_background() -> tuple[tuple[dict, ...], tuple[dict, ...]]:
+    """
+    Serialize the field boundaries and names as Plotly layout dicts.
+    """
+    shapes, annotations = [], []
+    for name, vertices in TAS_FIELDS.items():
+        path = "M " + " L ".join(f"{x},{y}" for x, y in vertices) + " Z"
+        shapes.append(
+            dict(
+                type="path",
+                path=path,
+                xref="x",
+                yref="y",
+                layer="below",
+                line=dict(color="gray", width=1),
+                fillcolor="rgba(0,0,0,0)",
+            )
+        )
+        center = np.mean(np.asarray(vertices, dtype=np.float64), axis=0)
+        annotations.append(
+            dict(
+                text=name,
+                x=float(center[0]),
+                y=float(center[1]),
+                xref="x",
+                yref="y",
+                showarrow=False,
+                font=dict(size=9, color="gray"),
+            )
+        )
+    return tuple(shapes), tuple(annotations)
+
+
+# Built once at import and reused by every TAS figure and classification
+_EDGE_X0, _EDGE_Y0, _EDGE_X1, _EDGE_Y1, _EDGE_OWNER, _FIELD_BBOXES = _build_polygon_index()
+_TAS_SHAPES, _TAS_ANNOTATIONS = _build_background()
+
+
+def classify_tas(silica: np.ndarray, alkali: np.ndarray) -> pd.Categorical:
+    """
+    Classify samples into TAS fields with a vectorized point-in-polygon test.
+
+    Parameters
+    ----------
+    silica : np.ndarray
+        SiO2 contents (wt.%).
+    alkali : np.ndarray
+        Total alkali contents, Na2O + K2O (wt.%).
+
+    Returns
+    -------
+    pd.Categorical
+        Field name per sample, with categories ``TAS_CLASSES``. Samples
+        outside every field, or with missing values, are "Unclassified".
+    """
+    x = np.asarray(silica, dtype=np.float64)
+    y = np.asarray(alkali, dtype=np.float64)
+
+    codes = np.full(x.shape, len(TAS_FIELDS), dtype=np.int8)
+    unassigned = np.isfinite(x) & np.isfinite(y)
+
+    for field, (xmin, xmax, ymin, ymax) in enumerate(_FIELD_BBOXES):
+        candidates = np.flatnonzero(
+            unassigned & (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+        )
+        if candidates.size == 0:
+            continue
+
+        edges = _EDGE_OWNER == field
+        ex0, ey0 = _EDGE_X0[edges], _EDGE_Y0[edges]
+        ex1, ey1 = _EDGE_X1[edges], _EDGE_Y1[edges]
+        px = x[candidates, None]
+        py = y[candidates, None]
+
+        # Even-odd ray casting: count edges crossed by a ray towards +x
+        straddles = (ey0 > py) != (ey1 > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = ex0 + (py - ey0) * (ex1 - ex0) / (ey1 - ey0)
+        inside = np.count_nonzero(straddles & (px < x_cross), axis=1) % 2 == 1
+
+        hits = candidates[inside]
+        codes[hits] = field
+        unassigned[hits] = False
+
+    return pd.Categorical.from_codes(codes, categories=list(TAS_CLASSES))
+
+
+def total_alkali(df: pd.DataFrame) -> Optional[pd.Series]:
+    """
+    Return the Na2O + K2O column of ``df``, or None if it cannot be computed.
+    """
+    if "Na2O+K2O" in df.columns:
+        return df["Na2O+K2O"]
+    if "Na2O" in df.columns and "K2O" in df.columns:
+        values = compute_derived(df, ["Na2O+K2O"])["Na2O+K2O"]
+        return pd.Series(values, index=df.index, name="Na2O+K2O")
+    return None
+
+
+def add_tas_classification(
+    df: pd.DataFrame,
+    silica_col: str = "SiO2",
+    column: str = TAS_CLASS_COLUMN,
+) -> pd.DataFrame:
+    """
+    Add a categorical TAS field column to ``df`` when SiO2 and alkalis exist.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset to classify.
+    silica_col : str, optional
+        Silica column.
+    column : str, optional
+        Name of the added column.
+
+    Returns
+    -------
+    pd.DataFrame
+        New DataFrame with the classification column, or ``df`` itself if
+        the required columns are missing.
+    """
+    alkali = total_alkali(df)
+    if silica_col not in df.columns or alkali is None:
+        return df
+
+    classes = classify_tas(
+        df[silica_col].to_numpy(dtype=float, na_value=np.nan),
+        alkali.to_numpy(dtype=float, na_value=np.nan),
+    )
+    return df.assign(**{column: classes})
+
+
+def create_tas_diagram(
+    df: pd.DataFrame,
+    group_col: Optional[str] = None,
+    silica_col: str = "SiO2",
+    webgl_threshold: int = WEBGL_THRESHOLD,
+    max_points: int = MAX_RENDERED_POINTS,
+    max_groups: int = MAX_GROUP_TRACES,
+    trace_rows: Optional[list] = None,
+) -> Figure:
+    """
+    Create a Total Alkali vs Silica (TAS) diagram with Le Bas field boundaries.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame containing geochemical data.
+    group_col : str, optional
+        Column used to color points by group (e.g., rock type).
+    silica_col : str, optional
+        Silica column plotted on the X axis.
+    webgl_threshold : int, optional
+        Number of points above which Scattergl traces are used.
+    max_points : int, optional
+        Approximate maximum number of points sent to the client.
+    max_groups : int, optional
+        Number of groups above which points are drawn as a single trace.
+    trace_rows : list, optional
+        If given, the positions in ``df`` of the points of each trace are
+        appended to it (see :func:`create_xy_scatter`).
+
+    Returns
+    -------
+    plotly.graph_objs.Figure
+        TAS diagram with publication-style layout.
+
+    Raises
+    ------
+    ValueError
+        If silica, alkali or group columns are missing from the dataframe.
+    """
+    alkali = total_alkali(df)
+    if silica_col not in df.columns or alkali is None:
+        raise ValueError(
+            f'TAS diagram requires "{silica_col}" and "Na2O"/"K2O" '
+            '(or "Na2O+K2O") columns in the dataset.'
+        )
+    if group_col is not None and group_col not in df.columns:
+        raise ValueError(f'Diagram requires column "{group_col}" in the dataset.')
+
+    columns = [silica_col] if group_col is None else [silica_col, group_col]
+    data = df[list(dict.fromkeys(columns))].assign(**{"Na2O+K2O": alkali})
+
+    fig = create_xy_scatter(
+        df=data,
+        x_col=silica_col,
+        y_col="Na2O+K2O",
+        group_col=group_col,
+        title=f"TAS diagram: {get_pretty_label('Na2O+K2O')} vs {get_pretty_label(silica_col)}",
+        webgl_threshold=webgl_threshold,
+        max_points=max_points,
+        max_groups=max_groups,
+        trace_rows=trace_rows,
+    )
+
+    xmin, xmax, ymin, ymax = TAS_FRAME
+    fig.update_layout(
+        shapes=_TAS_SHAPES,
+        annotations=fig.layout.annotations + _TAS_ANNOTATIONS,
+    )
+    fig.update_xaxes(range=[xmin, xmax])
+    fig.update_yaxes(range=[ymin, ymax])
+
+    return fig
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Optional, Protocol
+
+
+# Environment variables read by backend_from_env
+ENV_BACKEND: str = "PETROLITE_CACHE_BACKEND"
+ENV_CACHE_DIR: str = "PETROLITE_CACHE_DIR"
+ENV_REDIS_URL: str = "PETROLITE_REDIS_URL"
+ENV_CACHE_SIZE_LIMIT: str = "PETROLITE_CACHE_SIZE_LIMIT"
+ENV_CACHE_TTL: str = "PETROLITE_CACHE_TTL"
+
+# Disk space a shared disk cache may use before its oldest files are removed
+DEFAULT_DISK_SIZE_LIMIT: int = 2 * 1024**3
+
+# Expiry of values in a shared Redis cache (seconds)
+DEFAULT_REDIS_TTL: int = 24 * 3600
+
+# Keys are built by the caches themselves; restrict them to a safe alphabet
+_KEY_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+class CacheBackend(Protocol):
+    """
+    Byte store shared between worker processes.
+
+    Implementations must be safe to use from several processes at once.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    def set(self, key: str, value: bytes) -> None:
+        ...
+
+    def delete(self, key: str) -> None:
+        ...
+
+    def delete_prefix(self, prefix: str) -> int:
+        ...
+
+
+def _check_key(key: str) -> str:
+    if not _KEY_RE.match(key):
+        raise ValueError(f"Invalid cache key: {key!r}")
+    return key
+
+
+class DiskBackend:
+    """
+    Cache backend storing one file per key in a local directory.
+
+    Writes go through a temporary file and an atomic rename, so concurrent
+    readers in other workers never see partial values. When the files
+    exceed ``size_limit``, the least recently used ones are removed after
+    each write; reads refresh the modification time that orders them.
+
+    Parameters
+    ----------
+    directory : str or os.PathLike
+        Directory holding the cache files. Created if needed.
+    size_limit : int, optional
+        Maximum total size of the cache files, in bytes. Unbounded if None.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        size_limit: Optional[int] = DEFAULT_DISK_SIZE_LIMIT,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.size_limit = size_limit
+
+    def path(self, key: str) -> Path:
+        """Return the file backing ``key``."""
+        return self.directory / _check_key(key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            if self.size_limit is not None:
+                os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def set(self, key: str, value: bytes) -> None:
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(value)
+            os.replace(tmp_name, self.path(key))
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        if self.size_limit is not None:
+            self._cull(self.size_limit)
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def delete_prefix(self, prefix: str) -> int:
+        removed = 0
+        for path in self.directory.glob(f"{_check_key(prefix)}*"):
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+    def _cull(self, size_limit: int) -> None:
+        # Other workers may remove the same files concurrently
+        files = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".tmp-"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        if total <= size_limit:
+            return
+        for _, size, path in sorted(files):
+            Path(path).unlink(missing_ok=True)
+            total -= size
+            if total <= size_limit:
+                break
+
+
+class RedisBackend:
+    """
+    Cache backend for Redis or any server speaking the Redis protocol.
+
+    Requires the optional ``redis`` package.
+
+    Parameters
+    ----------
+    url : str
+        Server URL, e.g. "redis://localhost:6379/0".
+    ttl : int, optional
+        Expiry of stored values in seconds. Values never expire if None.
+    namespace : str, optional
+        Prefix added to every key, so several apps can share a server.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ttl: Optional[int] = DEFAULT_REDIS_TTL,
+        namespace: str = "petrolite:",
+    ) -> None:
+        try:
+            import redis
+        except ImportError as exc:
+            raise ImportError(
+                "RedisBackend requires the 'redis' package (pip install redis)."
+            ) from exc
+
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.namespace = namespace
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.namespace + _check_key(key))
+
+    def set(self, key: str, value: bytes) -> None:
+        self._client.set(self.namespace + _check_key(key), value, ex=self.ttl)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.namespace + _check_key(key))
+
+    def delete_prefix(self, prefix: str) -> int:
+        keys = list(self._client.scan_iter(match=f"{self.namespace}{_check_key(prefix)}*"))
+        if keys:
+            self._client.delete(*keys)
+        return len(keys)
+
+
+def backend_from_env() -> Optional[CacheBackend]:
+    """
+    Build the shared cache backend described by environment variables.
+
+    ``PETROLITE_CACHE_BACKEND`` selects the backend: "disk" (directory from
+    ``PETROLITE_CACHE_DIR``, defaulting to a folder in the system temp
+    directory), "redis" (URL from ``PETROLITE_REDIS_URL``) or "none".
+    ``PETROLITE_CACHE_SIZE_LIMIT`` bounds the disk cache (bytes) and
+    ``PETROLITE_CACHE_TTL`` sets the Redis expiry (seconds); 0 disables
+    either bound.
+
+    Returns
+    -------
+    CacheBackend or None
+        Configured backend, or None if caches should stay process-local.
+
+    Raises
+    ------
+    ValueError
+        If the backend name is unknown, or a bound is not an integer.
+    """
+    kind = os.environ.get(ENV_BACKEND, "none").strip().lower()
+
+    if kind in ("", "none", "memory"):
+        return None
+    if kind == "disk":
+        directory = os.environ.get(
+            ENV_CACHE_DIR, os.path.join(tempfile.gettempdir(), "petrolite-cache")
+        )
+        return DiskBackend(
+            directory, size_limit=_env_bound(ENV_CACHE_SIZE_LIMIT, DEFAULT_DISK_SIZE_LIMIT)
+        )
+    if kind == "redis":
+        return RedisBackend(
+            os.environ.get(ENV_REDIS_URL, "redis://localhost:6379/0"),
+            ttl=_env_bound(ENV_CACHE_TTL, DEFAULT_REDIS_TTL),
+        )
+
+    raise ValueError(f"Unknown cache backend: {kind!r}")
+
+
+def _env_bound(name: str, default: int) -> Optional[int]:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return default
+    try:
+        bound = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}") from None
+    return bound if bound > 0 else None
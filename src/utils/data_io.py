@@ -2,24 +2,94 @@ from __future__ import annotations
 
 import base64
 import io
-from typing import Tuple, Optional
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Sequence, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 
+from src.utils.labels import COLUMN_LABEL_MAP
+
+
+# Number of rows parsed per chunk when streaming uploads
+CSV_CHUNK_ROWS: int = 50_000
+XLSX_CHUNK_ROWS: int = 20_000
+
+# Oxide columns that may be stored as float32 (all wt.% quantities)
+OXIDE_COLUMNS: frozenset[str] = frozenset(
+    col for col in COLUMN_LABEL_MAP if col != "Mg#"
+)
+
+# Relative error accepted where float32 rounding is harmless, e.g. figure
+# arrays; stored datasets are only downcast when their values are unchanged
+FLOAT32_RTOL: float = 1e-6
+
+# String columns with at most this many distinct values per row are stored as
+# category by ``compact_frame`` (sample ids, unique per row, stay strings)
+CATEGORY_MAX_RATIO: float = 0.5
+
+# Columnar formats accepted on upload and offered for export
+PARQUET_SUFFIXES: tuple[str, ...] = (".parquet", ".pq")
+FEATHER_SUFFIXES: tuple[str, ...] = (".feather", ".arrow", ".ipc")
+EXPORT_FORMATS: Dict[str, str] = {"parquet": ".parquet", "feather": ".feather"}
+
+# Categorical column recording the file each row of a batch upload came from
+SOURCE_COLUMN: str = "source_file"
+
+# Upper bound on the threads parsing a batch upload
+MAX_PARSE_WORKERS: int = 8
+
+# Unit suffixes stripped before matching column names, e.g. "SiO2 (wt%)"
+_UNIT_SUFFIX_RE = re.compile(
+    r"[\s_]*[(\[]?\s*(?:wt\.?\s*%|wt\.?\s*pct|%)\s*[)\]]?\s*$",
+    re.IGNORECASE,
+)
+
+# Normalized spelling -> canonical column name
+_CANONICAL_NAMES: Dict[str, str] = {col.lower(): col for col in COLUMN_LABEL_MAP}
+
+# Common spellings that do not normalize to a COLUMN_LABEL_MAP key
+_COLUMN_ALIASES: Dict[str, str] = {
+    "feot": "FeO*",
+    "feotot": "FeO*",
+    "feo(t)": "FeO*",
+    "mgnumber": "Mg#",
+    "mg-number": "Mg#",
+}
+
+ProgressCallback = Callable[[float], None]
+
 
 def parse_uploaded_file(
     contents: str,
     filename: str,
+    progress: Optional[ProgressCallback] = None,
+    downcast_oxides: bool = True,
 ) -> pd.DataFrame:
     """
     Parse a Dash dcc.Upload contents string into a pandas DataFrame.
 
+    The payload is parsed directly from a bytes buffer, in chunks, so that no
+    intermediate text copy of the whole file is kept in memory. Parquet and
+    Feather (Arrow IPC) files are decoded without parsing; they require
+    pyarrow.
+
     Parameters
     ----------
     contents : str
         Base64-encoded contents string from dcc.Upload.
     filename : str
         Original filename, used to infer file type.
+    progress : callable, optional
+        Called with the parsed fraction of the file (0.0 to 1.0) after each
+        chunk.
+    downcast_oxides : bool, optional
+        If True, oxide columns (see ``OXIDE_COLUMNS``) are stored as float32
+        when every value of the file is unchanged in float32 (see
+        :func:`is_float32_safe`).
 
     Returns
     -------
@@ -37,13 +107,469 @@ def parse_uploaded_file(
     content_type, content_string = contents.split(",", 1)
 
     decoded: bytes = base64.b64decode(content_string)
+    del content_string  # drop the split copy of the base64 text early
+
+    return _parse_bytes(decoded, filename, progress, downcast_oxides)
+
+
+def _parse_bytes(
+    decoded: bytes,
+    filename: str,
+    progress: Optional[ProgressCallback],
+    downcast_oxides: bool,
+) -> pd.DataFrame:
+    """
+    Parse raw file contents, dispatching on the filename extension.
+    """
+    name = filename.lower()
+    if name.endswith(".csv"):
+        chunks = _iter_csv_chunks(decoded, progress)
+    elif name.endswith(".xlsx"):
+        chunks = _iter_xlsx_chunks(decoded, progress)
+    elif name.endswith(".xls"):
+        chunks = iter([pd.read_excel(io.BytesIO(decoded))])
+    elif name.endswith(PARQUET_SUFFIXES + FEATHER_SUFFIXES):
+        chunks = iter([_read_columnar(decoded, name)])
+    else:
+        raise ValueError(f"Unsupported file type: {filename}")
+
+    df = _concat_chunks(chunks, downcast_oxides)
+
+    if progress is not None:
+        progress(1.0)
+
+    return df
+
+
+def parse_uploaded_files(
+    contents: Sequence[str],
+    filenames: Sequence[str],
+    progress: Optional[ProgressCallback] = None,
+    downcast_oxides: bool = True,
+    source_col: str = SOURCE_COLUMN,
+) -> pd.DataFrame:
+    """
+    Parse a batch upload into a single DataFrame.
+
+    Files are parsed in a thread pool (the pandas parsers release the GIL),
+    their column names are reconciled with ``reconcile_columns``, and the
+    results are concatenated once.
+
+    Parameters
+    ----------
+    contents : sequence of str
+        Base64-encoded contents strings from dcc.Upload.
+    filenames : sequence of str
+        Original filenames, in the same order as ``contents``.
+    progress : callable, optional
+        Called with the parsed fraction of the whole batch (0.0 to 1.0).
+    downcast_oxides : bool, optional
+        Passed to ``parse_uploaded_file``.
+    source_col : str, optional
+        Name of the categorical column holding the source filename of each
+        row. Only added when more than one file is uploaded.
+
+    Returns
+    -------
+    pd.DataFrame
+        Concatenated DataFrame.
+
+    Raises
+    ------
+    ValueError
+        If any file cannot be parsed; the message names the file.
+    """
+    if len(contents) != len(filenames):
+        raise ValueError("Each uploaded file needs a filename.")
+    if not contents:
+        raise ValueError("No file uploaded.")
+
+    fractions = [0.0] * len(contents)
+    lock = threading.Lock()
+
+    def parse(i: int) -> pd.DataFrame:
+        def report(fraction: float) -> None:
+            with lock:
+                fractions[i] = fraction
+                total = sum(fractions) / len(fractions)
+            progress(total)
+
+        try:
+            df = parse_uploaded_file(
+                contents[i],
+                filenames[i],
+                progress=report if progress is not None else None,
+                downcast_oxides=downcast_oxides,
+            )
+        except Exception as exc:  # noqa: BLE001
+            raise ValueError(f"{filenames[i]}: {exc}") from exc
+        return reconcile_columns(df)
+
+    workers = min(len(contents), MAX_PARSE_WORKERS)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(parse, range(len(contents))))
+
+    if len(frames) == 1:
+        return frames[0]
+
+    df = pd.concat(frames, ignore_index=True, sort=False)
+    # Codes per row instead of one filename string per row
+    codes = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+    sources = pd.Categorical.from_codes(codes, categories=_unique_labels(filenames))
+    return df.assign(**{source_col: sources})
+
+
+def reconcile_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename columns to the canonical names of ``COLUMN_LABEL_MAP``.
+
+    Matching ignores case, whitespace and unit suffixes, so "sio2",
+    "SiO2 (wt%)" and "SiO2_wt%" all become "SiO2". A column is left alone
+    if its canonical name is already taken.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Parsed dataset.
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with renamed columns (the data is not copied).
+    """
+    taken = set(df.columns)
+    renames: Dict[str, str] = {}
+    for col in df.columns:
+        canonical = canonical_column_name(col)
+        if canonical is not None and canonical not in taken:
+            renames[col] = canonical
+            taken.add(canonical)
+    return df.rename(columns=renames) if renames else df
+
+
+def canonical_column_name(name: object) -> Optional[str]:
+    """
+    Return the ``COLUMN_LABEL_MAP`` key matching a column name, if any.
+    """
+    key = re.sub(r"\s+", "", _UNIT_SUFFIX_RE.sub("", str(name).strip())).lower()
+    return _CANONICAL_NAMES.get(key) or _COLUMN_ALIASES.get(key)
+
+
+def _unique_labels(names: Sequence[str]) -> list[str]:
+    """
+    Make filenames unique by numbering repeats, e.g. "run.csv (2)".
+    """
+    seen: Dict[str, int] = {}
+    labels: list[str] = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        labels.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    return labels
+
+
+def load_dataset_file(path: str | os.PathLike[str], downcast_oxides: bool = True) -> pd.DataFrame:
+    """
+    Load a dataset from a local file.
+
+    Feather (Arrow IPC) and Parquet files are memory-mapped rather than
+    read into an intermediate buffer; other formats are parsed as in
+    ``parse_uploaded_file``.
+
+    Parameters
+    ----------
+    path : str or os.PathLike
+        File to load.
+    downcast_oxides : bool, optional
+        Passed to ``parse_uploaded_file``.
+
+    Returns
+    -------
+    pd.DataFrame
+        Loaded DataFrame.
+
+    Raises
+    ------
+    ValueError
+        If the file cannot be parsed or the format is unsupported.
+    """
+    name = os.fspath(path).lower()
+    if name.endswith(FEATHER_SUFFIXES):
+        from pyarrow import feather
+
+        df = feather.read_table(path, memory_map=True).to_pandas()
+    elif name.endswith(PARQUET_SUFFIXES):
+        df = pd.read_parquet(path, memory_map=True)
+    else:
+        with open(path, "rb") as handle:
+            return _parse_bytes(handle.read(), name, None, downcast_oxides)
+    return _concat_chunks(iter([df]), downcast_oxides)
+
+
+def write_dataset(df: pd.DataFrame, fmt: str) -> bytes:
+    """
+    Serialize a dataset to a columnar file format for export.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset to export.
+    fmt : str
+        One of ``EXPORT_FORMATS`` ("parquet" or "feather").
+
+    Returns
+    -------
+    bytes
+        File contents.
+
+    Raises
+    ------
+    ValueError
+        If the format is unknown.
+    ImportError
+        If pyarrow is not installed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise ImportError(
+            "Parquet/Feather export requires pyarrow (pip install pyarrow)."
+        ) from exc
+
+    # Both formats need string column names and a default index
+    data = df.reset_index(drop=True).rename(columns=str)
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        data.to_parquet(buffer, index=False)
+    else:
+        data.to_feather(buffer)
+    return buffer.getvalue()
+
+
+def _read_columnar(data: bytes, name: str) -> pd.DataFrame:
+    """
+    Decode an uploaded Parquet or Feather file from its raw bytes.
+    """
+    if name.endswith(PARQUET_SUFFIXES):
+        return pd.read_parquet(io.BytesIO(data))
+    return pd.read_feather(io.BytesIO(data))
+
+
+def _iter_csv_chunks(
+    data: bytes,
+    progress: Optional[ProgressCallback],
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield CSV chunks parsed straight from the raw bytes.
+    """
+    buffer = io.BytesIO(data)
+    total = max(len(data), 1)
+
+    with pd.read_csv(buffer, chunksize=CSV_CHUNK_ROWS) as reader:
+        for chunk in reader:
+            if progress is not None:
+                progress(min(buffer.tell() / total, 1.0))
+            yield chunk
+
+
+def _iter_xlsx_chunks(
+    data: bytes,
+    progress: Optional[ProgressCallback],
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield chunks of the first worksheet using openpyxl's read-only mode.
+
+    Read-only mode streams rows from the sheet XML instead of building the
+    full cell tree in memory.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+
+        header_row = next(rows, None)
+        if header_row is None:
+            yield pd.DataFrame()
+            return
+        # Trailing empty header cells are formatting leftovers, not columns
+        header_values = list(header_row)
+        while header_values and header_values[-1] is None:
+            header_values.pop()
+        header = [
+            str(value) if value is not None else f"Unnamed: {i}"
+            for i, value in enumerate(header_values)
+        ]
+        total = max((sheet.max_row or 0) - 1, 1)
+
+        n_read = 0
+        batch: list[tuple] = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            batch.append(row[: len(header)])
+            if len(batch) >= XLSX_CHUNK_ROWS:
+                n_read += len(batch)
+                yield pd.DataFrame.from_records(batch, columns=header)
+                batch = []
+                if progress is not None:
+                    progress(min(n_read / total, 1.0))
+
+        if batch or n_read == 0:
+            yield pd.DataFrame.from_records(batch, columns=header)
+    finally:
+        workbook.close()
 
-    if filename.lower().endswith(".csv"):
-        return pd.read_csv(io.StringIO(decoded.decode("utf-8")))
-    if filename.lower().endswith((".xls", ".xlsx")):
-        return pd.read_excel(io.BytesIO(decoded))
 
-    raise ValueError(f"Unsupported file type: {filename}")
+def _concat_chunks(
+    chunks: Iterable[pd.DataFrame],
+    downcast_oxides: bool,
+) -> pd.DataFrame:
+    """
+    Concatenate parsed chunks, downcasting oxide columns chunk by chunk.
+
+    An oxide column stays float32 while every chunk passes
+    :func:`is_float32_safe`. When a later chunk does not, the chunks
+    already downcast get their original float64 values back, so the
+    column is float64 throughout and unchanged. No float64 copy of the
+    full dataset is materialized for columns that stay float32.
+    """
+    parts: list[pd.DataFrame] = []
+    float32_cols: set[str] = set()
+
+    for i, chunk in enumerate(chunks):
+        if i == 0 and downcast_oxides:
+            float32_cols = {col for col in chunk.columns if col in OXIDE_COLUMNS}
+        rejected = {
+            col for col in float32_cols
+            if col in chunk.columns and not is_float32_safe(chunk[col])
+        }
+        if rejected:
+            float32_cols -= rejected
+            parts = [_restore_float64(part, rejected) for part in parts]
+        if float32_cols:
+            chunk = chunk.astype(
+                {col: np.float32 for col in float32_cols if col in chunk.columns}
+            )
+        parts.append(chunk)
+
+    if not parts:
+        return pd.DataFrame()
+    if len(parts) == 1:
+        return parts[0]
+
+    df = pd.concat(parts, ignore_index=True)
+    # Chunks that were entirely empty in a column parse as object dtype
+    return df.infer_objects()
+
+
+def _restore_float64(df: pd.DataFrame, cols: Iterable[str]) -> pd.DataFrame:
+    """
+    Return ``df`` with its float32 columns among ``cols`` back in float64.
+
+    The columns were only downcast when their values were unchanged, so
+    parsing the shortest decimal form of each value recovers them exactly.
+    """
+    restored = {
+        col: _shortest_float32(df[col].to_numpy())
+        for col in cols
+        if col in df.columns and df[col].dtype == np.float32
+    }
+    return df.assign(**restored) if restored else df
+
+
+def is_float32_safe(values: pd.Series, rtol: Optional[float] = None) -> bool:
+    """
+    Check whether a float column can be stored as float32.
+
+    By default the values must be unchanged: the shortest decimal form of
+    each float32 value has to parse back to the original float64 value.
+    Values typed with up to about 7 significant digits (50.1, 7.25) pass,
+    values carrying more (45.123456) do not, so previews and exports show
+    the values as they were uploaded.
+
+    Parameters
+    ----------
+    values : pd.Series
+        Column to check.
+    rtol : float, optional
+        If given, accept any column whose values round-trip through float32
+        within this relative error instead.
+    """
+    if not pd.api.types.is_float_dtype(values):
+        return False
+    as_float64 = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    as_float32 = as_float64.astype(np.float32)
+    if rtol is not None:
+        return bool(
+            np.allclose(as_float32, as_float64, rtol=rtol, atol=0.0, equal_nan=True)
+        )
+    return bool(np.array_equal(_shortest_float32(as_float32), as_float64, equal_nan=True))
+
+
+def _shortest_float32(values: np.ndarray) -> np.ndarray:
+    """
+    Parse the shortest decimal form of float32 values as float64.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return pd.Series(values).astype(str).astype(np.float64).to_numpy()
+    text = pc.cast(pa.array(values), pa.string())
+    return pc.cast(text, pa.float64()).to_numpy(zero_copy_only=False)
+
+
+def compact_frame(
+    df: pd.DataFrame,
+    rtol: Optional[float] = None,
+    max_category_ratio: float = CATEGORY_MAX_RATIO,
+) -> pd.DataFrame:
+    """
+    Store a parsed dataset in compact dtypes.
+
+    Float columns (not only oxides) become float32 when their values are
+    unchanged in float32 (see :func:`is_float32_safe`), integer columns take the smallest integer
+    dtype holding their range, and string columns with few distinct values
+    (rock types, localities, ...) become ``category``. Categorical group
+    columns are also what the plot functions group fastest, on their codes.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Parsed dataset.
+    rtol : float, optional
+        Relative error accepted when downcasting a float column. By
+        default only columns whose values are unchanged are downcast.
+    max_category_ratio : float, optional
+        String columns with at most ``max_category_ratio * len(df)``
+        distinct values are converted to ``category``.
+
+    Returns
+    -------
+    pd.DataFrame
+        Compacted DataFrame. Unchanged columns are not copied.
+    """
+    dtypes: Dict[str, object] = {}
+    max_categories = max_category_ratio * len(df)
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        if values.dtype == np.float64:
+            if is_float32_safe(values, rtol):
+                dtypes[col] = np.float32
+        elif pd.api.types.is_integer_dtype(values) and isinstance(values.dtype, np.dtype):
+            smallest = pd.to_numeric(values, downcast="integer").dtype
+            if smallest != values.dtype:
+                dtypes[col] = smallest
+        elif pd.api.types.is_string_dtype(values) and len(df):
+            if values.nunique(dropna=True) <= max_categories:
+                dtypes[col] = "category"
+
+    return df.astype(dtypes) if dtypes else df
 
 
 def get_numeric_and_categorical_columns(
@@ -63,7 +589,8 @@ def get_numeric_and_categorical_columns(
         List of numeric column names and list of non-numeric column names.
     """
     numeric_cols: list[str] = df.select_dtypes(include="number").columns.tolist()
+    numeric_set = set(numeric_cols)
     non_numeric_cols: list[str] = [
-        col for col in df.columns if col not in numeric_cols
+        col for col in df.columns if col not in numeric_set
     ]
     return numeric_cols, non_numeric_cols
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Sequence
+
+from src.utils.cache_backend import CacheBackend, DiskBackend
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Default in-memory budget for parsed datasets (bytes)
+DEFAULT_MAX_BYTES: int = 512 * 1024 * 1024
+
+# Default in-memory budget for derived columns, across datasets (bytes)
+DEFAULT_MAX_DERIVED_BYTES: int = 128 * 1024 * 1024
+
+# Default in-memory budget for preview table indexes, across datasets (bytes)
+DEFAULT_MAX_INDEX_BYTES: int = 128 * 1024 * 1024
+
+# Tokens travel through the browser; only accept well-formed digests
+_TOKEN_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def dataset_token(contents: str | Sequence[str], names: Sequence[str] = ()) -> str:
+    """
+    Compute a content-hash token for dcc.Upload contents strings.
+
+    Identical uploads map to the same token, so re-uploading a file that is
+    still cached does not require parsing it again.
+
+    Parameters
+    ----------
+    contents : str or sequence of str
+        Base64-encoded contents string from dcc.Upload, or one string per
+        file of a batch upload.
+    names : sequence of str, optional
+        File names that are part of the dataset (e.g. as a source column).
+
+    Returns
+    -------
+    str
+        Hex digest identifying the uploaded content.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(contents, str):
+        digest.update(contents.encode("ascii"))
+    else:
+        for part in contents:
+            digest.update(part.encode("ascii"))
+            digest.update(b"\0")
+    for name in names:
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def is_valid_token(token: str) -> bool:
+    """
+    Check that a token received from the browser is a well-formed digest.
+    """
+    return _TOKEN_RE.match(token) is not None
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    """
+    Estimate the in-memory size of a DataFrame, including object payloads.
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def serialize_frame(df: pd.DataFrame) -> bytes:
+    """
+    Serialize a DataFrame for a cache backend (Parquet if pyarrow is
+    available, pickle otherwise).
+    """
+    buffer = io.BytesIO()
+    if _has_pyarrow():
+        df.to_parquet(buffer)
+    else:
+        pickle.dump(df, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    return buffer.getvalue()
+
+
+def deserialize_frame(data: bytes) -> pd.DataFrame:
+    """
+    Inverse of :func:`serialize_frame`.
+
+    Pickled values are only ever written by this module; backends must not
+    be shared with untrusted writers.
+    """
+    if data[:4] == b"PAR1":
+        import pandas as pd
+
+        return pd.read_parquet(io.BytesIO(data))
+    return pickle.loads(data)
+
+
+class DatasetCache:
+    """
+    In-process LRU registry of parsed datasets keyed by content token.
+
+    Entries are evicted least-recently-used first once the total memory
+    footprint exceeds ``max_bytes``. When ``spill_dir`` is set, evicted
+    frames are written to disk (Parquet if pyarrow is available, pickle
+    otherwise) and transparently reloaded on the next lookup.
+
+    When a shared ``backend`` is given, every registered dataset is also
+    written to it, so other worker processes can resolve the same token.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget for cached frames, in bytes.
+    spill_dir : str or os.PathLike, optional
+        Directory used to spill evicted frames. Disabled if None.
+    on_evict : callable, optional
+        Called with the token of a dataset that is no longer available,
+        i.e. discarded or evicted without being spilled. Used to invalidate
+        objects derived from the dataset.
+    backend : CacheBackend, optional
+        Store shared between worker processes. Disabled if None.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        spill_dir: Optional[str | os.PathLike[str]] = None,
+        on_evict: Optional[Callable[[str], None]] = None,
+        backend: Optional[CacheBackend] = None,
+    ) -> None:
+        self.max_bytes: int = max_bytes
+        self.on_evict = on_evict
+        self.backend = backend
+        # Spilled frames are only removed with their dataset, never culled
+        self._spill_store: Optional[DiskBackend] = (
+            DiskBackend(spill_dir, size_limit=None) if spill_dir else None
+        )
+
+        self._entries: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._nbytes: int = 0
+        self._lock = threading.RLock()
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.spills: int = 0
+
+    def __contains__(self, token: object) -> bool:
+        if not isinstance(token, str):
+            return False
+        with self._lock:
+            if token in self._entries:
+                return True
+        return (
+            self._spill_store is not None
+            and is_valid_token(token)
+            and self._spill_store.path(_backend_key(token)).exists()
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Total estimated size of the frames currently held in memory."""
+        return self._nbytes
+
+    def put(self, token: str, df: pd.DataFrame) -> None:
+        """
+        Register a parsed DataFrame under ``token``.
+
+        Parameters
+        ----------
+        token : str
+            Content token, typically from :func:`dataset_token`.
+        df : pd.DataFrame
+            Parsed dataset. It is stored by reference and must not be
+            mutated by callers afterwards.
+        """
+        self._put_memory(token, df)
+        if self.backend is not None and is_valid_token(token):
+            self.backend.set(_backend_key(token), serialize_frame(df))
+
+    def get(self, token: Optional[str]) -> Optional[pd.DataFrame]:
+        """
+        Resolve a token to its DataFrame.
+
+        Lookups fall back to the spill directory, then to the shared
+        backend, before reporting a miss.
+
+        Parameters
+        ----------
+        token : str or None
+            Content token stored in the browser data-store.
+
+        Returns
+        -------
+        pd.DataFrame or None
+            Cached frame, or None if the token is unknown or expired.
+        """
+        if token is None:
+            return None
+
+        with self._lock:
+            df = self._entries.get(token)
+            if df is not None:
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return df
+
+        for store in (self._spill_store, self.backend):
+            df = self._load(store, token)
+            if df is not None:
+                break
+
+        with self._lock:
+            if df is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self._put_memory(token, df)
+        return df
+
+    def discard(self, token: str) -> None:
+        """
+        Drop a dataset from memory, the spill directory and the shared backend.
+        """
+        with self._lock:
+            if token in self._entries:
+                del self._entries[token]
+                self._nbytes -= self._sizes.pop(token)
+        if is_valid_token(token):
+            for store in (self._spill_store, self.backend):
+                if store is not None:
+                    store.delete(_backend_key(token))
+        if self.on_evict is not None:
+            self.on_evict(token)
+
+    @property
+    def recoverable(self) -> bool:
+        """Whether datasets evicted from memory can be loaded again."""
+        return self._spill_store is not None or self.backend is not None
+
+    def release(self, token: str) -> None:
+        """
+        Evict a dataset from memory now, as if it were over budget.
+
+        It is spilled if a spill directory is set, and stays available
+        through the shared backend, if any. Without either, it could not be
+        loaded again, so it is kept in memory until the budget evicts it.
+        """
+        if not self.recoverable:
+            return
+        with self._lock:
+            df = self._entries.pop(token, None)
+            if df is None:
+                return
+            self._nbytes -= self._sizes.pop(token)
+            self.evictions += 1
+            self._spill(token, df)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return cache counters, useful for sizing ``max_bytes``.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": self._nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "spills": self.spills,
+            }
+
+    def _put_memory(self, token: str, df: pd.DataFrame) -> None:
+        size = frame_nbytes(df)
+        with self._lock:
+            if token in self._entries:
+                self._nbytes -= self._sizes[token]
+            self._entries[token] = df
+            self._entries.move_to_end(token)
+            self._sizes[token] = size
+            self._nbytes += size
+            self._evict_over_budget(keep=token)
+
+    def _evict_over_budget(self, keep: str) -> None:
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            token, df = next(iter(self._entries.items()))
+            if token == keep:
+                break
+            del self._entries[token]
+            self._nbytes -= self._sizes.pop(token)
+            self.evictions += 1
+            self._spill(token, df)
+
+    def _spill(self, token: str, df: pd.DataFrame) -> None:
+        if self._spill_store is None:
+            # Still reachable through the shared backend, if any
+            if self.on_evict is not None and self.backend is None:
+                self.on_evict(token)
+            return
+        key = _backend_key(token)
+        if not self._spill_store.path(key).exists():
+            self._spill_store.set(key, serialize_frame(df))
+            self.spills += 1
+
+    @staticmethod
+    def _load(store: Optional[CacheBackend], token: str) -> Optional[pd.DataFrame]:
+        if store is None or not is_valid_token(token):
+            return None
+        data = store.get(_backend_key(token))
+        return deserialize_frame(data) if data is not None else None
+
+
+def _backend_key(token: str) -> str:
+    return f"dataset-{token}"
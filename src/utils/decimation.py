@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+def decimate_xy(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    bins: int = 200,
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Select a density-preserving subset of points for plotting.
+
+    Points are binned on a regular ``bins`` x ``bins`` grid. Every occupied
+    cell keeps at least one point, so sparse outliers stay visible, and the
+    remaining budget is shared between cells in proportion to their counts,
+    so dense clusters keep their relative density. Selection within a cell
+    is random but reproducible for a given ``seed``.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        Point coordinates, same length.
+    max_points : int
+        Approximate number of points to keep.
+    bins : int, optional
+        Number of grid cells along each axis.
+    seed : int, optional
+        Seed of the random generator used to pick points within cells.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted integer positions of the kept points. Points with a
+        non-finite coordinate are never kept.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    finite = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    if finite.size <= max_points:
+        return finite
+
+    # Keep the grid coarse enough that "one point per cell" fits the budget
+    bins = max(1, min(bins, int(np.sqrt(max_points))))
+
+    cell = _grid_cells(x[finite], y[finite], bins)
+
+    rng = np.random.default_rng(seed)
+    shuffled = rng.permutation(finite.size)
+    order = shuffled[np.argsort(cell[shuffled], kind="stable")]
+    sorted_cells = cell[order]
+
+    counts = np.bincount(sorted_cells, minlength=bins * bins)
+    starts = np.cumsum(counts) - counts
+    rank = np.arange(order.size) - starts[sorted_cells]
+
+    quota = np.maximum(np.floor(counts * (max_points / finite.size)), 1)
+    keep = order[rank < quota[sorted_cells]]
+
+    return np.sort(finite[keep])
+
+
+def _grid_cells(x: np.ndarray, y: np.ndarray, bins: int) -> np.ndarray:
+    """
+    Map coordinates to flat cell indices of a ``bins`` x ``bins`` grid.
+    """
+    def _axis_bins(values: np.ndarray) -> np.ndarray:
+        lo, hi = values.min(), values.max()
+        span = hi - lo
+        if span == 0:
+            return np.zeros(values.size, dtype=np.intp)
+        scaled = (values - lo) * (bins / span)
+        return np.minimum(scaled.astype(np.intp), bins - 1)
+
+    return _axis_bins(x) * bins + _axis_bins(y)
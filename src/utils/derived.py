@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.dataset_cache import DEFAULT_MAX_DERIVED_BYTES
+
+
+# Molar masses of the major oxides (g/mol)
+OXIDE_MOLAR_MASS: Dict[str, float] = {
+    "SiO2": 60.084,
+    "TiO2": 79.866,
+    "Al2O3": 101.961,
+    "FeO": 71.844,
+    "Fe2O3": 159.688,
+    "MnO": 70.937,
+    "MgO": 40.304,
+    "CaO": 56.077,
+    "Na2O": 61.979,
+    "K2O": 94.196,
+    "P2O5": 141.943,
+}
+
+# Cation carried by each oxide and number of cations per formula unit
+OXIDE_CATIONS: Dict[str, Tuple[str, int]] = {
+    "SiO2": ("Si", 1),
+    "TiO2": ("Ti", 1),
+    "Al2O3": ("Al", 2),
+    "FeO": ("Fe2+", 1),
+    "Fe2O3": ("Fe3+", 2),
+    "MnO": ("Mn", 1),
+    "MgO": ("Mg", 1),
+    "CaO": ("Ca", 1),
+    "Na2O": ("Na", 2),
+    "K2O": ("K", 2),
+    "P2O5": ("P", 2),
+}
+
+# Fe2O3 -> FeO conversion factor (2 FeO / Fe2O3)
+FE2O3_TO_FEO: float = 2 * OXIDE_MOLAR_MASS["FeO"] / OXIDE_MOLAR_MASS["Fe2O3"]
+
+# Suffixes of the per-oxide derived column families
+ANHYDROUS_SUFFIX: str = "_anhydrous"
+MOLAR_SUFFIX: str = "_mol"
+CATION_SUFFIX: str = "_cat"
+
+DerivedValues = Dict[str, np.ndarray]
+OutputsFn = Callable[[frozenset[str]], list[str]]
+ComputeFn = Callable[[pd.DataFrame], DerivedValues]
+
+
+def _values(df: pd.DataFrame, col: str) -> np.ndarray:
+    return df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _oxide_matrix(df: pd.DataFrame) -> tuple[list[str], np.ndarray]:
+    """
+    Stack the major oxide columns present in ``df`` into an (n, k) array.
+    """
+    oxides = [ox for ox in OXIDE_MOLAR_MASS if ox in df.columns]
+    if not oxides:
+        return oxides, np.empty((len(df), 0))
+    return oxides, df[oxides].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _feo_total(df: pd.DataFrame) -> DerivedValues:
+    feo = _values(df, "FeO") if "FeO" in df.columns else None
+    fe2o3 = _values(df, "Fe2O3") * FE2O3_TO_FEO if "Fe2O3" in df.columns else None
+    if feo is None:
+        return {"FeO*": fe2o3}
+    if fe2o3 is None:
+        return {"FeO*": feo}
+    # Missing FeO or Fe2O3 counts as zero, unless both are missing
+    total = np.where(np.isnan(feo) & np.isnan(fe2o3), np.nan, np.nansum([feo, fe2o3], axis=0))
+    return {"FeO*": total}
+
+
+def _total_alkali(df: pd.DataFrame) -> DerivedValues:
+    return {"Na2O+K2O": _values(df, "Na2O") + _values(df, "K2O")}
+
+
+def _mg_number(df: pd.DataFrame) -> DerivedValues:
+    feo_total = _values(df, "FeO*") if "FeO*" in df.columns else _feo_total(df)["FeO*"]
+    mg = _values(df, "MgO") / OXIDE_MOLAR_MASS["MgO"]
+    fe = feo_total / OXIDE_MOLAR_MASS["FeO"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {"Mg#": 100.0 * mg / (mg + fe)}
+
+
+def _anhydrous(df: pd.DataFrame) -> DerivedValues:
+    oxides, wt = _oxide_matrix(df)
+    total = np.nansum(wt, axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normalized = wt * (100.0 / total)
+    return {f"{ox}{ANHYDROUS_SUFFIX}": normalized[:, i] for i, ox in enumerate(oxides)}
+
+
+def _molar(df: pd.DataFrame) -> DerivedValues:
+    oxides, wt = _oxide_matrix(df)
+    masses = np.array([OXIDE_MOLAR_MASS[ox] for ox in oxides])
+    moles = wt / masses
+    return {f"{ox}{MOLAR_SUFFIX}": moles[:, i] for i, ox in enumerate(oxides)}
+
+
+def _cations(df: pd.DataFrame) -> DerivedValues:
+    """Cation proportions, normalized to 100 cations."""
+    oxides, wt = _oxide_matrix(df)
+    factors = np.array([OXIDE_CATIONS[ox][1] / OXIDE_MOLAR_MASS[ox] for ox in oxides])
+    cations = wt * factors
+    total = np.nansum(cations, axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cations *= 100.0 / total
+    return {
+        f"{OXIDE_CATIONS[ox][0]}{CATION_SUFFIX}": cations[:, i]
+        for i, ox in enumerate(oxides)
+    }
+
+
+def _family_outputs(suffix: str, rename: Callable[[str], str] = lambda ox: ox) -> OutputsFn:
+    def outputs(columns: frozenset[str]) -> list[str]:
+        return [f"{rename(ox)}{suffix}" for ox in OXIDE_MOLAR_MASS if ox in columns]
+    return outputs
+
+
+# Each family is computed as a whole; outputs() lists the columns it can
+# produce given the dataset columns, compute() evaluates all of them at once.
+_FAMILIES: list[tuple[OutputsFn, ComputeFn]] = [
+    (lambda cols: ["FeO*"] if cols & {"FeO", "Fe2O3"} else [], _feo_total),
+    (lambda cols: ["Na2O+K2O"] if {"Na2O", "K2O"} <= cols else [], _total_alkali),
+    (
+        lambda cols: ["Mg#"] if "MgO" in cols and cols & {"FeO", "Fe2O3", "FeO*"} else [],
+        _mg_number,
+    ),
+    (_family_outputs(ANHYDROUS_SUFFIX), _anhydrous),
+    (_family_outputs(MOLAR_SUFFIX), _molar),
+    (_family_outputs(CATION_SUFFIX, lambda ox: OXIDE_CATIONS[ox][0]), _cations),
+]
+
+
+def available_derived_columns(columns: Iterable[str]) -> list[str]:
+    """
+    List the derived columns that can be computed from the given columns.
+
+    Columns already present are not listed again. This only inspects
+    column names and is cheap enough for the upload path.
+
+    Parameters
+    ----------
+    columns : iterable of str
+        Columns of the dataset.
+
+    Returns
+    -------
+    list[str]
+        Names of the computable derived columns.
+    """
+    present = frozenset(columns)
+    names: list[str] = []
+    for outputs, _ in _FAMILIES:
+        names.extend(name for name in outputs(present) if name not in present)
+    return names
+
+
+def compute_derived(df: pd.DataFrame, names: Iterable[str]) -> DerivedValues:
+    """
+    Evaluate derived columns over the whole frame.
+
+    Columns are computed family by family (e.g. every anhydrous-normalized
+    oxide at once), so the result may contain more columns than requested.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Source dataset.
+    names : iterable of str
+        Derived columns to compute.
+
+    Returns
+    -------
+    dict[str, np.ndarray]
+        Computed arrays, keyed by column name.
+
+    Raises
+    ------
+    KeyError
+        If a requested column cannot be derived from ``df``.
+    """
+    wanted = set(names)
+    present = frozenset(df.columns)
+    values: DerivedValues = {}
+    for outputs, compute in _FAMILIES:
+        if wanted.intersection(outputs(present)):
+            values.update(compute(df))
+
+    missing = wanted.difference(values)
+    if missing:
+        raise KeyError(f"Cannot derive column(s): {', '.join(sorted(missing))}")
+    return values
+
+
+class DerivedColumnCache:
+    """
+    Per-dataset cache of lazily computed derived columns.
+
+    Columns are evicted least recently used first once their arrays take
+    more than ``max_bytes``; the columns a call computes are kept even if
+    they exceed the budget on their own.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget of the cached columns, across all datasets, in bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_DERIVED_BYTES) -> None:
+        self.max_bytes: int = max_bytes
+        self._entries: "OrderedDict[tuple[str, str], np.ndarray]" = OrderedDict()
+        self._nbytes: int = 0
+        self._lock = threading.Lock()
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def with_columns(
+        self,
+        token: str,
+        df: pd.DataFrame,
+        names: Iterable[Optional[str]],
+    ) -> pd.DataFrame:
+        """
+        Return ``df`` extended with the requested derived columns.
+
+        Names that are None, already present in ``df`` or not derivable are
+        ignored, so callers can pass their raw axis selections.
+
+        Parameters
+        ----------
+        token : str
+            Token of the dataset ``df`` was resolved from.
+        df : pd.DataFrame
+            Source dataset.
+        names : iterable of str or None
+            Columns the caller needs.
+
+        Returns
+        -------
+        pd.DataFrame
+            ``df`` itself if nothing had to be added, otherwise a new frame
+            sharing the original columns.
+        """
+        derivable = set(available_derived_columns(df.columns))
+        wanted = [name for name in dict.fromkeys(names) if name in derivable]
+        if not wanted:
+            return df
+
+        columns: DerivedValues = {}
+        with self._lock:
+            for name in wanted:
+                cached = self._entries.get((token, name))
+                if cached is not None:
+                    self._entries.move_to_end((token, name))
+                    columns[name] = cached
+
+        missing = [name for name in wanted if name not in columns]
+        if missing:
+            computed = compute_derived(df, missing)
+            with self._lock:
+                for name, values in computed.items():
+                    old = self._entries.pop((token, name), None)
+                    if old is not None:
+                        self._nbytes -= old.nbytes
+                    self._entries[(token, name)] = values
+                    self._nbytes += values.nbytes
+                self._evict_over_budget(keep=len(computed))
+            columns.update((name, computed[name]) for name in missing)
+
+        return df.assign(**{name: columns[name] for name in wanted})
+
+    def invalidate(self, token: str) -> int:
+        """
+        Drop every cached column of the dataset identified by ``token``.
+
+        Returns
+        -------
+        int
+            Number of columns removed.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == token]
+            for key in stale:
+                self._nbytes -= self._entries.pop(key).nbytes
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number and size of the cached columns.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": self._nbytes,
+                "evictions": self.evictions,
+            }
+
+    def _evict_over_budget(self, keep: int) -> None:
+        # The last ``keep`` entries were just computed for the caller
+        while self._nbytes > self.max_bytes and len(self._entries) > keep:
+            _, values = self._entries.popitem(last=False)
+            self._nbytes -= values.nbytes
+            self.evictions += 1
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils.labels import COLUMN_LABEL_MAP
+
+
+# How values reported below a detection limit ("<0.01") are stored:
+# NaN, half the limit, or the limit itself
+DL_POLICIES: tuple[str, ...] = ("nan", "half", "dl")
+DEFAULT_DL_POLICY: str = "nan"
+
+# Text columns are coerced when at least this fraction of their non-empty
+# cells are numbers, qualified numbers or detection-limit markers
+MIN_NUMERIC_FRACTION: float = 0.9
+
+# Suffix of the boolean columns the app adds to mark coerced cells
+FLAG_SUFFIX: str = "_flag"
+
+# Columns known to hold analyses; other text columns are only coerced if
+# they contain at least one detection-limit entry ("<0.01", "bdl", ...)
+ANALYTE_COLUMNS: frozenset[str] = frozenset(COLUMN_LABEL_MAP)
+
+# Plain number, as written by spreadsheets and lab software
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_PLAIN_RE = rf"^\s*{_NUMBER}\s*$"
+
+# Optional qualifier, number and trailing annotation, e.g. "<0.01", "52.3*"
+_QUALIFIED_RE = (
+    rf"^\s*(?P<qualifier><=|>=|[<>≤≥])?\s*(?P<value>{_NUMBER})\s*"
+    r"(?P<note>[*†‡#a-zA-Z]{0,3})\s*$"
+)
+
+# Markers of values not detected, without a limit
+_MARKER_RE = (
+    r"\s*(?:b\.?\s*d\.?\s*l?\.?|n\.?\s*d\.?|<\s*(?:d\.?\s*l\.?|lod|loq)"
+    r"|not\s+detected|below\s+detection(?:\s+limit)?)\s*"
+)
+
+_BELOW = ("<", "<=", "≤")
+
+# Distinct entries parsed in the first batch of a text column
+_FIRST_BATCH: int = 1_000
+
+
+def coerce_numeric_columns(
+    df: pd.DataFrame,
+    policy: str = DEFAULT_DL_POLICY,
+    min_fraction: float = MIN_NUMERIC_FRACTION,
+    analytes: Iterable[str] = ANALYTE_COLUMNS,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Convert text columns holding annotated numbers to float columns.
+
+    Lab exports mix numbers with entries such as "<0.01", "bdl", "n.d." or
+    "52.3*", and a single such cell makes pandas parse the whole column as
+    text. Such columns are converted back: plain numbers are parsed in one
+    pass over the column, and only the distinct cells that are not plain
+    numbers go through the regular expressions. Every cell that was not a
+    plain number is flagged.
+
+    - "<0.01" (or "<=", "≤") is a value below the detection limit, stored
+      according to ``policy``;
+    - "bdl", "n.d.", "<LOD", ... are undetected values without a limit,
+      stored as NaN;
+    - ">1000" and annotated numbers ("52.3*", "7.1 a") keep their number;
+    - anything else is stored as NaN.
+
+    Only columns named in ``analytes``, or holding at least one
+    detection-limit entry, are converted. Columns whose non-plain cells
+    are mostly numbers followed by letters ("101A", "102B") are sample
+    ids and are never converted.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Parsed dataset.
+    policy : {"nan", "half", "dl"}, optional
+        Value stored for "<DL" entries: NaN, DL / 2 or DL.
+    min_fraction : float, optional
+        Fraction of the non-empty cells of a text column that must be
+        recognized for the column to be converted. Columns of names or
+        labels are left untouched.
+    analytes : iterable of str, optional
+        Names of the columns known to hold analyses.
+
+    Returns
+    -------
+    df : pd.DataFrame
+        Dataset with the converted columns as float64.
+    flags : pd.DataFrame
+        Boolean mask of the flagged cells, with one column per converted
+        column holding at least one flagged cell, on the index of ``df``.
+
+    Raises
+    ------
+    ValueError
+        If ``policy`` is not one of ``DL_POLICIES``.
+    """
+    if policy not in DL_POLICIES:
+        raise ValueError(
+            f"Unknown detection-limit policy {policy!r}; expected one of {DL_POLICIES}."
+        )
+
+    analytes = set(analytes)
+    coerced: dict = {}
+    flags: dict = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) or not (
+            pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+        ):
+            continue
+        result = coerce_numeric(values, policy, min_fraction, analyte=col in analytes)
+        if result is None:
+            continue
+        numbers, flagged = result
+        coerced[col] = numbers
+        if flagged.any():
+            flags[col] = flagged
+
+    if coerced:
+        df = df.copy(deep=False)
+        for col, numbers in coerced.items():
+            df[col] = numbers
+    return df, pd.DataFrame(flags, index=df.index)
+
+
+def add_flag_columns(df: pd.DataFrame, flags: pd.DataFrame) -> pd.DataFrame:
+    """
+    Join the flags of :func:`coerce_numeric_columns` as "<column>_flag" columns.
+
+    Flags whose column name is already taken, e.g. in a re-uploaded export
+    of the app, are left out, so that existing columns are never replaced.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset returned by :func:`coerce_numeric_columns`.
+    flags : pd.DataFrame
+        Flags returned with it.
+
+    Returns
+    -------
+    pd.DataFrame
+        Dataset with the flag columns whose names were free.
+    """
+    flags = flags.add_suffix(FLAG_SUFFIX)
+    free = [col for col in flags.columns if col not in df.columns]
+    return df.join(flags[free]) if free else df
+
+
+def coerce_numeric(
+    values: pd.Series,
+    policy: str = DEFAULT_DL_POLICY,
+    min_fraction: float = MIN_NUMERIC_FRACTION,
+    analyte: bool = False,
+) -> Optional[tuple[np.ndarray, np.ndarray]]:
+    """
+    Parse one text column (see :func:`coerce_numeric_columns`).
+
+    Parameters
+    ----------
+    analyte : bool, optional
+        Whether the column is known to hold analyses. Other columns need at
+        least one detection-limit entry to be converted.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray] or None
+        float64 values and the mask of flagged cells, or None if the column
+        is not converted: fewer than ``min_fraction`` of the non-empty cells
+        are recognized, none of them holds a number, the non-plain cells are
+        mostly letter-suffixed ids, or it is not an analyte column and has
+        no detection-limit entry.
+    """
+    present = values.notna().to_numpy()
+    n_present = int(np.count_nonzero(present))
+    if n_present == 0:
+        return None
+
+    values = _arrow_strings(values)
+    numbers = _plain_numbers(values)
+    flagged = present & np.isnan(numbers)
+    n_plain = n_present - int(np.count_nonzero(flagged))
+    if not flagged.any():
+        return numbers, flagged
+
+    # Markers repeat a lot: parse each distinct entry once
+    codes, uniques = pd.factorize(values.array[flagged])
+    counts = np.bincount(codes, minlength=len(uniques))
+
+    # Parse in growing batches and stop as soon as too many cells are
+    # unrecognized for the column to reach min_fraction: text columns are
+    # rejected after a small fraction of their distinct entries
+    allowed = n_present - min_fraction * n_present
+    unrecognized = 0
+    batches = []
+    start, size = 0, _FIRST_BATCH
+    while start < len(uniques):
+        batch = _parse_entries(uniques[start : start + size])
+        unrecognized += int(counts[start : start + size][~batch[1]].sum())
+        if unrecognized > allowed:
+            return None
+        batches.append(batch)
+        start, size = start + size, size * 2
+    parsed, recognized, below, lettered = (np.concatenate(arrays) for arrays in zip(*batches))
+
+    has_number = ~np.isnan(parsed)
+    if n_plain + int(counts[has_number].sum()) == 0:
+        return None
+    # "101A", "102B": sample ids, not annotated numbers
+    if 2 * int(counts[lettered].sum()) > int(counts.sum()):
+        return None
+    detection = below | (recognized & ~has_number)
+    if not analyte and not counts[detection].any():
+        return None
+
+    if policy == "nan":
+        parsed[below] = np.nan
+    elif policy == "half":
+        parsed[below] *= 0.5
+
+    numbers[flagged] = parsed[codes]
+    return numbers, flagged
+
+
+def _parse_entries(entries) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse distinct non-plain entries.
+
+    Returns
+    -------
+    tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+        Number of each entry (NaN if none), whether it is recognized (a
+        number or a marker), whether it is below a detection limit, and
+        whether its number is followed by letters.
+    """
+    text = pd.Series(entries, dtype=object).astype(str)
+    parts = text.str.extract(_QUALIFIED_RE)
+    parsed = pd.to_numeric(parts["value"], errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan, copy=True
+    )
+    marker = text.str.fullmatch(_MARKER_RE, case=False).to_numpy(dtype=bool)
+    below = parts["qualifier"].isin(_BELOW).to_numpy(dtype=bool)
+    lettered = parts["note"].str.contains("[a-zA-Z]", na=False).to_numpy(dtype=bool)
+    return parsed, ~np.isnan(parsed) | marker, below, lettered
+
+
+def _arrow_strings(values: pd.Series) -> pd.Series:
+    """
+    Return a column of strings as Arrow-backed strings, if pyarrow is available.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow":
+        return values
+    if pd.api.types.infer_dtype(values, skipna=True) != "string":
+        # Mixed cells (numbers and text, as read from spreadsheets)
+        return values
+    try:
+        return values.astype(pd.StringDtype("pyarrow", na_value=np.nan))
+    except ImportError:
+        return values
+
+
+def _plain_numbers(values: pd.Series) -> np.ndarray:
+    """
+    Parse the cells of a column that are plain numbers; others become NaN.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, pd.StringDtype) and dtype.storage == "pyarrow":
+        # Arrow strings: regex match and cast run in C++ over the whole column
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        array = pa.array(values.array)
+        plain = pc.if_else(pc.match_substring_regex(array, _PLAIN_RE), array, None)
+        try:
+            parsed = pc.cast(pc.utf8_trim_whitespace(plain), pa.float64())
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+        else:
+            return parsed.to_numpy(zero_copy_only=False).astype(np.float64, copy=True)
+
+    return pd.to_numeric(values, errors="coerce").to_numpy(
+        dtype=np.float64, na_value=np.nan, copy=True
+    )
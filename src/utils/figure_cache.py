@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from src.utils.cache_backend import CacheBackend
+from src.utils.dataset_cache import is_valid_token
+
+if TYPE_CHECKING:
+    from plotly.graph_objs import Figure
+
+
+# (dataset token, diagram type, x column, y column, group column, style)
+FigureKey = Tuple[str, str, Optional[str], Optional[str], Optional[str], str]
+
+DEFAULT_MAX_FIGURES: int = 32
+
+
+def figure_key(
+    token: str,
+    diagram_type: str,
+    x_col: Optional[str],
+    y_col: Optional[str],
+    group_col: Optional[str],
+    style: str = "publication",
+) -> FigureKey:
+    """
+    Build the cache key identifying a rendered figure.
+
+    Parameters
+    ----------
+    token : str
+        Token of the dataset the figure is built from.
+    diagram_type : str
+        Diagram type ("custom", "harker", ...).
+    x_col, y_col, group_col : str or None
+        Selected axis and grouping columns.
+    style : str, optional
+        Identifier of the styling applied to the figure.
+
+    Returns
+    -------
+    tuple
+        Hashable figure key.
+    """
+    return (token, diagram_type, x_col, y_col, group_col, style)
+
+
+class FigureCache:
+    """
+    LRU cache of built Plotly figures with per-dataset invalidation.
+
+    Cached figures are shared between requests and must not be mutated by
+    callers. When a shared ``backend`` is given, figures are also stored
+    there as Plotly JSON, so a figure built by one worker process is a hit
+    in the others.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Maximum number of figures kept in memory.
+    backend : CacheBackend, optional
+        Store shared between worker processes. Disabled if None.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_FIGURES,
+        backend: Optional[CacheBackend] = None,
+    ) -> None:
+        self.max_entries: int = max_entries
+        self.backend = backend
+        self._entries: "OrderedDict[FigureKey, Figure]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits: int = 0
+        self.shared_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: FigureKey) -> Optional[Figure]:
+        """
+        Return the cached figure for ``key``, or None on a miss.
+        """
+        with self._lock:
+            fig = self._entries.get(key)
+            if fig is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return fig
+
+        data = self._backend_get(key)
+        if data is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        import plotly.io as pio
+
+        fig = pio.from_json(data.decode("utf-8"), skip_invalid=True)
+        self._put_memory(key, fig)
+        with self._lock:
+            self.hits += 1
+            self.shared_hits += 1
+        return fig
+
+    def put(self, key: FigureKey, fig: Figure) -> None:
+        """
+        Store a figure, evicting the least recently used ones if needed.
+        """
+        self._put_memory(key, fig)
+        backend_key = self._backend_key(key)
+        if backend_key is not None:
+            import plotly.io as pio
+
+            self.backend.set(backend_key, pio.to_json(fig, validate=False).encode("utf-8"))
+
+    def invalidate(self, token: str) -> int:
+        """
+        Drop every figure built from the dataset identified by ``token``.
+
+        Returns
+        -------
+        int
+            Number of figures removed.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == token]
+            for key in stale:
+                del self._entries[key]
+        if self.backend is not None and is_valid_token(token):
+            self.backend.delete_prefix(f"figure-{token}-")
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return hit/miss counters, useful for sizing ``max_entries``.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _put_memory(self, key: FigureKey, fig: Figure) -> None:
+        with self._lock:
+            self._entries[key] = fig
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _backend_key(self, key: FigureKey) -> Optional[str]:
+        if self.backend is None or not is_valid_token(key[0]):
+            return None
+        digest = hashlib.blake2b(repr(key[1:]).encode("utf-8"), digest_size=16).hexdigest()
+        return f"figure-{key[0]}-{digest}"
+
+    def _backend_get(self, key: FigureKey) -> Optional[bytes]:
+        backend_key = self._backend_key(key)
+        if backend_key is None:
+            return None
+        return self.backend.get(backend_key)
@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, Optional
+
+from flask import Flask, Response, g, request
+
+
+# Dash endpoint through which every server-side callback runs
+CALLBACK_ENDPOINT_SUFFIX: str = "_dash-update-component"
+
+# Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Trace:
+    """
+    Stage timings and notes of the request being served.
+    """
+
+    def __init__(self) -> None:
+        self.stages: list[tuple[str, float]] = []
+        self.notes: list[tuple[str, str]] = []
+
+
+_current_trace: contextvars.ContextVar[Optional[_Trace]] = contextvars.ContextVar(
+    "petrolite_trace", default=None
+)
+
+
+class Metrics:
+    """
+    Per-process registry of callback timings, payload sizes and cache stats.
+
+    Once installed on a Flask server with :meth:`install`, every Dash
+    callback request is timed and measured, its stages (see :func:`stage`)
+    are reported in a ``Server-Timing`` response header, and the totals
+    are exposed at ``/metrics`` in Prometheus text format.
+
+    Counters are kept per worker process; with several workers, each one
+    exposes its own totals. Callbacks running as background jobs are not
+    measured, since they do not run within a request.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, int] = defaultdict(int)
+        self._seconds: Dict[str, float] = defaultdict(float)
+        self._request_bytes: Dict[str, int] = defaultdict(int)
+        self._response_bytes: Dict[str, int] = defaultdict(int)
+        self._stage_seconds: Dict[tuple[str, str], float] = defaultdict(float)
+        self._gauges: Dict[str, Callable[[], Dict[str, int]]] = {}
+
+    def add_gauges(self, name: str, source: Callable[[], Dict[str, int]]) -> None:
+        """
+        Export the values returned by ``source`` (e.g. a cache ``stats``
+        method) as gauges named ``petrolite_<name>_<key>``.
+        """
+        self._gauges[name] = source
+
+    def record(
+        self,
+        callback: str,
+        seconds: float,
+        request_bytes: int,
+        response_bytes: int,
+        stages: list[tuple[str, float]],
+    ) -> None:
+        """
+        Add one callback request to the totals.
+        """
+        with self._lock:
+            self._calls[callback] += 1
+            self._seconds[callback] += seconds
+            self._request_bytes[callback] += request_bytes
+            self._response_bytes[callback] += response_bytes
+            for name, duration in stages:
+                self._stage_seconds[callback, name] += duration
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """
+        Return the totals per callback and the current gauge values.
+        """
+        with self._lock:
+            callbacks = {
+                name: {
+                    "calls": calls,
+                    "seconds": self._seconds[name],
+                    "request_bytes": self._request_bytes[name],
+                    "response_bytes": self._response_bytes[name],
+                    "stages": {
+                        stage: self._stage_seconds[cb, stage]
+                        for cb, stage in self._stage_seconds
+                        if cb == name
+                    },
+                }
+                for name, calls in self._calls.items()
+            }
+        gauges = {name: dict(source()) for name, source in self._gauges.items()}
+        return {"callbacks": callbacks, "gauges": gauges}
+
+    def render_prometheus(self) -> str:
+        """
+        Render the metrics in Prometheus text exposition format.
+        """
+        snap = self.snapshot()
+        callbacks = snap["callbacks"]
+        lines: list[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        name = "petrolite_callback_duration_seconds"
+        family(name, "summary", "Server time per callback.")
+        for cb, data in callbacks.items():
+            label = f'callback="{_escape(cb)}"'
+            lines.append(f"{name}_sum{{{label}}} {data['seconds']:.6f}")
+            lines.append(f"{name}_count{{{label}}} {data['calls']}")
+
+        name = "petrolite_callback_stage_seconds_total"
+        family(name, "counter", "Time spent per callback stage.")
+        for cb, data in callbacks.items():
+            for stage_name, seconds in data["stages"].items():
+                labels = f'callback="{_escape(cb)}",stage="{_escape(stage_name)}"'
+                lines.append(f"{name}{{{labels}}} {seconds:.6f}")
+
+        for key, help_text in (
+            ("request_bytes", "Callback request payload bytes."),
+            ("response_bytes", "Callback response payload bytes."),
+        ):
+            name = f"petrolite_callback_{key}_total"
+            family(name, "counter", help_text)
+            for cb, data in callbacks.items():
+                lines.append(f'{name}{{callback="{_escape(cb)}"}} {data[key]}')
+
+        for source, values in snap["gauges"].items():
+            for key, value in values.items():
+                name = f"petrolite_{source}_{key}"
+                family(name, "gauge", f"{source} {key}.")
+                lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def install(
+        self,
+        server: Flask,
+        callback_map: Optional[Dict[str, dict]] = None,
+        endpoint: str = "/metrics",
+    ) -> None:
+        """
+        Measure Dash callback requests on ``server`` and serve the metrics.
+
+        Parameters
+        ----------
+        server : Flask
+            Flask server of the Dash app.
+        callback_map : dict, optional
+            ``app.callback_map`` of the Dash app, used to name callbacks
+            after their function rather than their outputs.
+        endpoint : str, optional
+            Path of the Prometheus endpoint.
+        """
+        callback_map = callback_map if callback_map is not None else {}
+
+        @server.before_request
+        def _start_trace() -> None:
+            if request.path.endswith(CALLBACK_ENDPOINT_SUFFIX):
+                g.petrolite_start = time.perf_counter()
+                g.petrolite_token = _current_trace.set(_Trace())
+
+        @server.after_request
+        def _finish_trace(response: Response) -> Response:
+            start = g.pop("petrolite_start", None)
+            if start is None:
+                return response
+
+            trace = _current_trace.get()
+            _current_trace.reset(g.pop("petrolite_token"))
+            elapsed = time.perf_counter() - start
+
+            stages = trace.stages if trace is not None else []
+            self.record(
+                callback=_callback_name(callback_map),
+                seconds=elapsed,
+                request_bytes=request.content_length or 0,
+                response_bytes=0 if response.direct_passthrough else len(response.get_data()),
+                stages=stages,
+            )
+
+            entries = [f"total;dur={elapsed * 1e3:.1f}"]
+            entries += [f"{name};dur={seconds * 1e3:.1f}" for name, seconds in stages]
+            if trace is not None:
+                entries += [f'{name};desc="{desc}"' for name, desc in trace.notes]
+            response.headers["Server-Timing"] = ", ".join(entries)
+            return response
+
+        def metrics_view() -> Response:
+            return Response(self.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+        server.add_url_rule(endpoint, "petrolite_metrics", metrics_view)
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a stage of the callback being served.
+
+    Stages are reported in the ``Server-Timing`` header and the metrics.
+    Outside an instrumented request, this does nothing.
+
+    Parameters
+    ----------
+    name : str
+        Stage name, e.g. "parse" or "build". Must be a valid header token.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.stages.append((name, time.perf_counter() - start))
+
+
+def note(name: str, description: str) -> None:
+    """
+    Attach a descriptive entry (e.g. a cache hit) to the Server-Timing header.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.notes.append((name, description))
+
+
+def _callback_name(callback_map: Dict[str, dict]) -> str:
+    """
+    Name the callback served by the current request after its function.
+    """
+    body = request.get_json(silent=True) or {}
+    output = body.get("output", "") if isinstance(body, dict) else ""
+    func = callback_map.get(output, {}).get("callback")
+    return getattr(func, "__name__", None) or output or "unknown"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
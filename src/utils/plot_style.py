@@ -2,9 +2,18 @@ from __future__ import annotations
 
 from typing import Optional
 
+from plotly.colors import qualitative
 from plotly.graph_objs import Figure
 
 
+# Colors assigned to groups; matches the "simple_white" template colorway
+GROUP_COLORWAY: list[str] = list(qualitative.D3)
+
+# Marker style of publication figures; the app's marker sliders start from it
+MARKER_SIZE: int = 7
+MARKER_OPACITY: float = 0.85
+
+
 def apply_publication_style(
     fig: Figure,
     x_label: Optional[str] = None,
@@ -89,8 +98,8 @@ def apply_publication_style(
 
     fig.update_traces(
         marker=dict(
-            size=7,
-            opacity=0.85,
+            size=MARKER_SIZE,
+            opacity=MARKER_OPACITY,
             line=dict(width=0.6, color="black"),
         )
     )
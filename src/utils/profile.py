@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+
+# Group columns with more distinct values than this are flagged in the UI
+# and plotted as a single trace colored by their largest groups
+HIGH_CARDINALITY: int = 50
+
+# Fraction of the data span added on each side of profile-based axis ranges
+AXIS_PADDING: float = 0.05
+
+# Maximum number of dataset profiles kept server-side
+DEFAULT_MAX_PROFILES: int = 64
+
+
+def profile_dataset(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compute per-column metadata and statistics of a dataset.
+
+    Statistics are computed with whole-frame reductions (one pass over the
+    numeric block for min/max, one for null counts), and the result is
+    JSON-serializable so that it can be sent to the browser.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset to profile.
+
+    Returns
+    -------
+    dict
+        ``n_rows``, ``numeric`` and ``categorical`` column lists, and
+        per-column ``columns`` entries with ``nulls``, and either ``min``
+        and ``max`` (numeric) or ``cardinality`` and ``high_cardinality``
+        (categorical).
+    """
+    numeric = df.select_dtypes(include="number")
+    numeric_cols = set(numeric.columns)
+    nulls = df.isna().sum()
+    mins = numeric.min()
+    maxs = numeric.max()
+
+    columns: Dict[str, Dict[str, Any]] = {}
+    categorical: list[str] = []
+    for col in df.columns:
+        entry: Dict[str, Any] = {"nulls": int(nulls[col])}
+        if col in numeric_cols:
+            entry["min"] = _finite_or_none(mins[col])
+            entry["max"] = _finite_or_none(maxs[col])
+        else:
+            cardinality = int(df[col].nunique(dropna=True))
+            entry["cardinality"] = cardinality
+            entry["high_cardinality"] = cardinality > HIGH_CARDINALITY
+            categorical.append(col)
+        columns[str(col)] = entry
+
+    return {
+        "n_rows": len(df),
+        "numeric": [str(col) for col in numeric.columns],
+        "categorical": [str(col) for col in categorical],
+        "columns": columns,
+    }
+
+
+def axis_range(
+    profile: Optional[Dict[str, Any]],
+    col: Optional[str],
+    padding: float = AXIS_PADDING,
+) -> Optional[list[float]]:
+    """
+    Return a padded axis range covering every value of a numeric column.
+
+    Parameters
+    ----------
+    profile : dict or None
+        Profile returned by :func:`profile_dataset`.
+    col : str or None
+        Column plotted on the axis.
+    padding : float, optional
+        Fraction of the data span added on each side.
+
+    Returns
+    -------
+    list[float] or None
+        [low, high], or None if the column is not profiled or has no finite
+        values (the axis is then autoranged).
+    """
+    if not profile or col is None:
+        return None
+    entry = profile.get("columns", {}).get(col)
+    if entry is None or entry.get("min") is None or entry.get("max") is None:
+        return None
+
+    low, high = entry["min"], entry["max"]
+    span = high - low if high > low else max(abs(high), 1.0)
+    return [low - padding * span, high + padding * span]
+
+
+class ProfileCache:
+    """
+    LRU cache of dataset profiles, by dataset token.
+
+    Profiles are computed once per dataset and kept server-side, so that
+    re-uploading a cached dataset does not profile it again and figures do
+    not depend on a profile sent back by the browser.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Maximum number of profiles kept.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_PROFILES) -> None:
+        self.max_entries: int = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str, df: Optional[pd.DataFrame] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the profile of the dataset ``token``.
+
+        If it is not cached and ``df`` is given, ``df`` is profiled and the
+        profile is stored; otherwise None is returned.
+        """
+        with self._lock:
+            profile = self._entries.get(token)
+            if profile is not None:
+                self._entries.move_to_end(token)
+                return profile
+        if df is None:
+            return None
+        profile = profile_dataset(df)
+        with self._lock:
+            self._entries[token] = profile
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return profile
+
+    def invalidate(self, token: str) -> int:
+        """
+        Drop the profile of the dataset ``token``.
+
+        Returns
+        -------
+        int
+            Number of profiles removed (0 or 1).
+        """
+        with self._lock:
+            return int(self._entries.pop(token, None) is not None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of profiles kept.
+        """
+        with self._lock:
+            return {"entries": len(self._entries)}
+
+
+def _finite_or_none(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import base64
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# Maximum number of figures whose trace rows are kept
+DEFAULT_MAX_TRACE_ROWS: int = 32
+
+# Dataset row positions of the points of each trace of a figure; None for
+# traces without data points (legend entries)
+TraceRows = Sequence[Optional[np.ndarray]]
+
+# Resolves the (x, y) columns plotted on a pair of axes to value arrays
+AxisValues = Callable[[str, str], Tuple[np.ndarray, np.ndarray]]
+
+
+def box_mask(x: np.ndarray, y: np.ndarray, x_range: Sequence, y_range: Sequence) -> np.ndarray:
+    """
+    Return the points inside a box selection (bounds in either order).
+    """
+    x0, x1 = sorted(float(v) for v in x_range)
+    y0, y1 = sorted(float(v) for v in y_range)
+    return (x >= x0) & (x <= x1) & (y >= y0) & (y <= y1)
+
+
+def lasso_mask(x: np.ndarray, y: np.ndarray, xs: Sequence, ys: Sequence) -> np.ndarray:
+    """
+    Return the points inside a lasso polygon (even-odd rule).
+
+    Points outside the polygon's bounding box are discarded first. The
+    others are sorted by Y once, so that each edge only tests the points
+    within its own Y span (found by binary search) instead of every point.
+
+    Parameters
+    ----------
+    x, y : np.ndarray
+        Point coordinates; NaN points are never selected.
+    xs, ys : sequence of float
+        Polygon vertices, as sent by Plotly in ``lassoPoints``.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean mask over the points.
+    """
+    px = np.asarray(xs, dtype=np.float64)
+    py = np.asarray(ys, dtype=np.float64)
+    mask = np.zeros(len(x), dtype=bool)
+    if len(px) < 3:
+        return mask
+
+    candidates = np.flatnonzero(
+        (x >= px.min()) & (x <= px.max()) & (y >= py.min()) & (y <= py.max())
+    )
+    order = np.argsort(y[candidates], kind="stable")
+    cx = np.asarray(x[candidates][order], dtype=np.float64)
+    cy = np.asarray(y[candidates][order], dtype=np.float64)
+
+    inside = np.zeros(len(order), dtype=bool)
+    for xa, ya, xb, yb in zip(px, py, np.roll(px, -1), np.roll(py, -1)):
+        if ya == yb:
+            continue
+        # A ray to -inf from (x, y) crosses the edge iff min(ya, yb) <= y < max(ya, yb)
+        start, stop = np.searchsorted(cy, sorted((ya, yb)), side="left")
+        band = slice(start, stop)
+        x_cross = xa + (cy[band] - ya) * (xb - xa) / (yb - ya)
+        inside[band] ^= cx[band] < x_cross
+
+    mask[candidates[order]] = inside
+    return mask
+
+
+def selection_mask(
+    geometry: Mapping[str, Any],
+    axes: Mapping[Tuple[str, str], Tuple[str, str]],
+    axis_values: AxisValues,
+    n_rows: int,
+) -> np.ndarray:
+    """
+    Resolve a box or lasso selection of a figure to a row mask of the dataset.
+
+    The selection is tested against every row of the dataset, so rows that
+    were decimated out of the figure are selected too.
+
+    Parameters
+    ----------
+    geometry : mapping
+        ``range`` (box) or ``lassoPoints`` (lasso) of a Plotly selection
+        event, keyed by axis id, e.g. ``{"range": {"x2": [...], "y2": [...]}}``.
+    axes : mapping
+        Columns plotted on each (x axis id, y axis id) pair of the figure,
+        from :func:`src.plots.figures.figure_axes`.
+    axis_values : callable
+        Returns the value arrays of an (x column, y column) pair.
+    n_rows : int
+        Number of rows of the dataset.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean mask over the dataset rows; empty selections select nothing.
+    """
+    mask = np.zeros(n_rows, dtype=bool)
+    for kind in ("range", "lassoPoints"):
+        bounds = geometry.get(kind) or {}
+        for (x_axis, y_axis), (x_col, y_col) in axes.items():
+            if x_axis not in bounds or y_axis not in bounds:
+                continue
+            x, y = axis_values(x_col, y_col)
+            test = box_mask if kind == "range" else lasso_mask
+            mask |= test(x, y, bounds[x_axis], bounds[y_axis])
+    return mask
+
+
+def pack_mask(mask: np.ndarray) -> str:
+    """
+    Encode a boolean mask as a base64 bitset (bit ``i % 8`` of byte ``i // 8``).
+    """
+    return base64.b64encode(np.packbits(mask, bitorder="little").tobytes()).decode("ascii")
+
+
+def unpack_mask(data: str, n: int) -> np.ndarray:
+    """
+    Decode a bitset written by :func:`pack_mask` into a mask of length ``n``.
+    """
+    bits = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+    return np.unpackbits(bits, count=n, bitorder="little").astype(bool)
+
+
+def trace_highlights(mask: np.ndarray, trace_rows: TraceRows) -> list[Optional[str]]:
+    """
+    Pack the selected points of each trace, to set its ``selectedpoints``.
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        Selected dataset rows.
+    trace_rows : sequence of np.ndarray or None
+        Row positions of the points of each trace.
+
+    Returns
+    -------
+    list[str or None]
+        Bitset over the points of each trace (see :func:`pack_mask`), or
+        None for traces without data points.
+    """
+    return [None if rows is None else pack_mask(mask[rows]) for rows in trace_rows]
+
+
+class TraceRowsCache:
+    """
+    LRU cache of the trace row positions of built figures, by figure key.
+
+    Row positions are recorded while figures are built and only kept
+    server-side; the browser receives per-trace bitsets instead.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        Maximum number of figures whose rows are kept.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_TRACE_ROWS) -> None:
+        self.max_entries: int = max_entries
+        self._entries: "OrderedDict[Hashable, TraceRows]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[TraceRows]:
+        """
+        Return the trace rows of the figure ``key``, or None.
+        """
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+            return rows
+
+    def put(self, key: Hashable, rows: TraceRows) -> None:
+        """
+        Store the trace rows of the figure ``key``.
+        """
+        with self._lock:
+            self._entries[key] = rows
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str) -> int:
+        """
+        Drop the rows of every figure built from the dataset ``token``.
+
+        Returns
+        -------
+        int
+            Number of figures removed.
+        """
+        with self._lock:
+            stale = [key for key in self._entries if key[0] == token]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number of figures whose rows are kept.
+        """
+        with self._lock:
+            return {"entries": len(self._entries)}
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+# Default memory budget shared by all sessions (bytes)
+DEFAULT_SESSION_BYTES: int = 1024 * 1024 * 1024
+
+# Fraction of the budget a single session may hold before evicting its own entries
+DEFAULT_SESSION_SHARE: float = 0.5
+
+# Sessions idle for longer than this are dropped (seconds)
+DEFAULT_SESSION_TTL: float = 30 * 60
+
+# Trace properties holding one value per point, counted in figure sizes
+_TRACE_ARRAYS: tuple[str, ...] = ("x", "y", "customdata", "text", "hovertext")
+
+
+def new_session_id() -> str:
+    """
+    Return a random session id, sent to the browser with each page load.
+    """
+    return uuid.uuid4().hex
+
+
+def estimate_nbytes(value: Any) -> int:
+    """
+    Estimate the memory held by a session entry.
+
+    DataFrames and NumPy arrays report their own size, figures the size of
+    their trace arrays, and tuples, lists and dicts the sum of their items.
+    Other objects are counted with ``sys.getsizeof``.
+
+    Parameters
+    ----------
+    value : object
+        Value stored in a session.
+
+    Returns
+    -------
+    int
+        Estimated size, in bytes.
+    """
+    if hasattr(value, "memory_usage"):
+        # pandas DataFrame or Series
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    if hasattr(value, "nbytes") and hasattr(value, "dtype"):
+        # NumPy array
+        return int(value.nbytes)
+    if hasattr(value, "data") and hasattr(value, "layout"):
+        # plotly Figure; trace properties are read in place, not copied
+        total = 0
+        for trace in value.data:
+            arrays = [getattr(trace, name, None) for name in _TRACE_ARRAYS]
+            arrays.append(getattr(getattr(trace, "marker", None), "color", None))
+            total += sum(estimate_nbytes(array) for array in arrays if array is not None)
+        return total
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class _Session:
+    """
+    Entries of one session, least recently used first.
+    """
+
+    __slots__ = ("entries", "sizes", "nbytes", "last_seen")
+
+    def __init__(self, now: float) -> None:
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.sizes: Dict[Hashable, int] = {}
+        self.nbytes: int = 0
+        self.last_seen: float = now
+
+
+# (session id, key, value) of an entry leaving the store
+Released = tuple[str, Hashable, Any]
+
+
+class SessionStore:
+    """
+    Per-session server-side state with a shared memory budget.
+
+    Each browser session (see :func:`new_session_id`) holds its own
+    entries, e.g. the dataset it works on with its profile and derived
+    columns, its recent figures and its graph selection. Values are stored by reference: a DataFrame shared with
+    :class:`src.utils.dataset_cache.DatasetCache` is not copied, but stays
+    alive as long as a session holds it.
+
+    Memory is bounded in three ways:
+
+    - a session holding more than ``max_session_bytes`` evicts its own
+      least recently used entries, so one heavy user cannot push everyone
+      else out;
+    - above ``max_bytes`` in total, entries of the least recently active
+      sessions are evicted first;
+    - sessions idle for longer than ``ttl`` are dropped. Expiry is checked
+      on every access, or explicitly with :meth:`expire`.
+
+    The store is per process; with several worker processes, each one
+    accounts for the sessions it serves.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget shared by all sessions, in bytes.
+    max_session_bytes : int, optional
+        Memory budget of a single session. Defaults to
+        ``DEFAULT_SESSION_SHARE`` of ``max_bytes``.
+    ttl : float, optional
+        Idle time after which a session is dropped, in seconds.
+    on_release : callable, optional
+        Called with ``(session_id, key, value)`` for every entry leaving the
+        store (evicted, expired, replaced or dropped), outside the lock.
+        Used to release shared resources nobody holds anymore.
+    clock : callable, optional
+        Monotonic time source, in seconds.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_SESSION_BYTES,
+        max_session_bytes: Optional[int] = None,
+        ttl: float = DEFAULT_SESSION_TTL,
+        on_release: Optional[Callable[[str, Hashable, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes: int = max_bytes
+        self.max_session_bytes: int = (
+            max_session_bytes
+            if max_session_bytes is not None
+            else int(max_bytes * DEFAULT_SESSION_SHARE)
+        )
+        self.ttl: float = ttl
+        self.on_release = on_release
+        self._clock = clock
+
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._nbytes: int = 0
+        self._lock = threading.RLock()
+
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    def __contains__(self, session_id: object) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    @property
+    def nbytes(self) -> int:
+        """Total estimated size of the entries held by all sessions."""
+        return self._nbytes
+
+    def put(
+        self,
+        session_id: str,
+        key: Hashable,
+        value: Any,
+        nbytes: Optional[int] = None,
+    ) -> None:
+        """
+        Store ``value`` under ``key`` in a session, evicting entries if needed.
+
+        Parameters
+        ----------
+        session_id : str
+            Session owning the entry.
+        key : hashable
+            Entry name, e.g. "dataset" or ("figure", figure_key).
+        value : object
+            Stored by reference.
+        nbytes : int, optional
+            Size of the entry; estimated with :func:`estimate_nbytes` if None.
+        """
+        size = estimate_nbytes(value) if nbytes is None else nbytes
+        with self._lock:
+            now = self._clock()
+            released = self._expire_idle(now)
+            session = self._touch(session_id, now)
+
+            if key in session.entries:
+                previous = session.entries[key]
+                self._remove(session, key)
+                if previous is not value:
+                    released.append((session_id, key, previous))
+
+            session.entries[key] = value
+            session.sizes[key] = size
+            session.nbytes += size
+            self._nbytes += size
+
+            released += self._evict_session(session_id, session, keep=key)
+            released += self._evict_over_budget(keep=(session_id, key))
+        self._notify(released)
+
+    def get(self, session_id: Optional[str], key: Hashable, default: Any = None) -> Any:
+        """
+        Return an entry of a session and mark the session as active.
+        """
+        if session_id is None:
+            return default
+        with self._lock:
+            now = self._clock()
+            released = self._expire_idle(now)
+            session = self._sessions.get(session_id)
+            if session is None or key not in session.entries:
+                value = default
+            else:
+                session = self._touch(session_id, now)
+                session.entries.move_to_end(key)
+                value = session.entries[key]
+        self._notify(released)
+        return value
+
+    def values(self, key: Hashable) -> list[Any]:
+        """
+        Return the entries stored under ``key`` by every session.
+        """
+        with self._lock:
+            return [
+                session.entries[key]
+                for session in self._sessions.values()
+                if key in session.entries
+            ]
+
+    def discard(self, session_id: str, key: Hashable) -> None:
+        """
+        Remove one entry of a session, if present.
+        """
+        released: list[Released] = []
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None and key in session.entries:
+                released.append((session_id, key, self._remove(session, key)))
+        self._notify(released)
+
+    def drop(self, session_id: str) -> None:
+        """
+        Remove a session and all its entries.
+        """
+        with self._lock:
+            released = self._drop(session_id)
+        self._notify(released)
+
+    def expire(self) -> int:
+        """
+        Drop every session idle for longer than ``ttl``.
+
+        Returns
+        -------
+        int
+            Number of sessions dropped.
+        """
+        with self._lock:
+            before = self.expirations
+            released = self._expire_idle(self._clock())
+            expired = self.expirations - before
+        self._notify(released)
+        return expired
+
+    def session_bytes(self, session_id: str) -> int:
+        """
+        Return the estimated size of the entries held by a session.
+        """
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session.nbytes if session is not None else 0
+
+    def usage(self) -> Dict[str, int]:
+        """
+        Return the estimated size held by each session, most active last.
+        """
+        with self._lock:
+            return {session_id: s.nbytes for session_id, s in self._sessions.items()}
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return store counters, useful for sizing the budgets.
+        """
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "entries": sum(len(s.entries) for s in self._sessions.values()),
+                "nbytes": self._nbytes,
+                "max_session_nbytes": max(
+                    (s.nbytes for s in self._sessions.values()), default=0
+                ),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def _touch(self, session_id: str, now: float) -> _Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(now)
+        session.last_seen = now
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _remove(self, session: _Session, key: Hashable) -> Any:
+        value = session.entries.pop(key)
+        size = session.sizes.pop(key)
+        session.nbytes -= size
+        self._nbytes -= size
+        return value
+
+    def _drop(self, session_id: str) -> list[Released]:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return []
+        self._nbytes -= session.nbytes
+        return [(session_id, key, value) for key, value in session.entries.items()]
+
+    def _expire_idle(self, now: float) -> list[Released]:
+        released: list[Released] = []
+        # Sessions are ordered by last activity, so idle ones come first
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_seen <= self.ttl:
+                break
+            released += self._drop(session_id)
+            self.expirations += 1
+        return released
+
+    def _evict_session(
+        self,
+        session_id: str,
+        session: _Session,
+        keep: Hashable,
+    ) -> list[Released]:
+        released: list[Released] = []
+        while session.nbytes > self.max_session_bytes and len(session.entries) > 1:
+            key = next(iter(session.entries))
+            if key == keep:
+                break
+            released.append((session_id, key, self._remove(session, key)))
+            self.evictions += 1
+        return released
+
+    def _evict_over_budget(self, keep: tuple[str, Hashable]) -> list[Released]:
+        released: list[Released] = []
+        for session_id in list(self._sessions):
+            if self._nbytes <= self.max_bytes:
+                break
+            session = self._sessions[session_id]
+            for key in list(session.entries):
+                if self._nbytes <= self.max_bytes:
+                    break
+                if (session_id, key) == keep:
+                    continue
+                released.append((session_id, key, self._remove(session, key)))
+                self.evictions += 1
+            if not session.entries and session_id != keep[0]:
+                del self._sessions[session_id]
+        return released
+
+    def _notify(self, released: list[Released]) -> None:
+        if self.on_release is not None:
+            for session_id, key, value in released:
+                self.on_release(session_id, key, value)
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.dataset_cache import DEFAULT_MAX_INDEX_BYTES
+
+
+# Operators of the DataTable filter_query syntax, normalized to symbols
+_OPERATORS: Dict[str, str] = {
+    "=": "=", "eq": "=",
+    "!=": "!=", "ne": "!=",
+    "<": "<", "lt": "<",
+    "<=": "<=", "le": "<=",
+    ">": ">", "gt": ">",
+    ">=": ">=", "ge": ">=",
+    "contains": "contains",
+    "datestartswith": "datestartswith",
+}
+
+_CLAUSE_RE = re.compile(
+    r"""^\{(?P<column>[^}]+)\}\s*
+        (?P<case>[si])?(?P<op>>=|<=|!=|=|<|>|eq|ne|lt|le|gt|ge|contains|datestartswith)
+        \s+(?P<value>.*)$""",
+    re.VERBOSE,
+)
+
+
+class FilterClause(NamedTuple):
+    column: str
+    operator: str
+    value: str
+    case_sensitive: bool
+
+
+def parse_filter_query(query: Optional[str]) -> list[FilterClause]:
+    """
+    Parse a DataTable ``filter_query`` into clauses.
+
+    Only the conjunctions produced by the DataTable filter row are
+    supported, e.g. ``{MgO} > 10 && {RockType} icontains basalt``.
+
+    Parameters
+    ----------
+    query : str or None
+        Filter query sent by the DataTable.
+
+    Returns
+    -------
+    list[FilterClause]
+        Parsed clauses, combined with AND.
+
+    Raises
+    ------
+    ValueError
+        If a clause cannot be parsed.
+    """
+    clauses: list[FilterClause] = []
+    for part in (query or "").split(" && "):
+        part = part.strip()
+        if not part:
+            continue
+        match = _CLAUSE_RE.match(part)
+        if match is None:
+            raise ValueError(f"Unsupported filter expression: {part}")
+        value = match["value"].strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+        clauses.append(
+            FilterClause(
+                column=match["column"],
+                operator=_OPERATORS[match["op"]],
+                value=value,
+                case_sensitive=match["case"] != "i",
+            )
+        )
+    return clauses
+
+
+class TableIndex:
+    """
+    Lazily built per-column indexes of a dataset, for paged table queries.
+
+    Numeric columns get a sorted order (argsort) that answers range filters
+    with binary searches and single-column sorts without re-sorting. Other
+    columns are factorized once, so equality and substring filters are
+    evaluated on the unique values and mapped back through the codes.
+    Each index costs about 16 bytes per row; above ``max_bytes``, the least
+    recently used column indexes are dropped and rebuilt when needed.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Dataset to index. Must not be mutated afterwards.
+    max_bytes : int, optional
+        Memory budget of the column indexes, in bytes. Unbounded if None.
+    """
+
+    def __init__(self, df: pd.DataFrame, max_bytes: Optional[int] = None) -> None:
+        self.df = df
+        self.max_bytes = max_bytes
+        self._indexes: "OrderedDict[Hashable, tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        self._nbytes: int = 0
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the column indexes built so far."""
+        return self._nbytes
+
+    def query(
+        self,
+        filter_query: Optional[str],
+        sort_by: Optional[Sequence[dict]],
+        page_current: int,
+        page_size: int,
+        selected: Optional[np.ndarray] = None,
+    ) -> tuple[list[dict[str, Any]], int]:
+        """
+        Return one page of rows matching a DataTable query.
+
+        Parameters
+        ----------
+        filter_query : str or None
+            DataTable filter query.
+        sort_by : sequence of dict or None
+            DataTable sort specification (``column_id``, ``direction``).
+        page_current : int
+            Zero-based page number.
+        page_size : int
+            Rows per page.
+        selected : np.ndarray, optional
+            Boolean mask of the rows to query, e.g. the points selected on
+            a figure; all rows if None.
+
+        Returns
+        -------
+        tuple
+            (records of the requested page, total number of pages)
+        """
+        rows = self.filter(parse_filter_query(filter_query), selected)
+        rows = self.sort(rows, sort_by or [])
+
+        page_count = max(-(-len(rows) // page_size), 1)
+        start = page_current * page_size
+        page = self.df.iloc[rows[start:start + page_size]]
+        return page.to_dict("records"), page_count
+
+    def filter(
+        self,
+        clauses: Sequence[FilterClause],
+        selected: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Return the sorted positions of the rows matching every clause.
+
+        If ``selected`` is given, only rows where it is True are considered.
+        """
+        if selected is None:
+            mask = np.ones(len(self.df), dtype=bool)
+        else:
+            mask = np.array(selected, dtype=bool)
+        for clause in clauses:
+            if clause.column not in self.df.columns:
+                raise ValueError(f"Unknown column in filter: {clause.column}")
+            mask &= self._clause_mask(clause)
+        return np.flatnonzero(mask)
+
+    def sort(self, rows: np.ndarray, sort_by: Sequence[dict]) -> np.ndarray:
+        """
+        Order row positions according to a DataTable sort specification.
+        """
+        if not sort_by:
+            return rows
+
+        if len(sort_by) == 1 and self._is_numeric(sort_by[0]["column_id"]):
+            # Reuse the precomputed order instead of sorting again
+            order, sorted_values = self._order(sort_by[0]["column_id"])
+            selected = np.zeros(len(self.df), dtype=bool)
+            selected[rows] = True
+            keep = selected[order]
+            ordered = order[keep]
+            if sort_by[0]["direction"] == "desc":
+                # Missing values stay last in both directions
+                n_valid = np.count_nonzero(~np.isnan(sorted_values[keep]))
+                ordered = np.concatenate([ordered[:n_valid][::-1], ordered[n_valid:]])
+            return ordered
+
+        keys = []
+        for spec in reversed(sort_by):
+            col = spec["column_id"]
+            if self._is_numeric(col):
+                key = self.df[col].to_numpy(dtype=np.float64, na_value=np.nan)[rows]
+            else:
+                codes, uniques = self._factorize(col)
+                # Rank codes by value so that sorting follows the labels
+                ranks = np.argsort(np.argsort(uniques.astype(str)))
+                key = np.where(codes[rows] >= 0, ranks[codes[rows]], len(uniques))
+            keys.append(-key if spec["direction"] == "desc" else key)
+        return rows[np.lexsort(keys)]
+
+    def _clause_mask(self, clause: FilterClause) -> np.ndarray:
+        col, op, value = clause.column, clause.operator, clause.value
+
+        if self._is_numeric(col) and op in ("=", "!=", "<", "<=", ">", ">="):
+            try:
+                number = float(value)
+            except ValueError:
+                raise ValueError(f"Expected a number for {col}: {value}") from None
+            if self.df[col].dtype == np.float32:
+                # Compare at the stored precision, so "{MgO} = 7.2" matches
+                number = float(np.float32(number))
+            order, sorted_values = self._order(col)
+            lo = np.searchsorted(sorted_values, number, side="left")
+            hi = np.searchsorted(sorted_values, number, side="right")
+            n_valid = np.count_nonzero(~np.isnan(sorted_values))
+            bounds = {
+                "=": (lo, hi), "<": (0, lo), "<=": (0, hi),
+                ">": (hi, n_valid), ">=": (lo, n_valid),
+            }
+            mask = np.zeros(len(self.df), dtype=bool)
+            if op == "!=":
+                mask[order[:n_valid]] = True
+                mask[order[lo:hi]] = False
+            else:
+                start, stop = bounds[op]
+                mask[order[start:stop]] = True
+            return mask
+
+        codes, uniques = self._factorize(col)
+        labels = pd.Series(uniques.astype(str))
+        if not clause.case_sensitive:
+            labels, value = labels.str.lower(), value.lower()
+
+        if op == "contains":
+            matches = labels.str.contains(value, regex=False).to_numpy()
+        elif op == "datestartswith":
+            matches = labels.str.startswith(value).to_numpy()
+        elif op in ("=", "!="):
+            matches = (labels == value).to_numpy()
+            if op == "!=":
+                matches = ~matches
+        else:
+            raise ValueError(f"Operator {op} is not supported for column {col}")
+
+        return np.append(matches, False)[codes]
+
+    def _is_numeric(self, col: str) -> bool:
+        return pd.api.types.is_numeric_dtype(self.df[col]) and not pd.api.types.is_bool_dtype(
+            self.df[col]
+        )
+
+    def _order(self, col: str) -> tuple[np.ndarray, np.ndarray]:
+        def build() -> tuple[np.ndarray, np.ndarray]:
+            values = self.df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            order = np.argsort(values, kind="stable")  # NaN sorts last
+            return order, values[order]
+
+        return self._index(("order", col), build)
+
+    def _factorize(self, col: str) -> tuple[np.ndarray, np.ndarray]:
+        def build() -> tuple[np.ndarray, np.ndarray]:
+            codes, uniques = pd.factorize(self.df[col])
+            return codes, np.asarray(uniques, dtype=object)
+
+        return self._index(("codes", col), build)
+
+    def _index(
+        self,
+        key: Hashable,
+        build: Callable[[], tuple[np.ndarray, np.ndarray]],
+    ) -> tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+            index = build()
+            self._indexes[key] = index
+            self._nbytes += sum(array.nbytes for array in index)
+            # The index just built is kept even if it exceeds the budget alone
+            while (
+                self.max_bytes is not None
+                and self._nbytes > self.max_bytes
+                and len(self._indexes) > 1
+            ):
+                _, old = self._indexes.popitem(last=False)
+                self._nbytes -= sum(array.nbytes for array in old)
+            return index
+
+
+class TableIndexCache:
+    """
+    LRU cache of :class:`TableIndex` objects keyed by dataset token.
+
+    Indexes grow as columns are filtered and sorted. Their total size is
+    checked on every lookup, and the least recently used datasets lose
+    their indexes while it exceeds ``max_bytes``; each index is also
+    bounded by ``max_bytes`` on its own.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget of the indexes, across all datasets, in bytes.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_INDEX_BYTES) -> None:
+        self.max_bytes: int = max_bytes
+        self._entries: "OrderedDict[str, TableIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions: int = 0
+
+    def get(self, token: str, df: pd.DataFrame) -> TableIndex:
+        """
+        Return the index of the dataset ``df`` identified by ``token``.
+        """
+        with self._lock:
+            index = self._entries.get(token)
+            if index is None or index.df is not df:
+                index = TableIndex(df, max_bytes=self.max_bytes)
+                self._entries[token] = index
+            self._entries.move_to_end(token)
+            total = sum(entry.nbytes for entry in self._entries.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                _, old = self._entries.popitem(last=False)
+                total -= old.nbytes
+                self.evictions += 1
+            return index
+
+    def invalidate(self, token: str) -> int:
+        """
+        Drop the index of the dataset identified by ``token``.
+
+        Returns
+        -------
+        int
+            Number of indexes removed (0 or 1).
+        """
+        with self._lock:
+            return int(self._entries.pop(token, None) is not None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the number and total size of the indexes kept.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "nbytes": sum(index.nbytes for index in self._entries.values()),
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import base64
+import json
+
+import numpy as np
+import pandas as pd
+from plotly.utils import PlotlyJSONEncoder
+
+from src.app import _regroup_patch, _single_point_traces, create_app
+from src.plots.figures import build_figure
+from src.utils.session_state import estimate_nbytes
+
+
+def _apply(figure: dict, patch) -> dict:
+    # Replays the operations the way the Dash renderer applies them
+    for op in patch.to_plotly_json()["operations"]:
+        *path, last = op["location"]
+        target = figure
+        for part in path:
+            target = target[part]
+        if op["operation"] == "Assign":
+            target[last] = op["params"]["value"]
+        elif op["operation"] == "Delete":
+            # Deleting a missing property is a no-op
+            if isinstance(target, dict):
+                target.pop(last, None)
+            else:
+                del target[last]
+        elif op["operation"] == "Extend":
+            target[last].extend(op["params"]["value"])
+        else:
+            raise AssertionError(op)
+    return figure
+
+
+def _json(data: list) -> str:
+    return json.dumps(data, cls=PlotlyJSONEncoder, sort_keys=True)
+
+
+def test_regroup_patch_only_sends_group_colors() -> None:
+    rng = np.random.default_rng(0)
+    n = 2_000
+    df = pd.DataFrame(
+        {
+            "SiO2": rng.normal(55.0, 5.0, n),
+            "MgO": rng.normal(5.0, 2.0, n),
+            "CaO": rng.normal(8.0, 2.0, n),
+            "RockType": rng.choice(["basalt", "andesite", "dacite"], n),
+            "Site": rng.choice([f"S{i}" for i in range(60)], n),
+            "Sample": rng.choice([f"X{i}" for i in range(80)], n),
+        }
+    )
+
+    for diagram_type in ("custom", "harker_plate"):
+        # Low-cardinality groups keep one trace per group
+        assert not _single_point_traces(build_figure(df, diagram_type, "SiO2", "MgO", "RockType"))
+
+        for shown, group in ((None, "Site"), ("Site", "Sample"), ("Sample", None)):
+            before = build_figure(df, diagram_type, "SiO2", "MgO", shown)
+            after = build_figure(df, diagram_type, "SiO2", "MgO", group)
+            assert _single_point_traces(before) and _single_point_traces(after)
+            patch = _regroup_patch(after, len(before.data))
+
+            for op in patch.to_plotly_json()["operations"]:
+                assert op["location"][-1] not in ("x", "y")
+            patched = _apply(before.to_dict(), patch)["data"]
+            assert _json(patched) == _json(after.to_dict()["data"])
+
+
+def _post(client, outputs: list[tuple[str, str]], inputs: list, state: list) -> dict:
+    body = {
+        "output": ".." + "...".join(f"{i}.{p}" for i, p in outputs) + "..",
+        "outputs": [{"id": i, "property": p} for i, p in outputs],
+        "inputs": [{"id": i, "property": p, "value": v} for i, p, v in inputs],
+        "state": [{"id": i, "property": p, "value": v} for i, p, v in state],
+        "changedPropIds": [f"{inputs[0][0]}.{inputs[0][1]}"],
+    }
+    response = client.post("/_dash-update-component", json=body)
+    assert response.status_code == 200
+    return response.get_json()["response"]
+
+
+def test_session_holds_profile_and_derived_columns() -> None:
+    app = create_app(instrument=False)
+    client = app.server.test_client()
+    csv = "Sample,SiO2,MgO,FeO\nA,50.1,7.2,8.1\nB,55.3,5.0,6.4\nC,60.4,3.0,5.2\n"
+    contents = "data:text/csv;base64," + base64.b64encode(csv.encode()).decode()
+    session = ("session-id", "data", "s1")
+
+    upload = _post(
+        client,
+        [
+            ("data-store", "data"),
+            ("upload-status", "children"),
+            ("preview-table", "columns"),
+            ("preview-table", "page_current"),
+            ("preview-table", "sort_by"),
+            ("preview-table", "filter_query"),
+            ("column-meta-store", "data"),
+        ],
+        [("upload-data", "contents", [contents])],
+        [("upload-data", "filename", ["rocks.csv"]), session],
+    )
+    token = upload["data-store"]["data"]
+    _post(
+        client,
+        [("export-download", "data"), ("export-status", "children")],
+        [("export-button", "n_clicks", 1)],
+        [("export-format-radio", "value", "csv"), ("data-store", "data", token), session],
+    )
+
+    sessions = app.session_store
+    profile = sessions.get("s1", "profile")
+    derived = sessions.get("s1", "derived")
+    assert profile[0] == token and profile[1]["n_rows"] == 3
+    assert derived[0] == token and "Mg#" in derived[1]
+    dataset = sessions.get("s1", "dataset")
+    assert sessions.session_bytes("s1") >= sum(
+        estimate_nbytes(entry) for entry in (dataset, profile, derived)
+    )
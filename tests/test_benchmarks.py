@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from benchmarks.run import compare, run_benchmarks
+
+
+def test_benchmark_harness_runs_on_small_dataset() -> None:
+    results = run_benchmarks(
+        sizes=[200],
+        names=["parse_csv", "store_round_trip", "xy_scatter"],
+        repeat=1,
+        log=None,
+    )
+    assert [r["benchmark"] for r in results] == ["parse_csv", "store_round_trip", "xy_scatter"]
+    assert all(r["rows"] == 200 and r["seconds"] > 0 for r in results)
+    assert results[2]["figure_json_bytes"] > 0
+    assert len(compare(results, results)) == 3
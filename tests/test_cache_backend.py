@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+
+import pandas as pd
+import pytest
+from plotly.graph_objs import Figure
+
+from src.utils.cache_backend import (
+    DEFAULT_DISK_SIZE_LIMIT,
+    ENV_BACKEND,
+    ENV_CACHE_DIR,
+    ENV_CACHE_SIZE_LIMIT,
+    DiskBackend,
+    backend_from_env,
+)
+from src.utils.dataset_cache import DatasetCache
+from src.utils.figure_cache import FigureCache, figure_key
+
+
+def test_disk_backend_roundtrip_and_prefix_delete(tmp_path) -> None:
+    backend = DiskBackend(tmp_path)
+    backend.set("figure-abc-1", b"one")
+    backend.set("figure-abc-2", b"two")
+    assert backend.get("figure-abc-1") == b"one"
+    assert backend.delete_prefix("figure-abc-") == 2
+    assert backend.get("figure-abc-2") is None
+
+    with pytest.raises(ValueError):
+        backend.get("../escape")
+
+
+def test_disk_backend_culls_least_recently_used_files(tmp_path) -> None:
+    backend = DiskBackend(tmp_path, size_limit=35)
+    for i, key in enumerate(("a", "b", "c")):
+        backend.set(key, b"x" * 10)
+        os.utime(backend.path(key), (i, i))
+    # Reading "a" makes "b" the least recently used file
+    assert backend.get("a") is not None
+    backend.set("d", b"x" * 10)
+    assert [backend.get(key) is not None for key in "abcd"] == [True, False, True, True]
+
+
+def test_backend_from_env_bounds_the_disk_cache(tmp_path, monkeypatch) -> None:
+    monkeypatch.setenv(ENV_BACKEND, "disk")
+    monkeypatch.setenv(ENV_CACHE_DIR, str(tmp_path))
+    assert backend_from_env().size_limit == DEFAULT_DISK_SIZE_LIMIT
+    monkeypatch.setenv(ENV_CACHE_SIZE_LIMIT, "0")
+    assert backend_from_env().size_limit is None
+    monkeypatch.setenv(ENV_CACHE_SIZE_LIMIT, "2GB")
+    with pytest.raises(ValueError, match=ENV_CACHE_SIZE_LIMIT):
+        backend_from_env()
+
+
+def test_caches_are_shared_between_workers_through_backend(tmp_path) -> None:
+    backend = DiskBackend(tmp_path)
+    token = "a" * 32
+    df = pd.DataFrame({"SiO2": [50.0, 52.0]})
+
+    # Two caches stand in for two worker processes
+    DatasetCache(backend=backend).put(token, df)
+    pd.testing.assert_frame_equal(DatasetCache(backend=backend).get(token), df)
+
+    key = figure_key(token, "custom", "SiO2", "MgO", None)
+    FigureCache(backend=backend).put(key, Figure(layout={"title": {"text": "shared"}}))
+    other = FigureCache(backend=backend)
+    assert other.get(key).layout.title.text == "shared"
+    assert other.stats()["shared_hits"] == 1
+
+    other.invalidate(token)
+    assert FigureCache(backend=backend).get(key) is None
@@ -3,9 +3,22 @@ from __future__ import annotations
 import base64
 import io
 
+import numpy as np
 import pandas as pd
+import pytest
 
-from src.utils.data_io import parse_uploaded_file, get_numeric_and_categorical_columns
+from src.utils import data_io
+from src.utils.data_io import (
+    EXPORT_FORMATS,
+    SOURCE_COLUMN,
+    compact_frame,
+    get_numeric_and_categorical_columns,
+    load_dataset_file,
+    parse_uploaded_file,
+    parse_uploaded_files,
+    reconcile_columns,
+    write_dataset,
+)
 
 
 def _make_upload_contents_from_csv(csv_text: str) -> str:
@@ -36,3 +49,101 @@ def test_get_numeric_and_categorical_columns() -> None:
     num_cols, cat_cols = get_numeric_and_categorical_columns(df)
     assert "SiO2" in num_cols and "MgO" in num_cols
     assert "RockType" in cat_cols
+
+
+def test_parse_uploaded_file_downcasts_oxide_columns() -> None:
+    csv_text = "Sample,SiO2,MgO\nA,50.1,7.2\nB,52.3,5.1\n"
+    contents = _make_upload_contents_from_csv(csv_text)
+    fractions: list[float] = []
+    df = parse_uploaded_file(contents, "test.csv", progress=fractions.append)
+    assert df["SiO2"].dtype == "float32"
+    assert df["MgO"].dtype == "float32"
+    assert fractions[-1] == 1.0
+
+
+def test_parse_uploaded_file_checks_every_chunk_before_downcasting(monkeypatch) -> None:
+    monkeypatch.setattr(data_io, "CSV_CHUNK_ROWS", 2)
+    csv_text = "SiO2,MgO,CaO\n50.1,7.2,1\n52.3,5.1,2\n55.7,45.123456,3.5\n"
+    df = parse_uploaded_file(_make_upload_contents_from_csv(csv_text), "test.csv")
+    assert df["SiO2"].dtype == "float32"
+    assert df["MgO"].dtype == "float64"
+    assert df["MgO"].tolist() == [7.2, 5.1, 45.123456]
+    # Whole numbers parse as integers in the first chunk
+    assert df["CaO"].tolist() == [1.0, 2.0, 3.5]
+
+
+def test_compact_frame_downcasts_and_encodes_categories() -> None:
+    n = 100
+    df = pd.DataFrame(
+        {
+            "Sample": [f"S{i}" for i in range(n)],
+            "Rb": np.round(np.linspace(10.5, 60.5, n), 1),
+            "Lat": np.linspace(45.123456, 45.5, n),
+            "Age": np.arange(n, dtype=np.int64),
+            "RockType": ["basalt", "andesite"] * (n // 2),
+        }
+    )
+    compact = compact_frame(df)
+
+    assert compact["Rb"].dtype == np.float32
+    np.testing.assert_array_equal(compact["Rb"].astype(str), df["Rb"].astype(str))
+    assert compact["Age"].dtype == np.int8
+    assert compact["RockType"].dtype == "category"
+    # One distinct value per row: stays a string column
+    assert compact["Sample"].dtype == df["Sample"].dtype
+    assert compact.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+    num_cols, cat_cols = get_numeric_and_categorical_columns(compact)
+    assert set(num_cols) == {"Rb", "Lat", "Age"}
+    assert set(cat_cols) == {"Sample", "RockType"}
+
+    # 45.123456 would read back as 45.123455: kept as float64 unless a
+    # relative error is explicitly accepted
+    assert compact["Lat"].dtype == np.float64
+    assert compact_frame(df, rtol=1e-6)["Lat"].dtype == np.float32
+
+
+def test_parse_uploaded_file_xlsx() -> None:
+    buffer = io.BytesIO()
+    pd.DataFrame({"SiO2": [50.1, 52.3], "RockType": ["basalt", "andesite"]}).to_excel(
+        buffer, index=False
+    )
+    encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    df = parse_uploaded_file(f"data:application/octet-stream;base64,{encoded}", "test.xlsx")
+    assert list(df.columns) == ["SiO2", "RockType"]
+    assert df.shape == (2, 2)
+
+
+def test_parse_uploaded_files_reconciles_and_tags_sources() -> None:
+    first = _make_upload_contents_from_csv("sio2,MgO (wt%)\n50.0,7.5\n")
+    second = _make_upload_contents_from_csv("SiO2_wt%,MgO,Site\n52.0,6.0,A\n48.0,9.0,B\n")
+    df = parse_uploaded_files([first, second], ["a.csv", "b.csv"])
+
+    assert list(df.columns[:3]) == ["SiO2", "MgO", "Site"]
+    assert df["SiO2"].tolist() == [50.0, 52.0, 48.0]
+    assert isinstance(df[SOURCE_COLUMN].dtype, pd.CategoricalDtype)
+    assert df[SOURCE_COLUMN].tolist() == ["a.csv", "b.csv", "b.csv"]
+
+
+def test_reconcile_columns_keeps_existing_canonical_names() -> None:
+    df = pd.DataFrame(columns=["SiO2", "sio2", "FeOt", "Sample"])
+    assert list(reconcile_columns(df).columns) == ["SiO2", "sio2", "FeO*", "Sample"]
+
+
+def test_columnar_export_round_trips(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame(
+        {
+            "SiO2": np.array([50.1, 61.3], dtype=np.float32),
+            "RockType": pd.Categorical(["basalt", "andesite"]),
+        }
+    )
+    for fmt, suffix in EXPORT_FORMATS.items():
+        payload = write_dataset(df, fmt)
+        encoded = base64.b64encode(payload).decode("ascii")
+        uploaded = parse_uploaded_file(f"data:;base64,{encoded}", f"session{suffix}")
+        pd.testing.assert_frame_equal(uploaded, df)
+
+        path = tmp_path / f"session{suffix}"
+        path.write_bytes(payload)
+        pd.testing.assert_frame_equal(load_dataset_file(path), df)
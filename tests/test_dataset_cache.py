@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from src.utils.dataset_cache import DatasetCache, dataset_token
+
+
+def _make_frame(n_rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"SiO2": [50.0] * n_rows, "MgO": [5.0] * n_rows})
+
+
+def test_dataset_token_is_stable() -> None:
+    contents = "data:text/csv;base64,QSxCCjEsMgo="
+    assert dataset_token(contents) == dataset_token(contents)
+    assert dataset_token(contents) != dataset_token(contents + "=")
+
+
+def test_dataset_cache_evicts_least_recently_used() -> None:
+    df = _make_frame(1000)
+    cache = DatasetCache(max_bytes=int(df.memory_usage(deep=True).sum() * 2.5))
+    cache.put("a" * 32, df)
+    cache.put("b" * 32, df.copy())
+    assert cache.get("a" * 32) is df  # "a" becomes most recently used
+    cache.put("c" * 32, df.copy())
+
+    assert "a" * 32 in cache
+    assert "b" * 32 not in cache
+    assert cache.stats()["evictions"] == 1
+
+
+def test_dataset_cache_spills_and_reloads(tmp_path) -> None:
+    df = _make_frame(1000)
+    cache = DatasetCache(max_bytes=1, spill_dir=tmp_path)
+    cache.put("a" * 32, df)
+    cache.put("b" * 32, df.copy())
+
+    reloaded = cache.get("a" * 32)
+    assert reloaded is not None
+    pd.testing.assert_frame_equal(reloaded, df)
+    assert cache.stats()["spills"] >= 1
+
+
+def test_dataset_cache_rejects_malformed_tokens(tmp_path) -> None:
+    cache = DatasetCache(spill_dir=tmp_path)
+    assert cache.get("../../etc/passwd") is None
+    assert cache.get(None) is None
+
+
+def test_dataset_cache_release_evicts_from_memory(tmp_path) -> None:
+    df = _make_frame(100)
+    cache = DatasetCache(spill_dir=tmp_path)
+    cache.put("a" * 32, df)
+    cache.release("a" * 32)
+
+    assert cache.nbytes == 0
+    assert cache.stats()["spills"] == 1
+    assert "a" * 32 in cache
+
+    # Nowhere to reload it from: kept until the memory budget evicts it
+    memory_only = DatasetCache()
+    memory_only.put("a" * 32, df)
+    memory_only.release("a" * 32)
+    assert memory_only.get("a" * 32) is df
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import numpy as np
+
+from src.utils.decimation import decimate_xy
+
+
+def test_decimate_xy_keeps_outliers_and_respects_budget() -> None:
+    x = np.concatenate([np.zeros(10_000), [100.0]])
+    y = np.concatenate([np.zeros(10_000), [100.0]])
+    keep = decimate_xy(x, y, max_points=50)
+    assert len(keep) <= 50
+    assert keep[-1] == 10_000
+
+
+def test_decimate_xy_drops_non_finite_points() -> None:
+    x = np.array([1.0, np.nan, 3.0])
+    y = np.array([1.0, 2.0, np.inf])
+    assert decimate_xy(x, y, max_points=10).tolist() == [0]
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.utils.derived import (
+    DerivedColumnCache,
+    available_derived_columns,
+    compute_derived,
+)
+
+
+def _make_dataset() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "SiO2": [50.0, 60.0],
+            "FeO": [8.0, np.nan],
+            "Fe2O3": [2.0, 3.0],
+            "MgO": [7.0, 2.0],
+            "Na2O": [3.0, 4.0],
+            "K2O": [1.0, 2.0],
+        }
+    )
+
+
+def test_available_derived_columns_lists_only_computable_columns() -> None:
+    names = available_derived_columns(["SiO2", "MgO", "FeO"])
+    assert "FeO*" in names and "Mg#" in names and "SiO2_anhydrous" in names
+    assert "Na2O+K2O" not in names
+
+
+def test_compute_derived_values() -> None:
+    values = compute_derived(_make_dataset(), ["FeO*", "Mg#", "Na2O+K2O", "SiO2_anhydrous"])
+    np.testing.assert_allclose(values["FeO*"], [8.0 + 2.0 * 0.89981, 3.0 * 0.89981], rtol=1e-4)
+    np.testing.assert_allclose(values["Na2O+K2O"], [4.0, 6.0])
+    assert np.all((values["Mg#"] > 0) & (values["Mg#"] < 100))
+    # Anhydrous oxides of a row sum to 100
+    anhydrous = [v for k, v in values.items() if k.endswith("_anhydrous")]
+    np.testing.assert_allclose(np.nansum(anhydrous, axis=0), [100.0, 100.0])
+
+
+def test_derived_column_cache_computes_lazily_and_invalidates() -> None:
+    df = _make_dataset()
+    cache = DerivedColumnCache()
+    assert cache.with_columns("tok", df, ["SiO2", None]) is df
+    assert len(cache) == 0
+
+    extended = cache.with_columns("tok", df, ["Mg#"])
+    assert "Mg#" in extended.columns and "Mg#" not in df.columns
+    assert len(cache) == 1
+    assert cache.invalidate("tok") == 1
+
+
+def test_derived_column_cache_evicts_by_size() -> None:
+    df = _make_dataset()
+    # Room for two float64 columns of two rows
+    cache = DerivedColumnCache(max_bytes=32)
+    cache.with_columns("a", df, ["Mg#"])
+    cache.with_columns("b", df, ["Mg#"])
+    cache.with_columns("a", df, ["Mg#"])
+    cache.with_columns("c", df, ["FeO*"])
+
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["nbytes"] == 32
+    assert cache.invalidate("b") == 0
+    assert cache.invalidate("a") == 1
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.data_io import get_numeric_and_categorical_columns
+from src.utils.detection_limits import add_flag_columns, coerce_numeric_columns
+
+
+def _make_lab_export() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Sample": ["A", "B", "C", "D", "E"],
+            "MgO": ["7.2", "<0.02", "bdl", "52.3*", " 4.5 "],
+            "Rb": ["12", "n.d.", "15", "<LOD", "20"],
+            "RockType": ["basalt", "basalt", "andesite", "basalt", "dacite"],
+        },
+        dtype=object,
+    )
+
+
+@pytest.mark.parametrize(
+    ("policy", "below"),
+    [("nan", np.nan), ("half", 0.01), ("dl", 0.02)],
+)
+def test_coerce_numeric_columns_applies_policy(policy: str, below: float) -> None:
+    df, flags = coerce_numeric_columns(_make_lab_export(), policy=policy)
+
+    np.testing.assert_allclose(
+        df["MgO"].to_numpy(), [7.2, below, np.nan, 52.3, 4.5], equal_nan=True
+    )
+    np.testing.assert_allclose(
+        df["Rb"].to_numpy(), [12, np.nan, 15, np.nan, 20], equal_nan=True
+    )
+    assert flags["MgO"].tolist() == [False, True, True, True, False]
+    assert flags["Rb"].tolist() == [False, True, False, True, False]
+
+    num_cols, cat_cols = get_numeric_and_categorical_columns(df)
+    assert num_cols == ["MgO", "Rb"]
+    assert cat_cols == ["Sample", "RockType"]
+
+
+def test_coerce_numeric_columns_keeps_text_columns() -> None:
+    n = 5_000
+    df = pd.DataFrame(
+        {
+            "Sample": [f"S{i}" for i in range(n)],
+            "Label": ["12"] * (n // 2) + ["basalt"] * (n // 2),
+            "MgO": np.linspace(0.0, 10.0, n),
+        }
+    )
+    coerced, flags = coerce_numeric_columns(df)
+
+    assert coerced["Sample"].dtype == df["Sample"].dtype
+    assert coerced["Label"].dtype == df["Label"].dtype
+    assert coerced["MgO"].dtype == np.float64
+    assert flags.empty
+
+
+def test_coerce_numeric_columns_handles_mixed_spreadsheet_cells() -> None:
+    df = pd.DataFrame({"K2O": [1.5, "<0.1", 2, None, "0.8"]}, dtype=object)
+    coerced, flags = coerce_numeric_columns(df, policy="dl")
+
+    np.testing.assert_allclose(
+        coerced["K2O"].to_numpy(), [1.5, 0.1, 2.0, np.nan, 0.8], equal_nan=True
+    )
+    assert flags["K2O"].tolist() == [False, True, False, False, False]
+
+    with pytest.raises(ValueError):
+        coerce_numeric_columns(df, policy="zero")
+
+
+def test_coerce_numeric_columns_keeps_letter_suffixed_sample_ids() -> None:
+    df = pd.DataFrame(
+        {
+            "Sample": ["101A", "101B", "102A", "102B", "103", "104A"],
+            "Zr": ["120", "135", "98", "bdl", "101", "110"],
+        },
+        dtype=object,
+    )
+    coerced, flags = coerce_numeric_columns(df)
+
+    assert coerced["Sample"].tolist() == df["Sample"].tolist()
+    assert list(flags.columns) == ["Zr"]
+
+    # Without any detection-limit entry, only analyte columns are converted
+    plain = pd.DataFrame({"Batch": ["12", "13*", "14"], "MgO": ["7.1", "8.2*", "6.3"]})
+    coerced, flags = coerce_numeric_columns(plain)
+    assert coerced["Batch"].tolist() == ["12", "13*", "14"]
+    np.testing.assert_allclose(coerced["MgO"].to_numpy(), [7.1, 8.2, 6.3])
+
+
+def test_add_flag_columns_keeps_existing_flag_columns() -> None:
+    lab = _make_lab_export()
+    # Column left by an earlier export, or by the lab itself
+    lab["MgO_flag"] = ["x", "", "", "", ""]
+    df, flags = coerce_numeric_columns(lab)
+    df = add_flag_columns(df, flags)
+
+    assert df["MgO_flag"].tolist() == ["x", "", "", "", ""]
+    assert df["Rb_flag"].tolist() == [False, True, False, True, False]
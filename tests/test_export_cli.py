@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cli.export import (
+    DEFAULT_HEIGHT,
+    FigureJob,
+    build_job_figure,
+    expand_spec,
+    prepare_dataset,
+    render_figures,
+)
+from src.plots.figures import build_figure
+
+
+def test_expand_spec_renders_one_figure_per_axis_combination() -> None:
+    jobs = expand_spec(
+        {
+            "figures": [
+                {"type": "custom", "x": "SiO2", "y": ["MgO", "FeO*"], "group": "RockType"},
+                {"type": "harker_plate", "y": "ignored"},
+                {"type": "tas"},
+            ]
+        }
+    )
+    assert [job.diagram_type for job in jobs] == ["custom", "custom", "harker_plate", "tas"]
+    assert jobs[1] == FigureJob("custom", "SiO2", "FeO*", "RockType")
+    assert jobs[2].y_col is None
+    assert jobs[1].stem == "custom_SiO2_FeO_RockType"
+
+    with pytest.raises(ValueError):
+        expand_spec({"figures": [{"type": "custom", "y": "MgO"}]})
+    with pytest.raises(ValueError):
+        expand_spec({"figures": [{"type": "ternary"}]})
+
+
+def test_prepare_dataset_adds_derived_columns_once(tmp_path) -> None:
+    rng = np.random.default_rng(0)
+    path = tmp_path / "data.csv"
+    pd.DataFrame(
+        {
+            "SiO2": rng.uniform(40, 75, 20),
+            "FeO": rng.uniform(2, 12, 20),
+            "Fe2O3": rng.uniform(0, 3, 20),
+            "Na2O": rng.uniform(1, 5, 20),
+            "K2O": rng.uniform(0, 4, 20),
+        }
+    ).to_csv(path, index=False)
+
+    jobs = expand_spec({"figures": [{"type": "custom", "x": "SiO2", "y": "FeO*"}]})
+    df = prepare_dataset(str(path), jobs)
+    assert "FeO*" in df.columns
+    assert "TAS_class" in df.columns
+
+    missing = expand_spec({"figures": [{"type": "harker", "y": "MnO"}]})
+    with pytest.raises(ValueError, match="MnO"):
+        prepare_dataset(str(path), missing)
+
+
+def test_export_figures_keep_every_point_as_svg_markers() -> None:
+    rng = np.random.default_rng(0)
+    n = 120_000
+    df = pd.DataFrame(
+        {col: rng.uniform(1, 20, n) for col in ("SiO2", "MgO", "CaO", "Na2O", "K2O")}
+    )
+    for job in expand_spec(
+        {"figures": [{"type": "custom", "x": "SiO2", "y": "MgO"}, {"type": "harker_plate"}]}
+    ):
+        fig = build_job_figure(df, job)
+        assert {trace.type for trace in fig.data} == {"scatter"}
+        assert all(len(trace.x) == n for trace in fig.data)
+        assert not fig.layout.annotations
+
+
+def test_render_figures_keeps_the_plate_height(tmp_path) -> None:
+    pytest.importorskip("kaleido")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {col: rng.uniform(1, 20, 30) for col in ("SiO2", "MgO", "CaO", "Na2O", "K2O")}
+    )
+    jobs = expand_spec(
+        {"figures": [{"type": "harker_plate"}, {"type": "custom", "x": "SiO2", "y": "MgO"}]}
+    )
+    plate_height = build_figure(df, "harker_plate", None, None, None).layout.height
+    assert plate_height != DEFAULT_HEIGHT
+
+    paths = render_figures(df, jobs, str(tmp_path), scale=1.0)
+    svgs = [open(path, encoding="utf-8").read() for path in paths]
+    assert f'height="{plate_height}"' in svgs[0]
+    assert f'height="{DEFAULT_HEIGHT}"' in svgs[1]
+
+    paths = render_figures(df, jobs[:1], str(tmp_path / "sized"), height=400, scale=1.0)
+    assert 'height="400"' in open(paths[0], encoding="utf-8").read()
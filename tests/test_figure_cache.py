@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import pandas as pd
+from plotly.graph_objs import Figure
+
+from src.utils.dataset_cache import DatasetCache
+from src.utils.figure_cache import FigureCache, figure_key
+
+
+def test_figure_cache_counts_hits_and_misses() -> None:
+    cache = FigureCache(max_entries=2)
+    key = figure_key("tok", "custom", "SiO2", "MgO", None)
+    assert cache.get(key) is None
+    fig = Figure()
+    cache.put(key, fig)
+    assert cache.get(key) is fig
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_figure_cache_lru_and_invalidation() -> None:
+    cache = FigureCache(max_entries=2)
+    key_a = figure_key("a", "custom", "SiO2", "MgO", None)
+    key_b = figure_key("b", "harker", None, "MgO", None)
+    key_c = figure_key("b", "harker", None, "FeO", None)
+    for key in (key_a, key_b, key_c):
+        cache.put(key, Figure())
+
+    assert cache.get(key_a) is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.invalidate("b") == 2
+    assert len(cache) == 0
+
+
+def test_dataset_eviction_invalidates_figures() -> None:
+    figures = FigureCache()
+    datasets = DatasetCache(max_bytes=1, on_evict=figures.invalidate)
+    figures.put(figure_key("a" * 32, "custom", "SiO2", "MgO", None), Figure())
+
+    datasets.put("a" * 32, pd.DataFrame({"SiO2": [50.0]}))
+    datasets.put("b" * 32, pd.DataFrame({"SiO2": [51.0]}))
+    assert len(figures) == 0
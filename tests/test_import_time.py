@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+
+# Repository root, so that the child interpreter can import src
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by callbacks on first use, never when importing the app package
+DEFERRED_MODULES = (
+    "pandas",
+    "plotly.express",
+    "src.plots.figures",
+    "src.utils.data_io",
+    "src.utils.profile",
+)
+
+
+def _import_in_subprocess(module: str) -> dict:
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module} as mod\n"
+        "print(json.dumps({'seconds': time.perf_counter() - start,\n"
+        "                  'modules': sorted(sys.modules),\n"
+        "                  'attrs': dir(mod)}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_importing_the_app_package_is_cheap() -> None:
+    info = _import_in_subprocess("src.app")
+    loaded = set(info["modules"]).intersection(DEFERRED_MODULES)
+    assert not loaded, f"import src.app ({info['seconds']:.2f} s) loaded {sorted(loaded)}"
+    # The app is built by the entry points, not as an import side effect
+    assert "app" not in info["attrs"]
+    assert "create_app" in info["attrs"]
+
+
+def test_cache_modules_do_not_import_pandas_or_plotly() -> None:
+    for module in ("src.utils.dataset_cache", "src.utils.figure_cache"):
+        info = _import_in_subprocess(module)
+        heavy = {m for m in info["modules"] if m.split(".")[0] in ("pandas", "plotly")}
+        assert not heavy, f"import {module} loaded {sorted(heavy)[:5]}"
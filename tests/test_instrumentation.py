@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from flask import Flask
+
+from src.utils.instrumentation import Metrics, note, stage
+
+
+def _server(metrics: Metrics) -> Flask:
+    server = Flask(__name__)
+
+    def update_graph() -> str:
+        with stage("build"):
+            note("figure-cache", "miss")
+        return "x" * 100
+
+    server.add_url_rule("/_dash-update-component", "update", update_graph, methods=["POST"])
+    metrics.install(server, callback_map={"graph.figure": {"callback": update_graph}})
+    return server
+
+
+def test_metrics_time_callbacks_and_add_server_timing() -> None:
+    metrics = Metrics()
+    metrics.add_gauges("figure_cache", lambda: {"hits": 2})
+    client = _server(metrics).test_client()
+
+    response = client.post("/_dash-update-component", json={"output": "graph.figure"})
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("total;dur=")
+    assert "build;dur=" in timing
+    assert 'figure-cache;desc="miss"' in timing
+
+    snap = metrics.snapshot()["callbacks"]["update_graph"]
+    assert snap["calls"] == 1
+    assert snap["response_bytes"] == 100
+    assert "build" in snap["stages"]
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert 'petrolite_callback_duration_seconds_count{callback="update_graph"} 1' in text
+    assert "petrolite_figure_cache_hits 2" in text
+
+
+def test_stage_is_a_no_op_outside_requests() -> None:
+    with stage("build"):
+        note("figure-cache", "hit")
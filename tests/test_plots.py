@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.plots.basic_xy import OTHER_LABEL, create_xy_scatter, group_buckets, group_codes
+from src.plots.harker import create_harker_plate, create_harker_scatter
+from src.plots.figures import build_figure
+from src.plots.tas import (
+    TAS_CLASSES,
+    UNCLASSIFIED,
+    add_tas_classification,
+    classify_tas,
+    create_tas_diagram,
+)
+from src.utils.data_io import get_numeric_and_categorical_columns
+from src.utils.labels import get_pretty_label
+
+
+def _make_dataset(n_rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "SiO2": rng.normal(55.0, 5.0, n_rows),
+            "MgO": rng.normal(5.0, 2.0, n_rows),
+            "FeO": rng.normal(8.0, 1.0, n_rows),
+            "RockType": rng.choice(["basalt", "andesite", "dacite"], n_rows),
+        }
+    )
+
+
+def test_create_xy_scatter_small_dataset_uses_svg_traces() -> None:
+    fig = create_xy_scatter(_make_dataset(50), "SiO2", "MgO", "RockType")
+    assert {trace.type for trace in fig.data} == {"scatter"}
+    assert sum(len(trace.x) for trace in fig.data) == 50
+    # Hover payload is limited to the plotted columns
+    assert all(trace.customdata is None for trace in fig.data)
+
+
+def test_create_xy_scatter_large_dataset_is_webgl_and_decimated() -> None:
+    fig = create_xy_scatter(
+        _make_dataset(20_000), "SiO2", "MgO", webgl_threshold=1_000, max_points=5_000
+    )
+    assert fig.data[0].type == "scattergl"
+    assert len(fig.data[0].x) <= 5_000 + 40 * 40
+
+
+def test_create_harker_scatter_uses_large_data_mode() -> None:
+    df = _make_dataset(6_000)
+    fig = create_harker_scatter(df, "FeO")
+    assert fig.data[0].type == "scattergl"
+
+
+def test_create_harker_plate_builds_one_panel_per_oxide() -> None:
+    df = _make_dataset(200)
+    df["CaO"] = df["MgO"] * 1.5
+    fig = create_harker_plate(df, group_col="RockType", oxides=("MgO", "FeO", "CaO", "K2O"))
+
+    # 3 present oxides x 3 groups, legend entries only on the first panel
+    assert len(fig.data) == 9
+    assert sum(trace.showlegend for trace in fig.data) == 3
+    assert fig.layout.yaxis.title.text == get_pretty_label("MgO")
+    assert fig.layout.yaxis3.title.text == get_pretty_label("CaO")
+
+    # With an odd number of panels, the right column ends one row higher
+    assert fig.layout.xaxis2.showticklabels
+    assert fig.layout.xaxis2.title.text == get_pretty_label("SiO2")
+    assert fig.layout.xaxis3.title.text == get_pretty_label("SiO2")
+    assert fig.layout.xaxis4.visible is False
+
+
+def test_figure_arrays_are_sent_as_float32_typed_arrays() -> None:
+    df = _make_dataset(100)
+    fig = create_xy_scatter(df, "SiO2", "MgO", "RockType")
+    assert all(trace.x.dtype == np.float32 for trace in fig.data)
+
+    trace = fig.to_dict()["data"][0]
+    assert trace["x"]["dtype"] == "f4"
+    assert "bdata" in trace["y"]
+
+
+def test_group_buckets_keeps_largest_groups_and_merges_the_rest() -> None:
+    values = np.array(["a", "b", "b", "c", "c", "c", "d"])
+    codes, names = pd.factorize(values)
+    buckets, labels, colors, merged = group_buckets(codes, names, top_n=2)
+
+    assert labels == ["c", "b", OTHER_LABEL]
+    assert buckets.tolist() == [2, 1, 1, 0, 0, 0, 2]
+    assert len(colors) == 3
+    assert merged == ["a", "d"]
+
+
+def test_group_codes_of_categorical_match_factorize() -> None:
+    values = pd.Series(["b", None, "a", "b", "c", None], dtype="str")
+    categorical = values.astype("category")
+
+    codes, names = group_codes(values)
+    cat_codes, cat_names = group_codes(categorical)
+    assert cat_codes.tolist() == codes.tolist()
+    assert [str(name) for name in cat_names] == [str(name) for name in names]
+
+    rows = np.array([4, 2, 0])
+    cat_codes, cat_names = group_codes(categorical, rows)
+    assert cat_codes.tolist() == [0, 1, 2]
+    assert [str(name) for name in cat_names] == ["c", "a", "b"]
+
+    df = _make_dataset(200)
+    fig = create_xy_scatter(df, "SiO2", "MgO", "RockType")
+    compact = create_xy_scatter(df.astype({"RockType": "category"}), "SiO2", "MgO", "RockType")
+    assert [trace.name for trace in compact.data] == [trace.name for trace in fig.data]
+
+
+def test_high_cardinality_group_is_collapsed_into_one_trace() -> None:
+    df = _make_dataset(2_000)
+    df["Sample"] = [f"S{i}" for i in range(len(df))]
+
+    fig = create_xy_scatter(df, "SiO2", "MgO", "Sample", max_groups=50)
+    data_traces = [trace for trace in fig.data if trace.x[0] is not None]
+    assert len(data_traces) == 1
+    assert len(data_traces[0].x) == 2_000
+    assert len(data_traces[0].marker.color) == 2_000
+    # Top-N legend entries plus "Other"
+    assert fig.data[-1].name == OTHER_LABEL
+    assert len(fig.data) == 1 + 10 + 1
+    assert fig.data[-1].meta["merged"] == 2_000 - 10
+
+    plate = create_harker_plate(df, group_col="Sample", oxides=("MgO", "FeO"), max_groups=50)
+    assert sum(trace.x[0] is not None for trace in plate.data) == 2
+
+
+def test_classify_tas_assigns_le_bas_fields() -> None:
+    silica = np.array([48.0, 60.0, 75.0, 55.0, 38.0, np.nan])
+    alkali = np.array([3.0, 4.0, 8.0, 15.0, 1.0, 5.0])
+    classes = classify_tas(silica, alkali)
+    assert list(classes) == [
+        "Basalt", "Andesite", "Rhyolite", "Phonolite", UNCLASSIFIED, UNCLASSIFIED,
+    ]
+
+
+def test_tas_classification_is_a_grouping_column() -> None:
+    df = pd.DataFrame({"SiO2": [48.0, 75.0], "Na2O": [2.0, 4.0], "K2O": [1.0, 4.0]})
+    df = add_tas_classification(df)
+    _, cat_cols = get_numeric_and_categorical_columns(df)
+    assert "TAS_class" in cat_cols
+
+    fig = create_tas_diagram(df, group_col="TAS_class")
+    assert len(fig.layout.shapes) == 15
+    assert {trace.name for trace in fig.data} == {"Basalt", "Rhyolite"}
+
+
+def test_grouping_by_tas_class_keeps_one_legend_entry_per_field() -> None:
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame(
+        {
+            "SiO2": rng.uniform(35.0, 80.0, n),
+            "Na2O": rng.uniform(0.0, 8.0, n),
+            "K2O": rng.uniform(0.0, 8.0, n),
+        }
+    )
+    df = add_tas_classification(df)
+    assert set(df["TAS_class"]) == set(TAS_CLASSES)
+
+    fig = build_figure(df, "tas", None, None, "TAS_class")
+    names = [trace.name for trace in fig.data if trace.showlegend is not False]
+    assert sorted(names) == sorted(TAS_CLASSES)
+    assert OTHER_LABEL not in names
+
+
+def test_build_figure_reports_missing_columns_in_its_title() -> None:
+    df = _make_dataset(50).assign(Na2O=3.0, K2O=2.0)
+    # Mg# is listed as derived but was not computed; Site is a stale group
+    for diagram_type, y_col, group_col, missing in (
+        ("custom", "Mg#", None, "Mg#"),
+        ("harker", "MgO", "Site", "Site"),
+        ("harker_plate", None, "Site", "Site"),
+        ("tas", None, "Site", "Site"),
+    ):
+        fig = build_figure(df, diagram_type, "SiO2", y_col, group_col)
+        assert not fig.data
+        assert missing in fig.layout.title.text
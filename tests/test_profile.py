@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.utils.profile import HIGH_CARDINALITY, ProfileCache, axis_range, profile_dataset
+
+
+def test_profile_dataset_statistics() -> None:
+    df = pd.DataFrame(
+        {
+            "SiO2": np.array([45.0, np.nan, 70.0], dtype=np.float32),
+            "Count": [1, 2, 3],
+            "RockType": ["basalt", "basalt", None],
+            "Sample": [f"S{i}" for i in range(3)],
+        }
+    )
+    profile = profile_dataset(df)
+
+    assert profile["n_rows"] == 3
+    assert profile["numeric"] == ["SiO2", "Count"]
+    assert profile["categorical"] == ["RockType", "Sample"]
+    assert profile["columns"]["SiO2"] == {"nulls": 1, "min": 45.0, "max": 70.0}
+    assert profile["columns"]["RockType"]["cardinality"] == 1
+    assert profile["columns"]["RockType"]["nulls"] == 1
+
+
+def test_profile_flags_high_cardinality_groups() -> None:
+    n = HIGH_CARDINALITY + 1
+    profile = profile_dataset(pd.DataFrame({"Sample": [f"S{i}" for i in range(n)]}))
+    assert profile["columns"]["Sample"]["high_cardinality"]
+
+
+def test_axis_range_pads_profile_extent() -> None:
+    profile = profile_dataset(pd.DataFrame({"MgO": [0.0, 10.0], "Empty": [np.nan, np.nan]}))
+    assert axis_range(profile, "MgO") == [-0.5, 10.5]
+    assert axis_range(profile, "Empty") is None
+    assert axis_range(profile, "Mg#") is None
+    assert axis_range(None, "MgO") is None
+
+
+def test_profile_cache_profiles_each_dataset_once() -> None:
+    cache = ProfileCache(max_entries=2)
+    df = pd.DataFrame({"MgO": [0.0, 10.0]})
+    assert cache.get("a") is None
+
+    profile = cache.get("a", df)
+    assert profile == profile_dataset(df)
+    assert cache.get("a", df.iloc[:1]) is profile
+    cache.get("b", df)
+    cache.get("c", df)
+    assert cache.get("a") is None
+    assert cache.invalidate("b") == 1
+    assert cache.invalidate("b") == 0
+    assert cache.stats() == {"entries": 1}
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.plots.figures import build_figure, figure_axes
+from src.utils.selection import (
+    lasso_mask,
+    pack_mask,
+    selection_mask,
+    trace_highlights,
+    unpack_mask,
+)
+
+
+def _points_in_polygon(x: np.ndarray, y: np.ndarray, xs: list, ys: list) -> np.ndarray:
+    # Reference even-odd test, one point at a time
+    inside = np.zeros(len(x), dtype=bool)
+    for k, (px, py) in enumerate(zip(x, y)):
+        for i in range(len(xs)):
+            xa, ya, xb, yb = xs[i - 1], ys[i - 1], xs[i], ys[i]
+            if (ya <= py < yb or yb <= py < ya) and px < xa + (py - ya) * (xb - xa) / (yb - ya):
+                inside[k] = not inside[k]
+    return inside
+
+
+def test_lasso_mask_matches_point_in_polygon() -> None:
+    rng = np.random.default_rng(0)
+    x, y = rng.uniform(0, 10, 2_000), rng.uniform(0, 10, 2_000)
+    x[:5] = np.nan
+    xs = [1.0, 8.0, 9.0, 5.0, 4.0, 2.0]
+    ys = [1.0, 2.0, 7.5, 4.0, 9.0, 6.0]
+
+    mask = lasso_mask(x, y, xs, ys)
+    np.testing.assert_array_equal(mask, _points_in_polygon(x, y, xs, ys))
+    assert not mask[:5].any()
+    assert not lasso_mask(x, y, [1.0, 2.0], [1.0, 2.0]).any()
+
+
+def test_selection_mask_resolves_harker_plate_panels() -> None:
+    df = pd.DataFrame(
+        {
+            "SiO2": [45.0, 50.0, 55.0, 60.0],
+            "MgO": [9.0, 7.0, 5.0, 3.0],
+            "CaO": [11.0, 9.0, 7.0, 5.0],
+        }
+    )
+    axes = figure_axes("harker_plate", None, None, df.columns)
+    assert axes == {("x", "y"): ("SiO2", "MgO"), ("x2", "y2"): ("SiO2", "CaO")}
+
+    def axis_values(x_col: str, y_col: str):
+        return df[x_col].to_numpy(), df[y_col].to_numpy()
+
+    # A box on the CaO panel
+    geometry = {"range": {"x2": [56.0, 44.0], "y2": [8.0, 12.0]}}
+    mask = selection_mask(geometry, axes, axis_values, len(df))
+    assert mask.tolist() == [True, True, False, False]
+    assert not selection_mask({}, axes, axis_values, len(df)).any()
+
+
+def test_trace_highlights_map_rows_to_decimated_traces() -> None:
+    rng = np.random.default_rng(1)
+    n = 20_000
+    df = pd.DataFrame(
+        {
+            "SiO2": rng.normal(55.0, 5.0, n),
+            "MgO": rng.normal(5.0, 2.0, n),
+            "RockType": rng.choice(["basalt", "andesite"], n),
+        }
+    )
+    trace_rows: list = []
+    fig = build_figure(df, "custom", "SiO2", "MgO", "RockType", trace_rows=trace_rows)
+    assert len(trace_rows) == len(fig.data)
+    for trace, rows in zip(fig.data, trace_rows):
+        assert len(trace.x) == len(rows) < n
+        assert (df["RockType"].to_numpy()[rows] == trace.name).all()
+
+    selected = df["SiO2"].to_numpy() > 60.0
+    highlights = trace_highlights(selected, trace_rows)
+    for trace, rows, bits in zip(fig.data, trace_rows, highlights):
+        points = unpack_mask(bits, len(rows))
+        np.testing.assert_array_equal(points, np.asarray(trace.x) > 60.0)
+        assert bits == pack_mask(points)
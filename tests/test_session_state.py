@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from src.utils.session_state import SessionStore, estimate_nbytes
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_estimate_nbytes_counts_frames_and_arrays() -> None:
+    df = pd.DataFrame({"SiO2": np.zeros(1000)})
+    assert estimate_nbytes(df) >= 8000
+    assert estimate_nbytes(np.zeros(10, dtype=np.float32)) == 40
+    assert estimate_nbytes(("token", df)) > estimate_nbytes(df)
+
+
+def test_heavy_session_only_evicts_its_own_entries() -> None:
+    released = []
+    store = SessionStore(
+        max_bytes=100,
+        max_session_bytes=60,
+        on_release=lambda session_id, key, value: released.append((session_id, key)),
+    )
+    store.put("light", "dataset", "a", nbytes=30)
+    store.put("heavy", "dataset", "b", nbytes=40)
+    store.put("heavy", "figures", "c", nbytes=40)
+
+    assert store.usage() == {"light": 30, "heavy": 40}
+    assert released == [("heavy", "dataset")]
+    assert store.get("light", "dataset") == "a"
+    assert store.stats()["evictions"] == 1
+
+
+def test_global_budget_evicts_least_recently_active_session_first() -> None:
+    store = SessionStore(max_bytes=100, max_session_bytes=100)
+    store.put("a", "dataset", "a", nbytes=40)
+    store.put("b", "dataset", "b", nbytes=40)
+    store.get("a", "dataset")  # "b" is now the least recently active
+    store.put("c", "dataset", "c", nbytes=40)
+
+    assert "b" not in store
+    assert store.session_bytes("a") == 40
+    assert store.nbytes == 80
+
+
+def test_idle_sessions_expire() -> None:
+    clock = _Clock()
+    store = SessionStore(ttl=60, clock=clock)
+    store.put("a", "profile", {"n_rows": 3})
+    clock.now = 30
+    store.put("b", "profile", {"n_rows": 4})
+    clock.now = 75
+
+    assert store.expire() == 1
+    assert "a" not in store and "b" in store
+    assert store.get("a", "profile") is None
+    assert store.stats()["expirations"] == 1
+
+
+def test_replacing_an_entry_releases_the_previous_value() -> None:
+    released = []
+    store = SessionStore(on_release=lambda session_id, key, value: released.append(value))
+    store.put("a", "dataset", ("t1", 1))
+    store.put("a", "dataset", ("t2", 2))
+
+    assert released == [("t1", 1)]
+    assert store.values("dataset") == [("t2", 2)]
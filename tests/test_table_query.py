@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.table_query import TableIndex, TableIndexCache, parse_filter_query
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "MgO": [12.0, 3.5, np.nan, 10.0, 15.2],
+            "RockType": ["Basalt", "Andesite", "Basalt", "Dacite", "Picrite"],
+        }
+    )
+
+
+def test_parse_filter_query() -> None:
+    clauses = parse_filter_query('{MgO} gt 10 && {RockType} icontains "bas"')
+    assert [(c.column, c.operator, c.value) for c in clauses] == [
+        ("MgO", ">", "10"),
+        ("RockType", "contains", "bas"),
+    ]
+    assert not clauses[1].case_sensitive
+    assert parse_filter_query("") == []
+    with pytest.raises(ValueError):
+        parse_filter_query("{MgO} between 1")
+
+
+def test_table_index_filters_with_sorted_index() -> None:
+    index = TableIndex(_frame())
+    assert index.filter(parse_filter_query("{MgO} > 10")).tolist() == [0, 4]
+    assert index.filter(parse_filter_query("{MgO} <= 10")).tolist() == [1, 3]
+    assert index.filter(parse_filter_query("{MgO} != 10")).tolist() == [0, 1, 4]
+    assert index.filter(parse_filter_query("{RockType} icontains bas")).tolist() == [0, 2]
+    assert index.filter(parse_filter_query("{RockType} scontains bas")).tolist() == []
+
+    selected = np.array([True, False, True, True, False])
+    assert index.filter(parse_filter_query("{MgO} >= 10"), selected).tolist() == [0, 3]
+
+
+def test_table_index_pages_and_sorts() -> None:
+    index = TableIndex(_frame())
+
+    records, page_count = index.query(
+        None, [{"column_id": "MgO", "direction": "desc"}], page_current=0, page_size=2
+    )
+    assert page_count == 3
+    assert [r["MgO"] for r in records] == [15.2, 12.0]
+
+    records, _ = index.query(
+        None, [{"column_id": "MgO", "direction": "desc"}], page_current=2, page_size=2
+    )
+    assert np.isnan(records[0]["MgO"])
+
+    records, page_count = index.query(
+        "{MgO} >= 3.5",
+        [
+            {"column_id": "RockType", "direction": "asc"},
+            {"column_id": "MgO", "direction": "desc"},
+        ],
+        page_current=0,
+        page_size=10,
+    )
+    assert page_count == 1
+    assert [r["RockType"] for r in records] == ["Andesite", "Basalt", "Dacite", "Picrite"]
+
+
+def test_table_index_compares_float32_at_stored_precision() -> None:
+    index = TableIndex(pd.DataFrame({"MgO": np.array([7.2, 5.1], dtype=np.float32)}))
+    assert index.filter(parse_filter_query("{MgO} = 7.2")).tolist() == [0]
+
+
+def test_table_index_cache_evicts_by_size() -> None:
+    df = pd.DataFrame({"MgO": np.arange(1000.0), "SiO2": np.arange(1000.0)})
+    one_column = TableIndex(df)
+    one_column.filter(parse_filter_query("{MgO} > 10"))
+    budget = one_column.nbytes + 100
+
+    # Within one dataset, the least recently used column index is dropped
+    index = TableIndex(df, max_bytes=budget)
+    index.filter(parse_filter_query("{MgO} > 10 && {SiO2} > 10"))
+    assert index.nbytes == one_column.nbytes
+
+    cache = TableIndexCache(max_bytes=budget)
+    first = cache.get("a", df)
+    first.filter(parse_filter_query("{MgO} > 10"))
+    other = df.copy()
+    cache.get("b", other).filter(parse_filter_query("{MgO} > 10"))
+    # The indexes are measured again on the next lookup
+    second = cache.get("b", other)
+    assert second is not first
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["nbytes"] <= budget
+    assert cache.invalidate("b") == 1
+    assert cache.invalidate("a") == 0